@@ -0,0 +1,204 @@
+"""Per-client rate limits and a concurrency gate for the expensive write routes.
+
+Each route listed in RATE_LIMITS gets a token bucket per client: the
+signed-in user when their session is already cached, the client address
+otherwise. A request over its client's limit, or one arriving while
+ADMISSION_MAX_CONCURRENCY requests on these routes are already in flight,
+gets a 429 with ``Retry-After`` before any handler runs or a database
+connection is taken, so a flood of writes cannot starve reads of the pool.
+
+    RATE_LIMITS="POST /leaderboard=30/60, POST /auth/login=10/60"
+
+allows bursts of 30 score submissions per client, refilled at 30 a minute.
+
+Buckets and the in-flight count live in each worker process. uvicorn
+spreads a client's requests over its WEB_CONCURRENCY workers, so a client
+gets up to that many times the configured rate: divide the intended
+per-client limit by the worker count. An exact limit across workers would
+need a shared store. The concurrency cap stays per worker, like the
+connection pool it protects.
+"""
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from starlette.requests import cookie_parser
+
+from .models import ApiResponse
+from .sessions import SESSION_COOKIE, token_hash, session_store
+
+RATE_LIMITS = os.getenv("RATE_LIMITS", "POST /leaderboard=30/60, POST /auth/login=10/60")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "1000000"))
+# Per worker, leaving the rest of its pool (DB_POOL_SIZE + DB_MAX_OVERFLOW = 20 by default) to reads
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "12"))
+# e.g. x-forwarded-for behind a proxy that sets it; the last address is the one the proxy saw
+CLIENT_ADDRESS_HEADER = os.getenv("CLIENT_ADDRESS_HEADER", "").lower().encode()
+
+_LIMITED = ApiResponse(success=False, error="Too many requests, slow down").model_dump_json().encode()
+_SHED = ApiResponse(success=False, error="Server busy, try again shortly").model_dump_json().encode()
+
+
+def parse_limits(spec: str) -> Dict[Tuple[str, str], Tuple[int, float]]:
+    """``{(method, path): (burst, seconds)}`` from ``"METHOD /path=burst/seconds, ..."``."""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        route, _, limit = item.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        burst, _, seconds = limit.partition("/")
+        limits[(method.upper(), path.strip())] = (int(burst), float(seconds))
+    return limits
+
+
+class TokenBuckets:
+    """Token buckets for many keys in one float each.
+
+    Stores the theoretical arrival time of each key's next request (GCRA):
+    a bucket refilled to ``burst`` tokens is the same as no entry at all, so
+    entries lapse once that time has passed. Every call drops up to two
+    lapsed entries from the least recently used end, and ``max_keys`` caps
+    the map outright; a key evicted early just starts again with a full
+    bucket. Keys are stored as their hash, not the client string.
+    """
+
+    def __init__(self, burst: int, seconds: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.burst = burst
+        self.interval = seconds / burst
+        self.window = seconds
+        self.max_keys = max_keys
+        self._next: "OrderedDict[int, float]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def __len__(self) -> int:
+        return len(self._next)
+
+    def clear(self):
+        self._next.clear()
+        self.allowed = self.limited = 0
+
+    def take(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Spend a token of ``key``'s bucket; returns 0 if allowed, else seconds until a token is free."""
+        now = time.monotonic() if now is None else now
+        store = self._next
+        for _ in range(2):
+            if not store:
+                break
+            oldest = next(iter(store))
+            if store[oldest] > now:
+                break
+            del store[oldest]
+
+        key = hash(key)
+        arrival = max(store.get(key, now), now) + self.interval
+        wait = arrival - now - self.window
+        if wait > 0:
+            self.limited += 1
+            return wait
+        store[key] = arrival
+        store.move_to_end(key)
+        if len(store) > self.max_keys:
+            store.popitem(last=False)
+        self.allowed += 1
+        return 0.0
+
+
+def _client_key(scope) -> str:
+    headers = dict(scope["headers"])
+    token = cookie_parser(headers.get(b"cookie", b"").decode("latin-1")).get(SESSION_COOKIE)
+    if not token:
+        scheme, _, credentials = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+        token = credentials.strip() if scheme.lower() == "bearer" else None
+    if token:
+        # Only a session already cached counts as a user; resolving one would need the database
+        user = session_store.users.peek(token_hash(token))
+        if getattr(user, "id", None):
+            return user.id
+    if CLIENT_ADDRESS_HEADER and CLIENT_ADDRESS_HEADER in headers:
+        return headers[CLIENT_ADDRESS_HEADER].decode("latin-1").rsplit(",", 1)[-1].strip()
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+class Admission:
+    """Rate limits by route and client, plus the shared in-flight cap."""
+
+    def __init__(self, limits: str = RATE_LIMITS, max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+                 max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.buckets = {
+            route: TokenBuckets(burst, seconds, max_keys) for route, (burst, seconds) in parse_limits(limits).items()
+        }
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.shed = 0
+
+    def clear(self):
+        for buckets in self.buckets.values():
+            buckets.clear()
+        self.shed = 0
+
+    def admit(self, scope) -> Tuple[bool, float, bytes]:
+        """Whether the route is limited, the wait before retrying (0 to go ahead) and the body saying why."""
+        buckets = self.buckets.get((scope["method"], scope["path"]))
+        if buckets is None:
+            return False, 0.0, b""
+        if self.in_flight >= self.max_concurrency:
+            self.shed += 1
+            return True, 1.0, _SHED
+        wait = buckets.take(_client_key(scope))
+        return True, wait, _LIMITED
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "inFlight": self.in_flight,
+            "maxConcurrency": self.max_concurrency,
+            "shed": self.shed,
+            "routes": {
+                f"{method} {path}": {
+                    "burst": buckets.burst, "seconds": buckets.window, "keys": len(buckets),
+                    "allowed": buckets.allowed, "limited": buckets.limited,
+                }
+                for (method, path), buckets in self.buckets.items()
+            },
+        }
+
+
+admission = Admission()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware answering 429 for requests ``Admission`` turns away, before routing."""
+
+    def __init__(self, app, gate: Optional[Admission] = None):
+        self.app = app
+        self.gate = gate or admission
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        gate = self.gate
+        limited, wait, body = gate.admit(scope)
+        if not limited:
+            await self.app(scope, receive, send)
+            return
+        if wait:
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(math.ceil(wait)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        gate.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.in_flight -= 1
@@ -0,0 +1,494 @@
+import asyncio
+import base64
+import fcntl
+import logging
+import os
+import struct
+import uuid
+import zlib
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# local: one worker, nothing leaves the process. socket: workers on one host, brokered over a
+# Unix socket. postgres: LISTEN/NOTIFY on the app database, for workers on any host
+BACKPLANE = os.getenv("BACKPLANE", "local")
+BACKPLANE_SOCKET = os.getenv("BACKPLANE_SOCKET", "/tmp/serpent-backplane.sock")
+BACKPLANE_CHANNEL = os.getenv("BACKPLANE_CHANNEL", "serpent_backplane")
+BACKPLANE_QUEUE_SIZE = int(os.getenv("BACKPLANE_QUEUE_SIZE", "1024"))
+# Bytes buffered for one slow peer before messages to it are dropped
+BACKPLANE_MAX_BUFFER = int(os.getenv("BACKPLANE_MAX_BUFFER", str(16 * 1024 * 1024)))
+LEADER_RETRY_SECONDS = float(os.getenv("BACKPLANE_LEADER_RETRY_SECONDS", "1"))
+
+Handler = Callable[[bytes], None]
+
+_LENGTH = struct.Struct("<I")
+
+
+def pack_envelope(sender: str, channel: str, message: bytes) -> bytes:
+    head = f"{sender} {channel}".encode()
+    return bytes([len(head)]) + head + message
+
+
+def unpack_envelope(data: bytes) -> Tuple[str, str, bytes]:
+    sender, channel = data[1:1 + data[0]].decode().split(" ", 1)
+    return sender, channel, data[1 + data[0]:]
+
+
+class Backplane:
+    """Messages between the workers of one deployment, and which of them leads.
+
+    ``publish`` hands a message to every *other* worker subscribed to the
+    channel; it never blocks and never raises, and a message that cannot be
+    delivered is dropped and counted, so subscribers must tolerate gaps.
+    Exactly one worker is the leader at a time and runs the singletons (the
+    live simulation); when it goes away another is promoted and the
+    callback given to :meth:`on_promote` runs there. A leader that loses
+    its claim without stopping (its connection dropped) is demoted and runs
+    the :meth:`on_demote` callback, since another worker may lead by then.
+    """
+
+    kind = "local"
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex[:12]
+        self.leader = False
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._on_promote: Optional[Callable[[], Awaitable[None]]] = None
+        self._on_demote: Optional[Callable[[], Awaitable[None]]] = None
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_promote(self, callback: Callable[[], Awaitable[None]]):
+        self._on_promote = callback
+
+    def on_demote(self, callback: Callable[[], Awaitable[None]]):
+        self._on_demote = callback
+
+    def publish(self, channel: str, message: bytes):
+        raise NotImplementedError
+
+    async def start(self):
+        raise NotImplementedError
+
+    async def stop(self):
+        raise NotImplementedError
+
+    def _deliver(self, channel: str, message: bytes):
+        self.received += 1
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("Backplane handler for %s failed", channel)
+
+    async def _promote(self):
+        self.leader = True
+        logger.info("Worker %s is now the leader", self.worker_id)
+        if self._on_promote is not None:
+            try:
+                await self._on_promote()
+            except Exception:
+                logger.exception("Taking over as leader failed")
+
+    async def _demote(self):
+        self.leader = False
+        logger.warning("Worker %s lost the leadership", self.worker_id)
+        if self._on_demote is not None:
+            try:
+                await self._on_demote()
+            except Exception:
+                logger.exception("Stepping down as leader failed")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "kind": self.kind,
+            "worker": self.worker_id,
+            "leader": self.leader,
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+        }
+
+
+class LocalBus:
+    """Connects in-process backplanes, e.g. several simulated workers in one test."""
+
+    def __init__(self):
+        self.members: List["LocalBackplane"] = []
+
+
+class LocalBackplane(Backplane):
+    """In-process backplane. On its own bus (the default) it is the only worker and always leads."""
+
+    def __init__(self, bus: Optional[LocalBus] = None):
+        super().__init__()
+        self.bus = bus or LocalBus()
+
+    def publish(self, channel: str, message: bytes):
+        self.published += 1
+        others = [member for member in self.bus.members if member is not self]
+        if others:
+            loop = asyncio.get_running_loop()
+            for member in others:
+                # Delivered on a later loop turn, like a real transport
+                loop.call_soon(member._deliver, channel, message)
+
+    async def start(self):
+        self.leader = not any(member.leader for member in self.bus.members)
+        self.bus.members.append(self)
+
+    async def stop(self):
+        if self in self.bus.members:
+            self.bus.members.remove(self)
+        if self.leader and self.bus.members:
+            self.leader = False
+            await self.bus.members[0]._promote()
+
+
+class SocketBackplane(Backplane):
+    """Workers on one host, relayed by whichever of them holds a lock file.
+
+    The lock holder listens on a Unix socket and forwards every message to
+    the other connections; the rest connect to it. The kernel drops the
+    lock when its holder exits, and the first worker to take it over binds
+    the socket again and is promoted.
+    """
+
+    kind = "socket"
+
+    def __init__(self, path: str = BACKPLANE_SOCKET, max_buffer: int = BACKPLANE_MAX_BUFFER,
+                 retry: float = LEADER_RETRY_SECONDS):
+        super().__init__()
+        self.path = path
+        self.max_buffer = max_buffer
+        self.retry = retry
+        self._lock_file = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._upstream: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _try_lock(self) -> bool:
+        lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _send(self, writer: asyncio.StreamWriter, frame: bytes):
+        if writer.is_closing() or writer.transport.get_write_buffer_size() > self.max_buffer:
+            self.dropped += 1
+            return
+        writer.write(frame)
+
+    def publish(self, channel: str, message: bytes):
+        self.published += 1
+        envelope = pack_envelope(self.worker_id, channel, message)
+        frame = _LENGTH.pack(len(envelope)) + envelope
+        if self._server is not None:
+            for peer in self._peers:
+                self._send(peer, frame)
+        elif self._upstream is not None:
+            self._send(self._upstream, frame)
+        else:
+            self.dropped += 1
+
+    async def _read(self, reader: asyncio.StreamReader, source: Optional[asyncio.StreamWriter]):
+        try:
+            while True:
+                size = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))[0]
+                envelope = await reader.readexactly(size)
+                if source is not None:
+                    # Broker: relay to every other worker as well
+                    frame = _LENGTH.pack(size) + envelope
+                    for peer in self._peers:
+                        if peer is not source:
+                            self._send(peer, frame)
+                _, channel, message = unpack_envelope(envelope)
+                self._deliver(channel, message)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._peers.add(writer)
+        try:
+            await self._read(reader, writer)
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _lead(self):
+        if os.path.exists(self.path):
+            # Left behind by a leader that died; we hold the lock, so nobody is serving it
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve_peer, path=self.path)
+        self.leader = True
+
+    async def _connect(self) -> Optional[asyncio.StreamReader]:
+        try:
+            reader, self._upstream = await asyncio.open_unix_connection(self.path)
+        except OSError:
+            return None
+        return reader
+
+    async def _follow(self, reader: Optional[asyncio.StreamReader]):
+        while True:
+            if reader is not None:
+                await self._read(reader, None)
+                self._upstream.close()
+                self._upstream = None
+            if self._try_lock():
+                await self._lead()
+                await self._promote()
+                return
+            reader = await self._connect()
+            if reader is None:
+                # The new leader holds the lock but may not be listening yet
+                await asyncio.sleep(self.retry / 10)
+
+    async def start(self):
+        if self._try_lock():
+            await self._lead()
+            return
+        reader = None
+        for _ in range(100):
+            reader = await self._connect()
+            if reader is not None:
+                break
+            if self._try_lock():
+                await self._lead()
+                return
+            await asyncio.sleep(self.retry / 10)
+        self._task = asyncio.create_task(self._follow(reader))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._upstream is not None:
+            self._upstream.close()
+            self._upstream = None
+        if self._server is not None:
+            self._server.close()
+            for peer in list(self._peers):
+                peer.close()
+            await self._server.wait_closed()
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if self._lock_file is not None:
+            # Closing the file releases the lock for the next leader
+            self._lock_file.close()
+            self._lock_file = None
+        self.leader = False
+
+
+# NOTIFY payloads are text and at most 8000 bytes
+NOTIFY_CHUNK = 7000
+# Arbitrary, but fixed: every worker must contend for the same advisory lock
+LEADER_LOCK_KEY = 0x5E2_9E17
+
+
+def notify_chunks(sender: str, message_id: int, envelope: bytes, size: int = NOTIFY_CHUNK) -> List[str]:
+    """Split an envelope into NOTIFY payloads: ``sender:id:index:count:`` then base64 of compressed bytes."""
+    data = base64.b64encode(zlib.compress(envelope, 1)).decode()
+    parts = [data[i:i + size] for i in range(0, len(data), size)] or [""]
+    return [f"{sender}:{message_id}:{i}:{len(parts)}:{part}" for i, part in enumerate(parts)]
+
+
+class ChunkAssembler:
+    """Reassembles :func:`notify_chunks` output; each sender's chunks arrive in order."""
+
+    def __init__(self):
+        self._partial: Dict[str, Tuple[str, List[str]]] = {}
+
+    def add(self, payload: str) -> Optional[Tuple[str, bytes]]:
+        sender, message_id, index, count, part = payload.split(":", 4)
+        if index == "0":
+            self._partial[sender] = (message_id, [])
+        partial = self._partial.get(sender)
+        if partial is None or partial[0] != message_id or len(partial[1]) != int(index):
+            # Missed a chunk; drop the rest of this message
+            self._partial.pop(sender, None)
+            return None
+        partial[1].append(part)
+        if len(partial[1]) < int(count):
+            return None
+        del self._partial[sender]
+        return sender, zlib.decompress(base64.b64decode("".join(partial[1])))
+
+
+class PostgresBackplane(Backplane):
+    """LISTEN/NOTIFY on the app's own Postgres, so workers can run on several hosts.
+
+    One dedicated asyncpg connection listens, sends and holds the
+    session-level advisory lock that makes its worker the leader; if that
+    worker dies the lock is released with its connection and the first
+    follower to retry takes it.
+
+    The connection is checked every ``retry`` seconds. Once it is closed or
+    stops answering, the lock is as good as gone, so a leader demotes itself
+    before reconnecting and contending again like any follower. Until the
+    check notices, a leader cut off from the server may overlap a new one
+    for up to about two ``retry`` intervals. Messages published while
+    disconnected are dropped.
+    """
+
+    kind = "postgres"
+
+    def __init__(self, dsn: str, channel: str = BACKPLANE_CHANNEL, queue_size: int = BACKPLANE_QUEUE_SIZE,
+                 retry: float = LEADER_RETRY_SECONDS):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self.retry = retry
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._assembler = ChunkAssembler()
+        self._message_id = 0
+        self._conn = None
+        self._conn_lock = asyncio.Lock()
+        self._lost = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.reconnects = 0
+
+    def publish(self, channel: str, message: bytes):
+        try:
+            self._outbox.put_nowait(pack_envelope(self.worker_id, channel, message))
+            self.published += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def _on_notify(self, connection, pid, channel, payload):
+        if payload.startswith(self.worker_id + ":"):
+            return
+        try:
+            assembled = self._assembler.add(payload)
+        except (ValueError, zlib.error):
+            self.dropped += 1
+            return
+        if assembled is not None:
+            _, channel, message = unpack_envelope(assembled[1])
+            self._deliver(channel, message)
+
+    def _on_terminated(self, connection):
+        if connection is self._conn:
+            self._lost.set()
+
+    async def _send_loop(self):
+        while True:
+            envelope = await self._outbox.get()
+            self._message_id += 1
+            conn = self._conn
+            if conn is None:
+                self.dropped += 1
+                continue
+            try:
+                async with self._conn_lock:
+                    for chunk in notify_chunks(self.worker_id, self._message_id, envelope):
+                        await conn.execute("SELECT pg_notify($1, $2)", self.channel, chunk, timeout=self.retry)
+            except Exception as e:
+                self.dropped += 1
+                logger.warning("Backplane NOTIFY failed: %s", e)
+                self._lost.set()
+
+    async def _connect(self):
+        import asyncpg
+
+        conn = await asyncpg.connect(self.dsn, timeout=max(self.retry, 5))
+        conn.add_termination_listener(self._on_terminated)
+        await conn.add_listener(self.channel, self._on_notify)
+        self._lost.clear()
+        self._conn = conn
+
+    async def _check(self) -> bool:
+        """Take the lock if free, or, holding it, make sure the session that holds it is alive."""
+        async with self._conn_lock:
+            if self.leader:
+                await self._conn.fetchval("SELECT 1", timeout=self.retry)
+                return False
+            return await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", LEADER_LOCK_KEY, timeout=self.retry)
+
+    async def _hold(self):
+        """Contend for or keep the leadership until the connection is lost."""
+        while not self._lost.is_set():
+            if await self._check():
+                await self._promote()
+            try:
+                await asyncio.wait_for(self._lost.wait(), self.retry)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _disconnected(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.terminate()
+        if self.leader:
+            # The advisory lock went with the session
+            await self._demote()
+
+    async def _run(self):
+        while True:
+            try:
+                if self._conn is None:
+                    await self._connect()
+                    self.reconnects += 1
+                    logger.info("Backplane reconnected")
+                await self._hold()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Backplane connection lost: %s", e)
+            await self._disconnected()
+            await asyncio.sleep(self.retry)
+
+    async def start(self):
+        await self._connect()
+        async with self._conn_lock:
+            self.leader = await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", LEADER_LOCK_KEY)
+        self._tasks.append(asyncio.create_task(self._send_loop()))
+        self._tasks.append(asyncio.create_task(self._run()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._conn is not None:
+            # Closing the session releases the advisory lock
+            try:
+                await self._conn.close(timeout=self.retry)
+            except Exception:
+                self._conn.terminate()
+            self._conn = None
+        self.leader = False
+
+    def stats(self) -> Dict[str, object]:
+        stats = super().stats()
+        stats["connected"] = self._conn is not None
+        stats["reconnects"] = self.reconnects
+        return stats
+
+
+def create_backplane(kind: str = BACKPLANE, database_url: str = "") -> Backplane:
+    if kind == "socket":
+        return SocketBackplane()
+    if kind == "postgres":
+        if not database_url.startswith("postgresql"):
+            raise ValueError("BACKPLANE=postgres needs a Postgres DATABASE_URL")
+        # asyncpg takes a plain libpq URL, without SQLAlchemy's driver suffix
+        return PostgresBackplane(database_url.replace("postgresql+asyncpg://", "postgresql://", 1))
+    if kind == "local":
+        return LocalBackplane()
+    raise ValueError(f"Unknown BACKPLANE {kind!r}")
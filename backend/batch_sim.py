@@ -0,0 +1,205 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .engine import BOARD_SIZE, FOOD_SCORE, INITIAL_DIRECTION, INITIAL_SNAKE, Cell
+
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+DIRECTION_INDEX = {name: i for i, name in enumerate(DIRECTIONS)}
+DELTAS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int16)
+OPPOSITE = np.array([1, 0, 3, 2], dtype=np.int8)
+# The three directions a snake heading in direction i may take
+NON_REVERSE = np.array([[0, 2, 3], [1, 2, 3], [0, 1, 2], [0, 1, 3]], dtype=np.int8)
+
+NO_FOOD = -1
+
+
+class BatchStep:
+    """Per-board outcome of one :meth:`BatchSimulator.step`, as arrays indexed by slot."""
+
+    __slots__ = ("heads", "tails", "tail_removed", "ate", "dead", "turned")
+
+    def __init__(self, heads: np.ndarray, tails: np.ndarray, tail_removed: np.ndarray, ate: np.ndarray,
+                 dead: np.ndarray, turned: np.ndarray):
+        self.heads = heads
+        self.tails = tails  # Cell each board vacated; only meaningful where tail_removed
+        self.tail_removed = tail_removed
+        self.ate = ate
+        self.dead = dead  # Crashed this step and restarted from the initial snake
+        self.turned = turned
+
+
+class BatchSimulator:
+    """Many snake boards advanced together by vectorized NumPy steps.
+
+    Applies the same rules as :class:`~backend.engine.SnakeEngine`, but each
+    board is a row in a set of arrays: an ``N x size x size`` occupancy grid,
+    a ring buffer of body cells, head index, length, direction, food and
+    score. One :meth:`step` moves every board with a handful of array
+    operations instead of a Python call per game. Boards that crash restart,
+    as bots do in the live lobby.
+    """
+
+    def __init__(self, size: int = BOARD_SIZE, capacity: int = 64, seed: Optional[int] = None):
+        self.size = size
+        self.count = 0
+        self.ticks = 0
+        self.rng = np.random.default_rng(seed)
+        # Ring capacity: a snake can never be longer than the board
+        self._ring = size * size
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        size, ring = self.size, self._ring
+        self.occupied = np.zeros((capacity, size, size), dtype=bool)
+        self.cells = np.zeros((capacity, ring, 2), dtype=np.int16)
+        self.head = np.zeros(capacity, dtype=np.int32)
+        self.length = np.zeros(capacity, dtype=np.int32)
+        self.direction = np.zeros(capacity, dtype=np.int8)
+        self.food = np.full((capacity, 2), NO_FOOD, dtype=np.int16)
+        self.score = np.zeros(capacity, dtype=np.int64)
+        self.walls = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        old = (self.occupied, self.cells, self.head, self.length, self.direction, self.food, self.score, self.walls)
+        self._allocate(2 * len(self.head))
+        new = (self.occupied, self.cells, self.head, self.length, self.direction, self.food, self.score, self.walls)
+        for src, dst in zip(old, new):
+            dst[:self.count] = src[:self.count]
+
+    def add(self, snake: Sequence[Cell], direction: str, mode: str, food: Optional[Cell] = None,
+            score: int = 0) -> int:
+        """Add a board and return its slot."""
+        if self.count == len(self.head):
+            self._grow()
+        slot = self.count
+        self.count += 1
+        self.walls[slot] = mode == "walls"
+        self._place(slot, snake, direction, score)
+        if food is None:
+            self._spawn_food(np.array([slot]))
+        else:
+            self.food[slot] = food
+        return slot
+
+    def remove(self, slot: int) -> Optional[int]:
+        """Drop a board by moving the last one into its slot.
+
+        Returns the old slot of the board that moved, or None if none did.
+        """
+        last = self.count - 1
+        self.count = last
+        if slot == last:
+            return None
+        for array in (self.occupied, self.cells, self.head, self.length, self.direction,
+                      self.food, self.score, self.walls):
+            array[slot] = array[last]
+        return last
+
+    def _place(self, slot: int, snake: Sequence[Cell], direction: str, score: int):
+        cells = np.asarray(snake, dtype=np.int16).reshape(-1, 2)
+        self.occupied[slot] = False
+        self.occupied[slot, cells[:, 1], cells[:, 0]] = True
+        self.cells[slot, :len(cells)] = cells
+        self.head[slot] = 0
+        self.length[slot] = len(cells)
+        self.direction[slot] = DIRECTION_INDEX[direction]
+        self.score[slot] = score
+
+    def _spawn_food(self, slots: np.ndarray):
+        if not len(slots):
+            return
+        # A random key per cell, with occupied cells ruled out; argmax picks a uniform free cell
+        keys = self.rng.random((len(slots), self.size * self.size))
+        keys[self.occupied[slots].reshape(len(slots), -1)] = -1.0
+        best = keys.argmax(axis=1)
+        full = keys[np.arange(len(slots)), best] < 0
+        self.food[slots, 0] = np.where(full, NO_FOOD, best % self.size)
+        self.food[slots, 1] = np.where(full, NO_FOOD, best // self.size)
+
+    def snake(self, slot: int) -> List[Cell]:
+        order = (self.head[slot] + np.arange(self.length[slot])) % self._ring
+        return [(int(x), int(y)) for x, y in self.cells[slot, order]]
+
+    def food_at(self, slot: int) -> Optional[Cell]:
+        x, y = self.food[slot]
+        return None if x == NO_FOOD else (int(x), int(y))
+
+    def heads(self) -> np.ndarray:
+        n = self.count
+        return self.cells[np.arange(n), self.head[:n]]
+
+    def choose_directions(self) -> np.ndarray:
+        """Vectorized port of the per-game move choice (``benchmarks.batch_sim.choose_direction``).
+
+        70% of the time a bot steps along the longer axis towards the food,
+        unless that would reverse it; otherwise it picks a random non-reverse
+        direction.
+        """
+        n = self.count
+        current = self.direction[:n]
+        heads = self.heads().astype(np.int32)
+        food = self.food[:n].astype(np.int32)
+        dx = food[:, 0] - heads[:, 0]
+        dy = food[:, 1] - heads[:, 1]
+
+        horizontal = np.abs(dx) > np.abs(dy)
+        greedy = np.where(
+            horizontal,
+            np.where(dx > 0, DIRECTION_INDEX["RIGHT"], DIRECTION_INDEX["LEFT"]),
+            np.where(dy > 0, DIRECTION_INDEX["DOWN"], DIRECTION_INDEX["UP"]),
+        ).astype(np.int8)
+        moving = np.where(horizontal, dx != 0, dy != 0)
+        use_greedy = (
+            (self.rng.random(n) < 0.7) & moving & (greedy != OPPOSITE[current]) & (food[:, 0] != NO_FOOD)
+        )
+        random_choice = NON_REVERSE[current, self.rng.integers(0, 3, n)]
+        return np.where(use_greedy, greedy, random_choice)
+
+    def step(self, directions: Optional[np.ndarray] = None) -> BatchStep:
+        """Advance every board one cell; reverse turns are ignored as in the browser."""
+        n = self.count
+        size = self.size
+        idx = np.arange(n)
+        current = self.direction[:n]
+        if directions is None:
+            directions = current
+        directions = np.where(directions == OPPOSITE[current], current, directions).astype(np.int8)
+        turned = directions != current
+        self.direction[:n] = directions
+
+        heads = self.cells[idx, self.head[:n]].astype(np.int32)
+        moves = DELTAS[directions]
+        x = heads[:, 0] + moves[:, 0]
+        y = heads[:, 1] + moves[:, 1]
+
+        walls = self.walls[:n]
+        outside = (x < 0) | (x >= size) | (y < 0) | (y >= size)
+        x = np.where(walls, x, x % size)
+        y = np.where(walls, y, y % size)
+        dead = walls & outside
+        # Checked before the tail moves, so the tail cell counts as occupied
+        dead |= self.occupied[idx, np.clip(y, 0, size - 1), np.clip(x, 0, size - 1)]
+
+        alive = ~dead
+        ate = alive & (x == self.food[:n, 0]) & (y == self.food[:n, 1])
+        moving = alive & ~ate
+
+        tails = self.cells[idx, (self.head[:n] + self.length[:n] - 1) % self._ring]
+        self.occupied[idx[moving], tails[moving, 1], tails[moving, 0]] = False
+
+        live = idx[alive]
+        self.head[live] = (self.head[live] - 1) % self._ring
+        self.cells[live, self.head[live], 0] = x[alive]
+        self.cells[live, self.head[live], 1] = y[alive]
+        self.occupied[live, y[alive], x[alive]] = True
+        self.length[idx[ate]] += 1
+        self.score[idx[ate]] += FOOD_SCORE
+        self._spawn_food(idx[ate])
+
+        for slot in idx[dead]:
+            self._place(slot, INITIAL_SNAKE, INITIAL_DIRECTION, 0)
+        self._spawn_food(idx[dead])
+
+        self.ticks += 1
+        return BatchStep(np.stack([x, y], axis=1), tails, moving, ate, dead, turned & alive)
@@ -0,0 +1,94 @@
+"""Per-request cost of AdmissionMiddleware, and the limiter's memory per client key.
+
+    python -m backend.benchmarks.admission --requests 20000 --keys 1000000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from fastapi import FastAPI
+
+from ..admission import Admission, AdmissionMiddleware, TokenBuckets
+
+
+def make_app(limited: bool) -> FastAPI:
+    app = FastAPI()
+    if limited:
+        # Generous enough that every request is admitted: this measures the check, not the 429
+        app.add_middleware(AdmissionMiddleware, gate=Admission("POST /submit=1000000000/1", max_concurrency=1000))
+
+    @app.post("/submit")
+    async def submit():
+        return {"ok": True}
+
+    return app
+
+
+async def drive(app: FastAPI, count: int, clients: int) -> float:
+    scope = {
+        "type": "http", "method": "POST", "path": "/submit", "raw_path": b"/submit", "query_string": b"",
+        "headers": [(b"cookie", b"theme=dark")], "http_version": "1.1", "scheme": "http",
+        "server": ("test", 80), "root_path": "",
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    addresses = [(f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}", 5000) for n in range(clients)]
+    for n in range(100):
+        await app({**scope, "client": addresses[n % clients]}, receive, send)
+    start = time.perf_counter()
+    for n in range(count):
+        await app({**scope, "client": addresses[n % clients]}, receive, send)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def admit_cost(count: int, clients: int) -> float:
+    """The check alone, without the ASGI app around it."""
+    admission = Admission("POST /submit=1000000000/1")
+    scopes = [
+        {"method": "POST", "path": "/submit", "headers": [(b"cookie", b"theme=dark")],
+         "client": (f"10.0.{n >> 8}.{n & 255}", 5000)}
+        for n in range(clients)
+    ]
+    start = time.perf_counter()
+    for n in range(count):
+        admission.admit(scopes[n % clients])
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def key_memory(keys: int):
+    buckets = TokenBuckets(burst=30, seconds=60, max_keys=keys)
+    tracemalloc.start()
+    for n in range(keys):
+        buckets.take(f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}#{n >> 24}", now=0.0)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # One past the cap evicts the oldest key instead of growing
+    buckets.take("one-more", now=0.0)
+    return size / keys, len(buckets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'plain us':>9} {'limited us':>11} {'overhead us':>12} {'admit() us':>11}")
+    for clients in (1, 10_000):
+        plain = asyncio.run(drive(make_app(False), args.requests, clients))
+        limited = asyncio.run(drive(make_app(True), args.requests, clients))
+        check = admit_cost(args.requests, clients)
+        print(f"{clients:>8} {plain:>9.1f} {limited:>11.1f} {limited - plain:>12.1f} {check:>11.2f}")
+
+    per_key, kept = key_memory(args.keys)
+    print(f"\n{args.keys} keys: {per_key:.0f} bytes/key, {kept} kept at the cap")
+
+
+if __name__ == "__main__":
+    main()
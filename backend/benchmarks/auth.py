@@ -0,0 +1,94 @@
+"""Login throughput, and /auth/me latency while logins run, with hashing inline vs in the thread pool.
+
+    python -m backend.benchmarks.auth --concurrency 16 --duration 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from .load import summarize
+
+USERS = 50
+
+
+async def _seed(session_factory, stored: str):
+    from ..db_models import UserDB
+
+    async with session_factory() as session:
+        for i in range(USERS):
+            session.add(UserDB(id=f"bench{i}", username=f"bench{i}", email=f"bench{i}@example.com", password=stored))
+        await session.commit()
+
+
+async def measure(app, passwords, duration: float, concurrency: int):
+    login_latencies, me_latencies = [], []
+    errors = 0
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as me_client:
+            await me_client.post("/auth/login", json={"email": "bench0@example.com", "password": "password123"})
+            deadline = time.perf_counter() + duration
+
+            async def login_worker(i: int):
+                nonlocal errors
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                    while time.perf_counter() < deadline:
+                        credentials = {"email": f"bench{i % USERS}@example.com", "password": "password123"}
+                        start = time.perf_counter()
+                        response = await client.post("/auth/login", json=credentials)
+                        login_latencies.append(time.perf_counter() - start)
+                        errors += not response.json()["success"]
+
+            async def me_worker():
+                # A light request that should not wait behind hashing
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    await me_client.get("/auth/me")
+                    me_latencies.append(time.perf_counter() - start)
+                    await asyncio.sleep(0.01)
+
+            start = time.perf_counter()
+            await asyncio.gather(me_worker(), *(login_worker(i) for i in range(concurrency)))
+            elapsed = time.perf_counter() - start
+    await passwords.stop()
+    return summarize(login_latencies, errors, elapsed), summarize(me_latencies, 0, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(tempfile.mkdtemp()) / 'auth.db'}"
+    os.environ.setdefault("PASSWORD_HASH_MAX_PENDING", str(args.concurrency * 2))
+    os.environ.setdefault("SLOW_REQUEST_MS", "5000")
+    from ..database import AsyncSessionLocal, init_db
+    from ..main import app
+    from ..passwords import passwords
+
+    asyncio.run(init_db())
+    asyncio.run(_seed(AsyncSessionLocal, passwords.hasher.hash("password123")))
+
+    print(f"{'hashing':>8} {'logins/s':>9} {'login p50':>10} {'login p99':>10} {'me p50':>8} {'me p99':>8}")
+    run_in_pool = passwords._run
+    for label in ("inline", "pool"):
+        if label == "inline":
+            # What a naive implementation does: hash on the event loop itself
+            async def run_inline(fn, *fn_args):
+                return fn(*fn_args)
+            passwords._run = run_inline
+        else:
+            passwords._run = run_in_pool
+        login, me = asyncio.run(measure(app, passwords, args.duration, args.concurrency))
+        print(f"{label:>8} {login['rps']:>9.1f} {login['p50_ms']:>10.1f} {login['p99_ms']:>10.1f} "
+              f"{me['p50_ms']:>8.1f} {me['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Ticks per second of the vectorized bot simulator against a per-game loop.
+
+    python -m backend.benchmarks.batch_sim --games 1000 --ticks 200
+"""
+import argparse
+import time
+from typing import Any, Dict, Optional
+
+from ..batch_sim import BatchSimulator
+from ..engine import FOOD_SCORE, INITIAL_SNAKE, MOVES, OPPOSITES
+from ..live_store import LiveGame
+
+
+def tick_game(game: LiveGame) -> Optional[Dict[str, Any]]:
+    """Advance one move and return its delta frame, or None if a keyframe is needed.
+
+    The per-game loop the live simulation ran before ``BatchSimulator``, kept
+    as the baseline here and as a reference client in tests. Movement follows
+    the AI the watch page used to run in the browser (``simulateMovementPure``
+    in ``frontend/src/services/api.ts``).
+    """
+    game.seq += 1
+    game.dirty = True
+    previous = game.direction
+    game.turn(choose_direction(game))
+    result = game.step()
+
+    if result.dead:
+        # Bots restart on a crash; the whole body changes, so resync with a keyframe
+        game.reset()
+        game.last_delta = None
+        game.viewers_sent = game.viewers
+        return None
+
+    head = result.head
+    delta: Dict[str, Any] = {"type": "delta", "seq": game.seq, "id": game.id, "head": {"x": head[0], "y": head[1]}}
+    delta["tailRemoved"] = result.tail is not None
+    if result.ate:
+        delta["food"] = {"x": game.food[0], "y": game.food[1]} if game.food is not None else None
+        delta["scoreDelta"] = FOOD_SCORE
+
+    if game.direction != previous:
+        delta["direction"] = game.direction
+    if game.viewers != game.viewers_sent:
+        delta["viewers"] = game.viewers_sent = game.viewers
+
+    game.last_delta = delta
+    return delta
+
+
+def choose_direction(game: LiveGame) -> str:
+    valid = [d for d in MOVES if d != OPPOSITES[game.direction]]
+    if game.food is not None and game.rng.random() < 0.7:
+        hx, hy = game.body.head()
+        dx = game.food[0] - hx
+        dy = game.food[1] - hy
+        if abs(dx) > abs(dy):
+            if dx > 0 and "RIGHT" in valid:
+                return "RIGHT"
+            if dx < 0 and "LEFT" in valid:
+                return "LEFT"
+        else:
+            if dy > 0 and "DOWN" in valid:
+                return "DOWN"
+            if dy < 0 and "UP" in valid:
+                return "UP"
+    return game.rng.choice(valid)
+
+
+def make_games(count: int):
+    return [
+        LiveGame(id=f"bot{i}", username=f"AIPlayer_{i}", score=0,
+                 mode="walls" if i % 2 else "pass-through",
+                 snake=INITIAL_SNAKE, food=None, direction="RIGHT", seed=i)
+        for i in range(count)
+    ]
+
+
+def bench_loop(count: int, ticks: int) -> float:
+    games = make_games(count)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for game in games:
+            tick_game(game)
+    return time.perf_counter() - start
+
+
+def bench_batch(count: int, ticks: int) -> float:
+    batch = BatchSimulator(capacity=count, seed=0)
+    for game in make_games(count):
+        batch.add(list(game.body), game.direction, game.mode, game.food)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        batch.step(batch.choose_directions())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'games':>8} {'loop ticks/s':>14} {'batch ticks/s':>14} {'speedup':>8}")
+    for count in args.games:
+        loop = bench_loop(count, args.ticks)
+        batch = bench_batch(count, args.ticks)
+        print(f"{count:>8} {args.ticks / loop:>14.1f} {args.ticks / batch:>14.1f} {loop / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Per-tick decision latency of the bot policy: greedy for the lobby, planning for watched bots.
+
+    python -m backend.benchmarks.bot_policy --bots 1000 5000 --planned 0 128 --ticks 200
+
+``bfs-per-tick`` rebuilds every planned bot's distance field each tick
+instead of patching it, which is what a plain BFS-per-bot policy costs.
+"""
+import argparse
+import statistics
+import time
+
+from ..batch_sim import BatchSimulator
+from ..bot_policy import BotPolicy
+from ..engine import INITIAL_SNAKE
+
+
+def run(bots: int, ticks: int, planned: int, incremental: bool):
+    batch = BatchSimulator(capacity=bots, seed=0)
+    for i in range(bots):
+        batch.add(INITIAL_SNAKE, "RIGHT", "walls" if i % 2 else "pass-through")
+    policy = BotPolicy(batch, incremental=incremental, max_planned=max(planned, 1))
+    # Spread the watched bots over the lobby, as viewers would be
+    slots = list(range(0, bots, max(1, bots // planned)))[:planned] if planned else []
+    latencies = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        directions = policy.directions(slots)
+        decided = time.perf_counter()
+        result = batch.step(directions)
+        resumed = time.perf_counter()
+        policy.observe(result)
+        latencies.append((decided - start) + (time.perf_counter() - resumed))
+    return latencies, policy.rebuilds, policy.fills
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bots", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--planned", type=int, nargs="+", default=[0, 128])
+    parser.add_argument("--ticks", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'bots':>6} {'planned':>8} {'policy':>12} {'p50 ms':>9} {'p99 ms':>9} {'rebuilds':>9} {'fills':>8}")
+    for bots in args.bots:
+        for planned in args.planned:
+            for incremental in (True, False) if planned else (True,):
+                latencies, rebuilds, fills = run(bots, args.ticks, planned, incremental)
+                latencies.sort()
+                p50 = statistics.median(latencies)
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                name = "cached" if incremental else "bfs-per-tick"
+                print(f"{bots:>6} {planned:>8} {name:>12} {p50 * 1000:>9.2f} {p99 * 1000:>9.2f} "
+                      f"{rebuilds:>9} {fills:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""List endpoint serialization: per-row Pydantic models against the pre-encoded fast path.
+
+    python -m backend.benchmarks.fast_json --rows 50 500 --repeat 200
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+from ..fast_json import leaderboard_entries, list_response, live_player, paged_response
+from ..live_store import LiveGame
+from ..models import ApiResponse, PagedApiResponse
+from ..ranking import rank_index
+from ..routers.leaderboard import _to_entry
+from ..routers.live import _to_player
+
+
+def per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':>12} {'rows':>5} {'pydantic us':>12} {'fast us':>9} {'speedup':>8}")
+    for n in args.rows:
+        rank_index.clear()
+        rows = [(f"score_{i:032x}", f"player{i}", 10 * (n - i), "walls", "2026-10-17") for i in range(n)]
+        for _, _, score, mode, _ in rows:
+            rank_index.add(mode, score)
+        orm = [SimpleNamespace(id=i, username=u, score=s, mode=m, date=d) for i, u, s, m, d in rows]
+
+        def slow_page():
+            return PagedApiResponse(success=True, data=[_to_entry(e) for e in orm], nextCursor="c").model_dump_json().encode()
+
+        def fast_page():
+            return paged_response(leaderboard_entries(rows), "c")
+
+        assert slow_page() == fast_page()
+        slow, fast = per_call(slow_page, args.repeat), per_call(fast_page, args.repeat)
+        print(f"{'leaderboard':>12} {n:>5} {slow:>12.1f} {fast:>9.1f} {slow / fast:>7.1f}x")
+
+        games = [
+            LiveGame(id=f"bot{i}", username=f"Bot {i}", score=10 * i, mode="walls",
+                     snake=[(x, i % 20) for x in range(10, 0, -1)], food=(15, (i + 1) % 20), direction="RIGHT")
+            for i in range(n)
+        ]
+
+        def slow_live():
+            return ApiResponse(success=True, data=[_to_player(g) for g in games]).model_dump_json().encode()
+
+        def fast_live():
+            return list_response(",".join([live_player(g) for g in games]))
+
+        assert slow_live() == fast_live()
+        slow, fast = per_call(slow_live, args.repeat), per_call(fast_live, args.repeat)
+        print(f"{'live':>12} {n:>5} {slow:>12.1f} {fast:>9.1f} {slow / fast:>7.1f}x")
+    rank_index.clear()
+
+
+if __name__ == "__main__":
+    main()
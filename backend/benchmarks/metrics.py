@@ -0,0 +1,71 @@
+"""Per-request cost of MetricsMiddleware and the query hooks, called straight through ASGI.
+
+    python -m backend.benchmarks.metrics --requests 5000
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from ..metrics import MetricsMiddleware, instrument_engine, metrics
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    if instrumented:
+        instrument_engine(engine)
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/query")
+    async def query():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, count: int) -> float:
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [], "http_version": "1.1", "scheme": "http", "server": ("test", 80), "root_path": "",
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(100):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'route':>7} {'plain us':>9} {'metered us':>11} {'overhead us':>12}")
+    for path in ("/ping", "/query"):
+        plain = asyncio.run(drive(make_app(False), path, args.requests))
+        metered = asyncio.run(drive(make_app(True), path, args.requests))
+        print(f"{path:>7} {plain:>9.1f} {metered:>11.1f} {metered - plain:>12.1f}")
+    metrics.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Replay verification throughput, inline and through the process pool.
+
+    python -m backend.benchmarks.replay --scores 100 500 2000 --replays 50 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from ..replay import ReplayVerifier, decode_replay, record, simulate
+
+
+def bench_inline(replay, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        simulate("walls", *replay)
+    return time.perf_counter() - start
+
+
+async def bench_pool(replay, count: int, workers: int) -> float:
+    verifier = ReplayVerifier(workers=workers, max_pending=count)
+    verifier.start()
+    try:
+        # Warm the workers up so process start-up is not timed
+        await asyncio.gather(*(verifier.verify("walls", *replay) for _ in range(workers)))
+        start = time.perf_counter()
+        await asyncio.gather(*(verifier.verify("walls", *replay) for _ in range(count)))
+        return time.perf_counter() - start
+    finally:
+        await verifier.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scores", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--replays", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    cores = min(args.workers, os.cpu_count() or 1)
+    print(f"{'score':>6} {'ticks':>7} {'inline/s':>10} {'pool/s':>10} {'pool/s/core':>12}")
+    for score in args.scores:
+        replay = decode_replay(record("walls", 1, score))
+        inline = bench_inline(replay, args.replays)
+        pooled = asyncio.run(bench_pool(replay, args.replays, args.workers))
+        print(f"{score:>6} {replay[2]:>7} {args.replays / inline:>10.1f} {args.replays / pooled:>10.1f} "
+              f"{args.replays / pooled / cores:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
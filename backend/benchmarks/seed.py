@@ -0,0 +1,126 @@
+"""Bulk-load a database with benchmark-sized leaderboard and live game tables.
+
+    python -m backend.benchmarks.seed --leaderboard 1000000 --live 2000
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..db_engine import build_engine
+from ..db_models import Base, LeaderboardDB, LivePlayerDB
+from ..engine import BOARD_SIZE
+from ..snake_codec import encode_snake
+
+DEFAULT_DATABASE_URL = f"sqlite+aiosqlite:///{Path(__file__).resolve().parents[1] / 'bench.db'}"
+BATCH_SIZE = 20_000
+USERNAMES = 50_000
+MODES = ("walls", "pass-through")
+ID_PREFIX = "bench_"
+
+
+def username(i: int) -> str:
+    return f"player{i:05d}"
+
+
+def leaderboard_rows(count: int, seed: int = 0) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    first = date(2024, 1, 1)
+    for i in range(count):
+        # Long-tailed scores, like a real board: most games end early
+        yield {
+            "id": f"{ID_PREFIX}{i:09d}",
+            "rank": None,
+            "username": username(rng.randrange(USERNAMES)),
+            "score": 10 * int(rng.expovariate(1 / 40)),
+            "mode": MODES[i % 2],
+            "date": (first + timedelta(days=rng.randrange(700))).isoformat(),
+        }
+
+
+def live_rows(count: int, seed: int = 0) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    for i in range(count):
+        y = rng.randrange(BOARD_SIZE)
+        x = rng.randrange(3, BOARD_SIZE)
+        yield {
+            "id": f"{ID_PREFIX}live{i:06d}",
+            "username": f"Bot{i:06d}",
+            "score": 0,
+            "mode": MODES[i % 2],
+            "snake": encode_snake([(x, y), (x - 1, y), (x - 2, y)]),
+            "food": {"x": (x + 5) % BOARD_SIZE, "y": (y + 3) % BOARD_SIZE},
+            "direction": "RIGHT",
+            "viewers": 0,
+        }
+
+
+async def _insert(engine: AsyncEngine, table, rows: Iterator[Dict]) -> int:
+    total = 0
+    batch: List[Dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            async with engine.begin() as conn:
+                await conn.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), batch)
+        total += len(batch)
+    return total
+
+
+async def seed(engine: AsyncEngine, leaderboard: int, live: int, seed: int = 0, replace: bool = False) -> Dict[str, int]:
+    """Create the tables and bulk-insert benchmark rows, unless they are already there."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if replace:
+            for model in (LeaderboardDB, LivePlayerDB):
+                await conn.execute(delete(model).where(model.id.startswith(ID_PREFIX)))
+        counts = {}
+        for name, model in (("leaderboard", LeaderboardDB), ("live", LivePlayerDB)):
+            query = select(func.count()).select_from(model).where(model.id.startswith(ID_PREFIX))
+            counts[name] = (await conn.execute(query)).scalar_one()
+
+    if counts["leaderboard"] != leaderboard:
+        async with engine.begin() as conn:
+            await conn.execute(delete(LeaderboardDB).where(LeaderboardDB.id.startswith(ID_PREFIX)))
+        counts["leaderboard"] = await _insert(engine, LeaderboardDB, leaderboard_rows(leaderboard, seed))
+    if counts["live"] != live:
+        async with engine.begin() as conn:
+            await conn.execute(delete(LivePlayerDB).where(LivePlayerDB.id.startswith(ID_PREFIX)))
+        counts["live"] = await _insert(engine, LivePlayerDB, live_rows(live, seed))
+    return counts
+
+
+async def _main(args):
+    engine = build_engine(args.database_url)
+    start = time.perf_counter()
+    try:
+        counts = await seed(engine, args.leaderboard, args.live, args.seed, args.replace)
+    finally:
+        await engine.dispose()
+    print(f"{counts['leaderboard']} leaderboard rows and {counts['live']} live games "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--leaderboard", type=int, default=1_000_000)
+    parser.add_argument("--live", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replace", action="store_true", help="Reload even if the row counts already match")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Packed binary snakes against the JSON path, by payload size and encode/decode time.
+
+    python -m backend.benchmarks.snake_codec --lengths 3 50 399 --repeat 2000
+"""
+import argparse
+import json
+import time
+
+from ..live_store import LiveGame
+from ..models import LivePlayer
+from ..routers.live import _to_player
+from ..snake_codec import decode_player, decode_snake, encode_snake
+
+
+def make_game(length: int) -> LiveGame:
+    # A boustrophedon path so any length short of the whole board is a valid snake
+    size = 20
+    path = [(x if y % 2 == 0 else size - 1 - x, y) for y in range(size) for x in range(size)]
+    return LiveGame(id="live1", username="AIPlayer_Alpha", score=10 * length, mode="walls",
+                    snake=path[:length][::-1], food=path[length], direction="RIGHT", viewers=23)
+
+
+def per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[3, 50, 399])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'what':>7} {'len':>5} {'json B':>8} {'bin B':>7} {'json enc us':>12} {'bin enc us':>11} "
+          f"{'json dec us':>12} {'bin dec us':>11}")
+    for length in args.lengths:
+        game = make_game(length)
+
+        # Stored column: JSON list of positions vs packed bytes
+        column = json.dumps([{"x": x, "y": y} for x, y in game.body])
+        packed = encode_snake(game.body)
+        print(f"{'column':>7} {length:>5} {len(column):>8} {len(packed):>7} "
+              f"{per_call(lambda: json.dumps([{'x': x, 'y': y} for x, y in game.body]), args.repeat):>12.2f} "
+              f"{per_call(lambda: encode_snake(game.body), args.repeat):>11.2f} "
+              f"{per_call(lambda: [(p['x'], p['y']) for p in json.loads(column)], args.repeat):>12.2f} "
+              f"{per_call(lambda: list(decode_snake(packed)), args.repeat):>11.2f}")
+
+        # /live/players/{id}: Pydantic JSON response vs octet-stream
+        body = _to_player(game).model_dump_json()
+        binary = game.player_bytes()
+        print(f"{'player':>7} {length:>5} {len(body):>8} {len(binary):>7} "
+              f"{per_call(lambda: _to_player(game).model_dump_json(), args.repeat):>12.2f} "
+              f"{per_call(game.player_bytes, args.repeat):>11.2f} "
+              f"{per_call(lambda: LivePlayer.model_validate_json(body), args.repeat):>12.2f} "
+              f"{per_call(lambda: list(decode_player(binary)['snake']), args.repeat):>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Spectator fan-out against worker count: uvicorn --workers N sharing the live sim over the socket backplane.
+
+    python -m backend.benchmarks.spectators --workers 1 2 4 --clients 200 --duration 10
+
+Every client watches the lobby stream, which carries each game's frame
+every tick; ``delivered`` is the share of the frames the simulation sent
+that reached the clients. Clients run in this process, so on a small
+machine they compete with the workers for CPU.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import websockets
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(workers: int, port: int, workdir: Path, tick_ms: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        BACKPLANE="socket" if workers > 1 else "local",
+        BACKPLANE_SOCKET=str(workdir / "backplane.sock"),
+        LIVE_TICK_MS=str(tick_ms),
+        SLOW_REQUEST_MS="5000",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def _wait_ready(base: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/live/players")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def measure(port: int, clients: int, duration: float, tick_ms: int):
+    base = f"127.0.0.1:{port}"
+    await _wait_ready(f"http://{base}")
+    async with httpx.AsyncClient(base_url=f"http://{base}") as client:
+        games = len((await client.get("/live/players")).json()["data"])
+
+    frames = 0
+    received = 0
+    connected = 0
+    ready = asyncio.Event()
+
+    async def spectator():
+        nonlocal frames, received, connected
+        async with websockets.connect(f"ws://{base}/live/players/stream", max_size=None) as ws:
+            await ws.recv()
+            connected += 1
+            if connected == clients:
+                ready.set()
+            await ready.wait()
+            deadline = time.perf_counter() + duration
+            while True:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    return
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout)
+                except asyncio.TimeoutError:
+                    return
+                frames += 1
+                received += len(message)
+
+    await asyncio.gather(*(spectator() for _ in range(clients)))
+    expected = clients * duration * 1000 / tick_ms
+    return {
+        "frames_per_s": frames / duration,
+        "game_frames_per_s": frames * games / duration,
+        "mb_per_s": received / duration / 1e6,
+        "delivered": min(frames / expected, 1.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--tick-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    # Created up front: workers starting together on an empty database would race to create the tables
+    workdir = Path(tempfile.mkdtemp())
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{workdir / 'spectators.db'}"
+    from ..database import init_db
+
+    asyncio.run(init_db())
+
+    print(f"{'workers':>7} {'clients':>7} {'frames/s':>9} {'game frames/s':>14} {'MB/s':>6} {'delivered':>9}")
+    for workers in args.workers:
+        port = _free_port()
+        server = _serve(workers, port, workdir, args.tick_ms)
+        try:
+            result = asyncio.run(measure(port, args.clients, args.duration, args.tick_ms))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        print(f"{workers:>7} {args.clients:>7} {result['frames_per_s']:>9.0f} {result['game_frames_per_s']:>14.0f} "
+              f"{result['mb_per_s']:>6.2f} {result['delivered']:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import heapq
+import os
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .batch_sim import DELTAS, NON_REVERSE, BatchSimulator, BatchStep, NO_FOOD
+
+# Bots planned with distance fields and flood fills each tick; the rest steer greedily in one vectorized pass
+BOT_POLICY_MAX_PLANNED = int(os.getenv("BOT_POLICY_MAX_PLANNED", "128"))
+BOT_POLICY_MAX_FILLS = int(os.getenv("BOT_POLICY_MAX_FILLS", "256"))
+
+# Direction indices as in batch_sim.DIRECTIONS: UP, DOWN, LEFT, RIGHT
+_DELTAS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+_NON_REVERSE = ((0, 2, 3), (1, 2, 3), (0, 1, 2), (0, 1, 3))
+
+
+@lru_cache(maxsize=None)
+def board_tables(size: int, wrap: bool) -> Tuple[Tuple[Tuple[int, ...], ...], Tuple[Tuple[int, ...], ...]]:
+    """Per-cell neighbour lists and per-direction next cells (-1 for a wall)."""
+    step = []
+    for dx, dy in _DELTAS:
+        row = []
+        for cell in range(size * size):
+            x, y = cell % size + dx, cell // size + dy
+            if wrap:
+                x %= size
+                y %= size
+            row.append(y * size + x if 0 <= x < size and 0 <= y < size else -1)
+        step.append(tuple(row))
+    neighbours = tuple(
+        tuple(row[cell] for row in step if row[cell] >= 0) for cell in range(size * size)
+    )
+    return neighbours, tuple(step)
+
+
+class DistanceField:
+    """BFS distance from the food to every free cell, kept current incrementally.
+
+    Built once per food placement. As the snake moves, only the cell the
+    head entered (:meth:`close`) and the cell the tail left (:meth:`open`)
+    are patched, together with the distances that depended on them.
+    """
+
+    __slots__ = ("neighbours", "food", "dist", "unreachable")
+
+    def __init__(self, neighbours: Sequence[Sequence[int]]):
+        self.neighbours = neighbours
+        self.unreachable = len(neighbours) + 1
+        self.food = -1
+        self.dist: List[int] = [self.unreachable] * len(neighbours)
+
+    def rebuild(self, food: int, occupied: bytes):
+        far = self.unreachable
+        dist = [far] * len(self.neighbours)
+        self.food = food
+        self.dist = dist
+        if food < 0:
+            return
+        dist[food] = 0
+        queue = [food]
+        neighbours = self.neighbours
+        for cell in queue:
+            d = dist[cell] + 1
+            for nb in neighbours[cell]:
+                if dist[nb] == far and not occupied[nb]:
+                    dist[nb] = d
+                    queue.append(nb)
+
+    def open(self, cell: int, occupied: bytes):
+        """``cell`` became free: lower the distances that can now route through it."""
+        dist = self.dist
+        neighbours = self.neighbours
+        best = min(dist[nb] for nb in neighbours[cell]) + 1
+        if cell == self.food:
+            best = 0
+        if best >= dist[cell]:
+            return
+        dist[cell] = best
+        queue = [cell]
+        for current in queue:
+            d = dist[current] + 1
+            for nb in neighbours[current]:
+                if d < dist[nb] and not occupied[nb]:
+                    dist[nb] = d
+                    queue.append(nb)
+
+    def close(self, cell: int, occupied: bytes):
+        """``cell`` became blocked: recompute only the cells whose shortest path used it."""
+        dist = self.dist
+        far = self.unreachable
+        level = dist[cell]
+        dist[cell] = far
+        if level == far:
+            return
+        neighbours = self.neighbours
+
+        # Walk down the BFS layers below ``cell``; a cell is affected unless it
+        # still has a parent one step closer to the food that is not affected
+        affected = {cell}
+        frontier = [cell]
+        while frontier:
+            level += 1
+            below = []
+            for current in frontier:
+                for nb in neighbours[current]:
+                    if nb in affected or dist[nb] != level or occupied[nb]:
+                        continue
+                    if any(dist[m] == level - 1 and m not in affected for m in neighbours[nb]):
+                        continue
+                    affected.add(nb)
+                    below.append(nb)
+            frontier = below
+        affected.discard(cell)
+
+        for a in affected:
+            dist[a] = far
+        heap = []
+        for a in affected:
+            best = min(dist[nb] for nb in neighbours[a]) + 1
+            if best < far:
+                dist[a] = best
+                heap.append((best, a))
+        heapq.heapify(heap)
+        while heap:
+            d, current = heapq.heappop(heap)
+            if d != dist[current]:
+                continue
+            for nb in neighbours[current]:
+                if nb in affected and d + 1 < dist[nb]:
+                    dist[nb] = d + 1
+                    heapq.heappush(heap, (d + 1, nb))
+
+
+def room(start: int, occupied: bytes, neighbours: Sequence[Sequence[int]], limit: int) -> int:
+    """Free cells reachable from ``start``, counting up to ``limit``."""
+    seen = {start}
+    queue = [start]
+    for cell in queue:
+        if len(seen) >= limit:
+            break
+        for nb in neighbours[cell]:
+            if nb not in seen and not occupied[nb]:
+                seen.add(nb)
+                queue.append(nb)
+    return len(seen)
+
+
+class BotPolicy:
+    """Chooses a direction for every board of a :class:`BatchSimulator`.
+
+    Every bot first gets a greedy move, computed for all boards at once: the
+    free, non-reversing step closest to the food, keeping its heading on
+    ties. Up to ``max_planned`` chosen bots (the watched ones, in the live
+    lobby) are then planned properly: each steps to the neighbouring cell
+    closest to the food according to its cached :class:`DistanceField`, and
+    only if a flood fill from there finds at least as much room as the snake
+    is long; if every move is a trap, the one with the most room wins. At
+    most ``max_fills`` flood fills run per tick, after which planned bots
+    take their closest move unchecked. Fields are only kept for planned bots.
+
+    With ``incremental=False`` every field is rebuilt every tick, which is
+    what a plain BFS-per-bot policy costs; it is kept for benchmarks.
+    """
+
+    def __init__(self, batch: BatchSimulator, incremental: bool = True,
+                 max_planned: int = BOT_POLICY_MAX_PLANNED, max_fills: int = BOT_POLICY_MAX_FILLS):
+        self.batch = batch
+        self.incremental = incremental
+        self.max_planned = max_planned
+        self.max_fills = max_fills
+        self._fields: List[Optional[DistanceField]] = []
+        # Slots that may hold a field, so patching skips the rest without looking
+        self._kept: Set[int] = set()
+        self._fills_left = 0
+        self.rebuilds = 0
+        self.fills = 0
+
+    def remove(self, slot: int, moved: Optional[int]):
+        """Mirror :meth:`BatchSimulator.remove`."""
+        last = self._fields.pop() if len(self._fields) > self.batch.count else None
+        if moved is not None and slot < len(self._fields):
+            self._fields[slot] = last
+        self._kept = {i for i, field in enumerate(self._fields) if field is not None}
+
+    def _occupancy(self) -> Tuple[bytes, int]:
+        n = self.batch.count
+        cells = self.batch.size * self.batch.size
+        return self.batch.occupied[:n].tobytes(), cells
+
+    def _food_cell(self, slot: int) -> int:
+        x, y = self.batch.food[slot]
+        return -1 if x == NO_FOOD else int(y) * self.batch.size + int(x)
+
+    def _field(self, slot: int, occupied: bytes) -> DistanceField:
+        field = self._fields[slot]
+        if field is None:
+            neighbours, _ = board_tables(self.batch.size, not self.batch.walls[slot])
+            field = self._fields[slot] = DistanceField(neighbours)
+            field.rebuild(self._food_cell(slot), occupied)
+            self._kept.add(slot)
+            self.rebuilds += 1
+        return field
+
+    def observe(self, result: BatchStep):
+        """Patch every kept field with the cells the last step changed."""
+        n = self.batch.count
+        del self._fields[n:]
+        if not self.incremental:
+            self._fields = [None] * n
+            self._kept = set()
+            return
+        occupied_all, cells = self._occupancy()
+        size = self.batch.size
+        fields = self._fields
+        for slot in list(self._kept):
+            field = fields[slot] if slot < n else None
+            if field is None:
+                self._kept.discard(slot)
+                continue
+            if result.ate[slot] or result.dead[slot]:
+                # New food (or a restarted board): the field starts over
+                fields[slot] = None
+                self._kept.discard(slot)
+                continue
+            occupied = occupied_all[slot * cells:(slot + 1) * cells]
+            x, y = result.heads[slot]
+            field.close(int(y) * size + int(x), occupied)
+            if result.tail_removed[slot]:
+                x, y = result.tails[slot]
+                field.open(int(y) * size + int(x), occupied)
+
+    def greedy(self) -> np.ndarray:
+        """Every bot's free non-reversing step closest to the food, or straight on if none is free."""
+        batch = self.batch
+        n = batch.count
+        size = batch.size
+        current = batch.direction[:n]
+        options = NON_REVERSE[current]
+        moves = DELTAS[options]
+        heads = batch.heads().astype(np.int32)
+        x = heads[:, None, 0] + moves[..., 0]
+        y = heads[:, None, 1] + moves[..., 1]
+        walls = batch.walls[:n, None]
+        outside = (x < 0) | (x >= size) | (y < 0) | (y >= size)
+        x = np.where(walls, x, x % size)
+        y = np.where(walls, y, y % size)
+        rows = np.arange(n)[:, None]
+        blocked = (walls & outside) | batch.occupied[rows, np.clip(y, 0, size - 1), np.clip(x, 0, size - 1)]
+
+        food = batch.food[:n].astype(np.int32)
+        dx = np.abs(food[:, None, 0] - x)
+        dy = np.abs(food[:, None, 1] - y)
+        distance = np.where(walls, dx + dy, np.minimum(dx, size - dx) + np.minimum(dy, size - dy))
+        distance = np.where(food[:, None, 0] == NO_FOOD, 0, distance)
+        cost = 2 * distance + (options != current[:, None])
+        cost = np.where(blocked, np.iinfo(np.int32).max, cost)
+        best = options[rows[:, 0], cost.argmin(axis=1)]
+        return np.where(blocked.all(axis=1), current, best).astype(np.int8)
+
+    def directions(self, planned: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Next direction of every bot, planning the ``planned`` slots (all when None) within the caps."""
+        batch = self.batch
+        n = batch.count
+        if len(self._fields) < n:
+            self._fields.extend([None] * (n - len(self._fields)))
+        chosen = self.greedy()
+        slots = sorted(range(n) if planned is None else {slot for slot in planned if slot < n})[:self.max_planned]
+        for slot in self._kept.difference(slots):
+            # No longer planned, so no longer worth patching every tick
+            self._fields[slot] = None
+        self._kept.intersection_update(slots)
+        if not slots:
+            return chosen
+
+        occupied_all, cells = self._occupancy()
+        size = batch.size
+        self._fills_left = self.max_fills
+        for slot in slots:
+            occupied = occupied_all[slot * cells:(slot + 1) * cells]
+            field = self._field(slot, occupied)
+            neighbours, step = board_tables(size, not batch.walls[slot])
+            x, y = batch.cells[slot, batch.head[slot]]
+            chosen[slot] = self._decide(field, occupied, neighbours, step, int(y) * size + int(x),
+                                        int(batch.direction[slot]), int(batch.length[slot]))
+        return chosen
+
+    def _decide(self, field: DistanceField, occupied: bytes, neighbours, step, head: int, current: int,
+                length: int) -> int:
+        dist = field.dist
+        options = []
+        for d in _NON_REVERSE[current]:
+            cell = step[d][head]
+            if cell >= 0 and not occupied[cell]:
+                options.append((dist[cell], d != current, d, cell))
+        if not options:
+            return current
+        options.sort()
+        best_room, best = -1, options[0][2]
+        for _, _, d, cell in options:
+            if self._fills_left <= 0:
+                break
+            self._fills_left -= 1
+            self.fills += 1
+            space = room(cell, occupied, neighbours, length)
+            if space >= length:
+                return d
+            if space > best_room:
+                best_room, best = space, d
+        return best
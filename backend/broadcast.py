@@ -0,0 +1,105 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Set, Tuple
+
+STREAM_QUEUE_SIZE = int(os.getenv("LIVE_STREAM_QUEUE_SIZE", "8"))
+
+# Queued in place of a dropped backlog; the consumer answers it with a fresh keyframe
+RESYNC = object()
+# Tells consumers the topic is gone (e.g. the game ended)
+CLOSED = object()
+
+
+class Subscription:
+    """One connection's bounded view of a topic."""
+
+    __slots__ = ("topic", "_queue", "dropped")
+
+    def __init__(self, topic: str, maxsize: int):
+        self.topic = topic
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, seq: int, payload: Any) -> int:
+        """Queue a frame without blocking; returns the number of frames dropped."""
+        try:
+            self._queue.put_nowait((seq, payload))
+            return 0
+        except asyncio.QueueFull:
+            pass
+        # Slow consumer: coalesce the backlog into a single resync request
+        dropped = self._queue.qsize() + 1
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait((seq, RESYNC))
+        self.dropped += dropped
+        return dropped
+
+    def close(self):
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait((0, CLOSED))
+
+    async def get(self) -> Tuple[int, Any]:
+        return await self._queue.get()
+
+
+class BroadcastHub:
+    """In-process fan-out of pre-encoded frames.
+
+    Publishers encode a frame once and hand the same bytes to every
+    subscriber of the topic; each subscriber only ever buffers
+    ``queue_size`` frames.
+    """
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, topic: str) -> Subscription:
+        sub = Subscription(topic, self.queue_size)
+        self._topics.setdefault(topic, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        subs = self._topics.get(sub.topic)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._topics[sub.topic]
+
+    def viewers(self, topic: str) -> int:
+        subs = self._topics.get(topic)
+        return len(subs) if subs else 0
+
+    def topics(self) -> List[str]:
+        return list(self._topics)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self._topics
+
+    def publish(self, topic: str, seq: int, payload: Any):
+        subs = self._topics.get(topic)
+        if not subs:
+            return
+        self.published += 1
+        for sub in subs:
+            self.dropped += sub.offer(seq, payload)
+        self.delivered += len(subs)
+
+    def close(self, topic: str):
+        for sub in self._topics.pop(topic, ()):
+            sub.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "topics": len(self._topics),
+            "subscribers": sum(len(subs) for subs in self._topics.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
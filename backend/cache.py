@@ -0,0 +1,157 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+LEADERBOARD_CACHE_SIZE = int(os.getenv("LEADERBOARD_CACHE_SIZE", "1024"))
+LEADERBOARD_CACHE_TTL = float(os.getenv("LEADERBOARD_CACHE_TTL", "30"))
+
+# Tag that every entry also depends on, so unfiltered listings are dropped with any mode
+ALL = "*"
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "tag", "generation", "expires_at")
+
+    def __init__(self, body: bytes, tag: Optional[str], generation: int, expires_at: float):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.tag = tag
+        self.generation = generation
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """LRU + TTL cache of encoded response bodies.
+
+    Invalidation is O(1): each tag has a generation counter, and entries built
+    under an older generation are treated as misses and dropped on access.
+    """
+
+    def __init__(self, max_entries: int = LEADERBOARD_CACHE_SIZE, ttl: float = LEADERBOARD_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._generations: Dict[Optional[str], int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def clear(self):
+        self._entries.clear()
+        self._generations.clear()
+        self.hits = self.misses = self.invalidations = self.evictions = 0
+
+    def generation(self, tag: Optional[str]) -> int:
+        # Entries without a tag are the unfiltered listings
+        return self._generations.get(tag if tag is not None else ALL, 0)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic() or entry.generation != self.generation(entry.tag):
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, body: bytes, tag: Optional[str], generation: int,
+            ttl: Optional[float] = None) -> CachedResponse:
+        """Store ``body``; ``generation`` must be read before the data was fetched.
+
+        ``ttl`` shortens the cache's own TTL for this entry.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        entry = CachedResponse(body, tag, generation, time.monotonic() + ttl)
+        if generation == self.generation(tag):
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, tag: str):
+        self._generations[tag] = self._generations.get(tag, 0) + 1
+        self._generations[ALL] = self._generations.get(ALL, 0) + 1
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+
+class TTLCache:
+    """Plain LRU + TTL map for small in-memory lookups."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._entries.get(key)
+        if item is None or item[1] <= time.monotonic():
+            if item is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like ``get``, but without counting a hit or miss or refreshing the entry's recency."""
+        item = self._entries.get(key)
+        if item is None or item[1] <= time.monotonic():
+            return default
+        return item[0]
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store ``value`` for ``ttl`` seconds, capped at the cache's own TTL."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+leaderboard_cache = ResponseCache()
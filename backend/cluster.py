@@ -0,0 +1,230 @@
+"""What the workers of one deployment tell each other over the backplane.
+
+Each uvicorn worker has its own rank index, response cache and session
+cache; score and logout events keep them in step. The backplane leader
+runs the live simulation and the others mirror it (see ``live_sim``).
+
+Score messages are numbered per sending worker. A gap in the numbers means
+messages were dropped, so the worker rebuilds its rank index and period
+boards from the leaderboard table, as it also does once just after joining,
+which covers scores announced between its start-up load and the join. Rows
+still in some worker's write-behind queue are not in the table yet, so every
+score seen in the last SCORE_RECENT_SECONDS is kept and put back on top of
+the rebuild unless the same snapshot already had it. A queued row the
+database then rejects is taken back out of all of that on every worker.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .backplane import BACKPLANE, create_backplane
+from .cache import leaderboard_cache
+from .database import DATABASE_URL, replica_router
+from .db_models import LeaderboardDB
+from .ingest import score_ingestor
+from .live_sim import live_sim
+from .live_store import live_store
+from .models import GameMode
+from .period_boards import PeriodBoards, Row, period_boards
+from .ranking import RankIndex, rank_index
+from .sessions import session_store
+
+logger = logging.getLogger(__name__)
+
+SCORES = "scores"
+SCORES_DROPPED = "scores.dropped"
+SESSIONS_REVOKED = "sessions.revoked"
+
+# Wait before rebuilding, so rows acknowledged just before are flushed by then
+SCORE_RESYNC_DELAY = float(os.getenv("SCORE_RESYNC_DELAY_SECONDS", "1"))
+# Must outlast the write-behind queue of every worker, retries included
+SCORE_RECENT_SECONDS = float(os.getenv("SCORE_RECENT_SECONDS", "30"))
+
+backplane = create_backplane(BACKPLANE, DATABASE_URL)
+
+_sequence = itertools.count(1)
+_last_seen: Dict[str, int] = {}
+_recent: Deque[Tuple[float, Row]] = deque()
+_session_factory: Optional[async_sessionmaker] = None
+_resync_task: Optional[asyncio.Task] = None
+resyncs = 0
+
+
+def _remember(row: Row):
+    now = time.monotonic()
+    _recent.append((now, row))
+    while _recent[0][0] < now - SCORE_RECENT_SECONDS:
+        _recent.popleft()
+
+
+def score_added(row: Row):
+    """Announce an ``(id, username, score, mode, date)`` entry this worker has just ranked and cached around."""
+    _remember(row)
+    message = {"worker": backplane.worker_id, "seq": next(_sequence), "row": row}
+    backplane.publish(SCORES, json.dumps(message, separators=(",", ":")).encode())
+
+
+def _forget(row: Row):
+    """Undo a score ranked on acknowledgement whose row never made it to the table."""
+    for i, (_, seen) in enumerate(_recent):
+        if seen == row:
+            del _recent[i]
+            break
+    else:
+        # Not ranked here, or ranked long enough ago that the rebuild below is the fix
+        schedule_resync()
+        return
+    if rank_index.loaded:
+        rank_index.remove(row[3], row[2])
+    period_boards.discard(row)
+    leaderboard_cache.invalidate(row[3])
+    # Refills the period board places the row held
+    schedule_resync()
+
+
+def score_dropped(row: Dict[str, object]):
+    """Tell every worker, this one included, that a queued score was dropped instead of stored."""
+    board_row = (row["id"], row["username"], row["score"], row["mode"], row["date"])
+    _forget(board_row)
+    backplane.publish(SCORES_DROPPED, json.dumps(board_row, separators=(",", ":")).encode())
+
+
+def session_revoked(token_hash: str):
+    backplane.publish(SESSIONS_REVOKED, token_hash.encode())
+
+
+def _on_score(message: bytes):
+    message = json.loads(message)
+    row = tuple(message["row"])
+    _remember(row)
+    previous = _last_seen.get(message["worker"])
+    _last_seen[message["worker"]] = message["seq"]
+    if previous is not None and message["seq"] != previous + 1:
+        logger.warning("Missed %d score messages from worker %s, rebuilding the rankings",
+                       message["seq"] - previous - 1, message["worker"])
+        schedule_resync()
+    mode, score = row[3], row[2]
+    if rank_index.loaded:
+        # An index loaded later reads the score from the database instead
+        rank_index.add(mode, score)
+    if period_boards.loaded:
+        period_boards.add(row)
+    leaderboard_cache.invalidate(mode)
+    replica_router.wrote()
+
+
+def schedule_resync(delay: float = SCORE_RESYNC_DELAY):
+    """Rebuild the rank index and period boards in the background, unless a rebuild is already due."""
+    global _resync_task
+    if _session_factory is None or (_resync_task is not None and not _resync_task.done()):
+        return
+    _resync_task = asyncio.get_running_loop().create_task(_resync(delay))
+
+
+async def resync(session_factory: async_sessionmaker):
+    """Reload the rank index and period boards into fresh copies, then swap them in.
+
+    Both copies and the check for recent rows read one snapshot, so each
+    recent row is counted either by the load or by being put back, never both.
+    """
+    global resyncs
+    ranks, boards = RankIndex(), PeriodBoards(size=period_boards.size, today=period_boards.today)
+    async with session_factory() as session:
+        if session.bind.dialect.name == "postgresql":
+            await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        await ranks.load(session)
+        await boards.load(session)
+        checked: Dict[str, bool] = {}
+        while True:
+            # Rows can arrive while the check runs, so repeat until none is left unchecked
+            unchecked = [row[0] for _, row in _recent if row[0] not in checked]
+            if not unchecked:
+                break
+            checked.update(dict.fromkeys(unchecked, False))
+            stored = await session.execute(select(LeaderboardDB.id).where(LeaderboardDB.id.in_(unchecked)))
+            checked.update(dict.fromkeys(stored.scalars(), True))
+    for _, row in _recent:
+        if not checked.get(row[0], True):
+            checked[row[0]] = True
+            ranks.add(row[3], row[2])
+            boards.add(row)
+    rank_index.adopt(ranks)
+    period_boards.adopt(boards)
+    for mode in GameMode:
+        leaderboard_cache.invalidate(mode.value)
+    resyncs += 1
+
+
+async def _resync(delay: float):
+    await asyncio.sleep(delay)
+    try:
+        await resync(_session_factory)
+    except Exception:
+        logger.exception("Rebuilding the rankings failed")
+
+
+def _on_score_dropped(message: bytes):
+    _forget(tuple(json.loads(message)))
+
+
+def _on_session_revoked(message: bytes):
+    session_store.users.discard(message.decode())
+
+
+backplane.subscribe(SCORES, _on_score)
+backplane.subscribe(SCORES_DROPPED, _on_score_dropped)
+backplane.subscribe(SESSIONS_REVOKED, _on_session_revoked)
+live_sim.attach(backplane)
+score_ingestor.on_drop(score_dropped)
+
+
+async def start(session_factory: async_sessionmaker):
+    """Join the backplane, then run the live simulation if this worker leads, or mirror it if not."""
+    global _session_factory
+    _session_factory = session_factory
+
+    async def promote():
+        live_store.start(session_factory)
+        # The old leader may have died before mirroring its last changes
+        period_boards.mark_dirty()
+        period_boards.start(session_factory)
+        await live_sim.lead()
+
+    async def demote():
+        # Another worker may already lead, so leave the database writes to it
+        await live_sim.stop()
+        await live_store.stop(final_snapshot=False)
+        await period_boards.stop(final_flush=False)
+        live_sim.follow()
+
+    backplane.on_promote(promote)
+    backplane.on_demote(demote)
+    await backplane.start()
+    if backplane.leader:
+        live_store.start(session_factory)
+        period_boards.start(session_factory)
+        live_sim.start()
+    else:
+        live_sim.follow()
+    # Scores announced between the start-up load and joining were missed
+    schedule_resync()
+
+
+async def stop():
+    global _resync_task
+    if _resync_task is not None:
+        _resync_task.cancel()
+        try:
+            await _resync_task
+        except asyncio.CancelledError:
+            pass
+        _resync_task = None
+    await backplane.stop()
@@ -1,21 +1,31 @@
 import os
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from .db_models import Base, UserDB, LeaderboardDB, LivePlayerDB
 from .models import GameMode, Position, Direction
+from .snake_codec import encode_snake
+from .db_engine import build_engine
+from .replicas import ReplicaRouter
 from datetime import datetime
 
-# Database URL
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./serpent.db")
+def _async_url(url: str) -> str:
+    # Convert postgres:// to postgresql+asyncpg:// for async engine
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
 
-# Convert postgres:// to postgresql+asyncpg:// for async engine
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://", 1)
-elif DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+# Database URL
+DATABASE_URL = _async_url(os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./serpent.db"))
+# Optional read replica for the read-heavy routes; unset, everything uses the primary
+DATABASE_READ_URL = _async_url(os.getenv("DATABASE_READ_URL", ""))
 
-# Create Async Engine
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Create Async Engine; pool, echo and driver settings come from db_engine
+engine = build_engine(DATABASE_URL)
+read_engine = build_engine(DATABASE_READ_URL) if DATABASE_READ_URL else None
 
 # Create Session Factory
 AsyncSessionLocal = async_sessionmaker(
@@ -24,12 +34,29 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
     autoflush=False
 )
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False
+) if read_engine else None
+
+replica_router = ReplicaRouter(AsyncReadSessionLocal)
 
 # Dependency
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
+async def get_read_db(request: Request, db: AsyncSession = Depends(get_db)):
+    # Sessions connect lazily, so the unused primary session costs nothing
+    if not replica_router.use_replica(request):
+        yield db
+        return
+    async with replica_router.replica() as session:
+        session.info["replica"] = True
+        yield session
+
 # Init DB with seed data
 async def init_db():
     async with engine.begin() as conn:
@@ -41,13 +68,14 @@ async def init_db():
         if result.scalars().first():
             return
 
-        # Seed Users
+        # Seed Users; all share the password "password123", hashed ahead of time so start-up stays fast
+        demo_password = "$argon2id$v=19$m=65536,t=3,p=4$FUo9JWkf5g2ynReygkFW2w$rPzbZ+XnF9oLKTK8hfzNGAfMIIuCStf2hluRici7DgM"
         user_data = [
-            ("1", "PixelMaster", "player1@example.com", "password123"),
-            ("2", "SnakeKing", "player2@example.com", "password123"),
-            ("3", "RetroGamer", "player3@example.com", "password123"),
-            ("4", "NeonHunter", "player4@example.com", "password123"),
-            ("5", "ArcadeWizard", "player5@example.com", "password123"),
+            ("1", "PixelMaster", "player1@example.com", demo_password),
+            ("2", "SnakeKing", "player2@example.com", demo_password),
+            ("3", "RetroGamer", "player3@example.com", demo_password),
+            ("4", "NeonHunter", "player4@example.com", demo_password),
+            ("5", "ArcadeWizard", "player5@example.com", demo_password),
         ]
 
         for uid, uname, email, pwd in user_data:
@@ -71,25 +99,27 @@ async def init_db():
             session.add(LeaderboardDB(id=lid, rank=rank, username=uname, score=score, mode=mode, date=date))
 
         # Seed Live Players
-        # Note: Storing JSON objects as dicts for SQLAlchemy JSON column
         live_players_data = [
-            ("live1", "AIPlayer_Alpha", 150, "walls", [{"x": 10, "y": 10}, {"x": 9, "y": 10}, {"x": 8, "y": 10}], {"x": 15, "y": 12}, "RIGHT", 23),
-            ("live2", "AIPlayer_Beta", 280, "pass-through", [{"x": 5, "y": 5}, {"x": 5, "y": 4}, {"x": 5, "y": 3}], {"x": 12, "y": 8}, "DOWN", 45),
-            ("live3", "AIPlayer_Gamma", 95, "walls", [{"x": 15, "y": 15}, {"x": 14, "y": 15}, {"x": 13, "y": 15}], {"x": 3, "y": 18}, "LEFT", 12),
-            ("live4", "AIPlayer_Delta", 420, "pass-through", [{"x": 18, "y": 5}, {"x": 18, "y": 4}, {"x": 18, "y": 3}], {"x": 5, "y": 15}, "UP", 67),
-            ("live5", "AIPlayer_Epsilon", 310, "walls", [{"x": 2, "y": 2}, {"x": 3, "y": 2}, {"x": 4, "y": 2}], {"x": 10, "y": 10}, "RIGHT", 34),
+            ("live1", "AIPlayer_Alpha", 150, "walls", [(10, 10), (9, 10), (8, 10)], {"x": 15, "y": 12}, "RIGHT"),
+            ("live2", "AIPlayer_Beta", 280, "pass-through", [(5, 5), (5, 4), (5, 3)], {"x": 12, "y": 8}, "DOWN"),
+            ("live3", "AIPlayer_Gamma", 95, "walls", [(15, 15), (14, 15), (13, 15)], {"x": 3, "y": 18}, "LEFT"),
+            ("live4", "AIPlayer_Delta", 420, "pass-through", [(18, 5), (18, 4), (18, 3)], {"x": 5, "y": 15}, "UP"),
+            ("live5", "AIPlayer_Epsilon", 310, "walls", [(2, 2), (3, 2), (4, 2)], {"x": 10, "y": 10}, "RIGHT"),
         ]
 
-        for pid, uname, score, mode, snake, food, direction, viewers in live_players_data:
+        for pid, uname, score, mode, snake, food, direction in live_players_data:
             session.add(LivePlayerDB(
                 id=pid,
                 username=uname,
                 score=score,
                 mode=mode,
-                snake=snake,
+                snake=encode_snake(snake),
                 food=food,
-                direction=direction,
-                viewers=viewers
+                direction=direction
             ))
 
-        await session.commit()
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Another worker starting at the same time seeded first
+            await session.rollback()
@@ -0,0 +1,132 @@
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# Prepared statements cached per asyncpg connection; 0 behind a transaction-mode PgBouncer
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Upper bounds, in seconds, of the checkout wait histogram
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    """Checkout counts and how long each checkout waited for a connection."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        # One count per bucket in WAIT_BUCKETS, plus one for longer waits
+        self.wait_counts: List[int] = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe(self, wait: float):
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.wait_counts[bisect_left(WAIT_BUCKETS, wait)] += 1
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """Async queue pool that times every checkout, pre-ping included."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self) -> "MeteredPool":
+        # engine.dispose() swaps in a fresh pool; keep counting across it
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.observe(time.perf_counter() - start)
+        return conn
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(database_url: str) -> Dict[str, Any]:
+    """Keyword arguments for ``create_async_engine`` suited to ``database_url``."""
+    url = make_url(database_url)
+    options: Dict[str, Any] = {"echo": DB_ECHO}
+    if _is_memory_sqlite(url):
+        # One shared connection per process; there is nothing to pool
+        return options
+    options.update(
+        poolclass=MeteredPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            # SQLAlchemy's prepared statement cache and asyncpg's own, per connection
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run alongside the writer; NORMAL only syncs at checkpoints
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def build_engine(database_url: str) -> AsyncEngine:
+    engine = create_async_engine(database_url, **engine_options(database_url))
+    url = engine.url
+    if url.get_backend_name() == "sqlite" and not _is_memory_sqlite(url):
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+    return engine
+
+
+def pool_stats(engine: AsyncEngine) -> Dict[str, float]:
+    """Pool occupancy and checkout wait totals; empty for unpooled engines.
+
+    The wait histogram stays on ``engine.pool.metrics``.
+    """
+    pool = engine.pool
+    if not isinstance(pool, MeteredPool):
+        return {}
+    metrics = pool.metrics
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    return {
+        "size": pool.size(),
+        "capacity": capacity,
+        "checkedOut": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": pool.checkedout() / capacity if capacity else 0.0,
+        "checkouts": metrics.checkouts,
+        "timeouts": metrics.timeouts,
+        "waitSecondsTotal": metrics.wait_total,
+        "waitSecondsMax": metrics.wait_max,
+    }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, LargeBinary, ForeignKey, Float
 from sqlalchemy.orm import DeclarativeBase
 from datetime import datetime, timezone
 
@@ -14,6 +14,14 @@ class UserDB(Base):
     password = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
+class SessionDB(Base):
+    __tablename__ = "sessions"
+
+    token_hash = Column(String, primary_key=True) # SHA-256 of the token; the token itself is never stored
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
 class LeaderboardDB(Base):
     __tablename__ = "leaderboard"
 
@@ -24,6 +32,28 @@ class LeaderboardDB(Base):
     mode = Column(String, nullable=False)
     date = Column(String, nullable=False) # Keeping as string to match 'YYYY-MM-DD' format from frontend
 
+    # Matches the keyset pagination order (score DESC, id) so pages are index range scans
+    __table_args__ = (
+        Index("ix_leaderboard_mode_score_id", "mode", score.desc(), "id"),
+        Index("ix_leaderboard_score_id", score.desc(), "id"),
+        Index("ix_leaderboard_username_score", "username", score.desc()),
+        # One day's best scores of a mode, for rebuilding the period boards
+        Index("ix_leaderboard_mode_date_score_id", "mode", "date", score.desc(), "id"),
+    )
+
+class PeriodBoardDB(Base):
+    __tablename__ = "period_leaderboard"
+
+    # Mirror of the in-memory period boards (see period_boards); rewritten by the backplane leader
+    period = Column(String, primary_key=True) # day, week or all
+    mode = Column(String, primary_key=True)
+    entry_id = Column(String, primary_key=True) # leaderboard.id
+    starts = Column(String, nullable=False) # First day of the period as 'YYYY-MM-DD', empty for all-time
+    rank = Column(Integer, nullable=False) # Within the period and mode
+    username = Column(String, nullable=False)
+    score = Column(Integer, nullable=False)
+    date = Column(String, nullable=False)
+
 class LivePlayerDB(Base):
     __tablename__ = "live_players"
 
@@ -31,7 +61,12 @@ class LivePlayerDB(Base):
     username = Column(String, nullable=False)
     score = Column(Integer, default=0)
     mode = Column(String, nullable=False)
-    snake = Column(JSON, nullable=False) # List of positions
+    snake = Column(LargeBinary, nullable=False) # Packed by snake_codec.encode_snake
     food = Column(JSON, nullable=False) # Position
     direction = Column(String, nullable=False)
-    viewers = Column(Integer, default=0)
+
+class ReplicaHeartbeatDB(Base):
+    __tablename__ = "replica_heartbeat"
+
+    id = Column(Integer, primary_key=True)
+    at = Column(Float, nullable=False) # Unix time of the write on the primary; its age on a replica is the lag
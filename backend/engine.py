@@ -0,0 +1,294 @@
+import asyncio
+import random
+from array import array
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+# Mirrors DEFAULT_CONFIG / INITIAL_SNAKE in frontend/src/hooks/useSnakeGame.ts
+BOARD_SIZE = 20
+INITIAL_SPEED = 150
+SPEED_INCREMENT = 5
+MIN_SPEED = 50
+FOOD_SCORE = 10
+INITIAL_SNAKE = [(10, 10), (9, 10), (8, 10)]
+INITIAL_DIRECTION = "RIGHT"
+# Every free cell eaten; no real game can score more
+MAX_SCORE = (BOARD_SIZE * BOARD_SIZE - len(INITIAL_SNAKE)) * FOOD_SCORE
+
+MOVES = {
+    "UP": (0, -1),
+    "DOWN": (0, 1),
+    "LEFT": (-1, 0),
+    "RIGHT": (1, 0),
+}
+OPPOSITES = {"UP": "DOWN", "DOWN": "UP", "LEFT": "RIGHT", "RIGHT": "LEFT"}
+
+Cell = Tuple[int, int]
+
+
+class SnakeBody:
+    """Snake segments in an ``array('h')`` ring buffer, head first.
+
+    Coordinates are stored interleaved (x0, y0, x1, y1, ...), so a segment
+    costs four bytes instead of a tuple plus two int objects. Like a deque,
+    moving the snake is an O(1) head push and tail pop.
+    """
+
+    __slots__ = ("_cells", "_mask", "_head", "_length")
+
+    def __init__(self, cells: Iterable[Cell] = (), capacity: int = 16):
+        cells = list(cells)
+        size = 1
+        while size < max(capacity, len(cells) + 1):
+            size <<= 1
+        self._cells = array("h", bytes(4 * size))
+        self._mask = size - 1
+        self._head = 0
+        self._length = 0
+        for cell in reversed(cells):
+            self.push_head(cell)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Cell]:
+        cells = self._cells
+        mask = self._mask
+        slot = self._head
+        for _ in range(self._length):
+            yield (cells[2 * slot], cells[2 * slot + 1])
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        cells = list(self)
+        size = (self._mask + 1) * 2
+        self._cells = array("h", bytes(4 * size))
+        self._mask = size - 1
+        self._head = 0
+        self._length = 0
+        for cell in reversed(cells):
+            self.push_head(cell)
+
+    def push_head(self, cell: Cell):
+        if self._length > self._mask:
+            self._grow()
+        slot = (self._head - 1) & self._mask
+        self._cells[2 * slot] = cell[0]
+        self._cells[2 * slot + 1] = cell[1]
+        self._head = slot
+        self._length += 1
+
+    def pop_tail(self) -> Cell:
+        if not self._length:
+            raise IndexError("pop from empty snake")
+        self._length -= 1
+        slot = (self._head + self._length) & self._mask
+        return (self._cells[2 * slot], self._cells[2 * slot + 1])
+
+    def head(self) -> Cell:
+        slot = self._head
+        return (self._cells[2 * slot], self._cells[2 * slot + 1])
+
+    def tail(self) -> Cell:
+        slot = (self._head + self._length - 1) & self._mask
+        return (self._cells[2 * slot], self._cells[2 * slot + 1])
+
+    def reset(self, cells: Iterable[Cell]):
+        self._head = 0
+        self._length = 0
+        for cell in reversed(list(cells)):
+            self.push_head(cell)
+
+
+class StepResult:
+    __slots__ = ("head", "tail", "ate", "dead")
+
+    def __init__(self, head: Optional[Cell], tail: Optional[Cell], ate: bool, dead: bool):
+        self.head = head
+        self.tail = tail  # Cell vacated this step, None when the snake grew
+        self.ate = ate
+        self.dead = dead
+
+
+class SnakeEngine:
+    """Authoritative snake rules with O(1) work per step.
+
+    Follows ``useSnakeGame.ts``: the head moves one cell per step, wraps in
+    ``pass-through`` and dies on the edge in ``walls``, dies on any cell the
+    snake occupied before the move (tail included), and eating scores 10,
+    speeds the game up and respawns food on a random free cell.
+
+    Occupancy is a flat ``bytearray`` grid, and the free cells are kept in a
+    swap-remove index, so collision checks and food placement never scan
+    the snake or retry random cells.
+    """
+
+    __slots__ = (
+        "size", "mode", "body", "food", "direction", "score", "speed", "alive", "rng",
+        "_occupied", "_free", "_free_pos",
+    )
+
+    def __init__(self, mode: str = "walls", snake: Iterable[Cell] = INITIAL_SNAKE,
+                 direction: str = INITIAL_DIRECTION, food: Optional[Cell] = None, score: int = 0,
+                 size: int = BOARD_SIZE, seed: Optional[int] = None, rng: Optional[random.Random] = None,
+                 place_food: bool = True):
+        self.size = size
+        self.mode = mode
+        self.direction = direction
+        self.score = score
+        self.speed = INITIAL_SPEED
+        self.alive = True
+        self.rng = rng or random.Random(seed)
+        self.body = SnakeBody()
+        self._reset_cells(snake)
+        self.food = self._initial_food(food, place_food)
+
+    def _initial_food(self, food: Optional[Cell], place_food: bool) -> Optional[Cell]:
+        # Without ``place_food`` a None food means none on the board, and no RNG draw is spent
+        if food is None and place_food:
+            return self._random_free_cell()
+        return food
+
+    def _reset_cells(self, snake: Iterable[Cell]):
+        cells = self.size * self.size
+        self._occupied = bytearray(cells)
+        self._free = array("H", range(cells))
+        self._free_pos = array("H", range(cells))
+        self.body.reset(snake)
+        for x, y in self.body:
+            self._occupy(y * self.size + x)
+
+    def reset(self, snake: Iterable[Cell] = INITIAL_SNAKE, direction: str = INITIAL_DIRECTION,
+              food: Optional[Cell] = None, score: int = 0, place_food: bool = True):
+        self.direction = direction
+        self.score = score
+        self.speed = INITIAL_SPEED
+        self.alive = True
+        self._reset_cells(snake)
+        self.food = self._initial_food(food, place_food)
+
+    def _occupy(self, cell: int):
+        if self._occupied[cell]:
+            return
+        self._occupied[cell] = 1
+        # Swap-remove from the free index
+        pos = self._free_pos[cell]
+        last = self._free.pop()
+        if last != cell:
+            self._free[pos] = last
+            self._free_pos[last] = pos
+
+    def _release(self, cell: int):
+        self._occupied[cell] = 0
+        self._free_pos[cell] = len(self._free)
+        self._free.append(cell)
+
+    def _random_free_cell(self) -> Optional[Cell]:
+        if not self._free:
+            return None
+        cell = self._free[self.rng.randrange(len(self._free))]
+        return (cell % self.size, cell // self.size)
+
+    def is_occupied(self, cell: Cell) -> bool:
+        x, y = cell
+        return bool(self._occupied[y * self.size + x])
+
+    @property
+    def free_cells(self) -> int:
+        return len(self._free)
+
+    def turn(self, direction: str) -> bool:
+        # 180-degree turns are ignored, as in the browser
+        if direction not in MOVES or OPPOSITES[direction] == self.direction:
+            return False
+        self.direction = direction
+        return True
+
+    def next_head(self, direction: Optional[str] = None) -> Cell:
+        dx, dy = MOVES[direction or self.direction]
+        hx, hy = self.body.head()
+        x, y = hx + dx, hy + dy
+        if self.mode == "pass-through":
+            x %= self.size
+            y %= self.size
+        return (x, y)
+
+    def is_safe(self, head: Cell) -> bool:
+        x, y = head
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        return not self._occupied[y * self.size + x]
+
+    def step(self) -> StepResult:
+        if not self.alive:
+            return StepResult(None, None, False, True)
+
+        head = self.next_head()
+        if not self.is_safe(head):
+            self.alive = False
+            return StepResult(None, None, False, True)
+
+        x, y = head
+        self.body.push_head(head)
+        self._occupy(y * self.size + x)
+
+        if head == self.food:
+            self.score += FOOD_SCORE
+            self.speed = max(MIN_SPEED, self.speed - SPEED_INCREMENT)
+            self.food = self._random_free_cell()
+            return StepResult(head, None, True, False)
+
+        tail = self.body.pop_tail()
+        self._release(tail[1] * self.size + tail[0])
+        return StepResult(head, tail, False, False)
+
+
+class TickScheduler:
+    """Drives many games from a single task on a fixed-rate clock.
+
+    Every tick calls ``callback`` once, which steps all games in a plain
+    loop; no task or timer is created per game. If a tick overruns, missed
+    ticks are skipped rather than replayed in a burst.
+    """
+
+    def __init__(self, interval: float, callback: Callable[[], None]):
+        self.interval = interval
+        self.callback = callback
+        self.ticks = 0
+        self.overruns = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.interval
+        while True:
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Still yield so request handlers get a turn between ticks
+                await asyncio.sleep(0)
+            self.callback()
+            self.ticks += 1
+            next_tick += self.interval
+            now = loop.time()
+            if next_tick <= now:
+                missed = int((now - next_tick) // self.interval) + 1
+                self.overruns += missed
+                next_tick += missed * self.interval
@@ -0,0 +1,67 @@
+from json.encoder import encode_basestring
+from typing import Iterable, Optional, Tuple
+
+from .live_store import LiveGame
+from .ranking import rank_index
+
+# Same escaping as Pydantic's JSON output: quotes, backslashes and control
+# characters only, non-ASCII left as UTF-8
+_str = encode_basestring
+
+LeaderboardRow = Tuple[str, str, int, str, str]  # id, username, score, mode, date
+
+
+def _opt_str(value: Optional[str]) -> str:
+    return "null" if value is None else _str(value)
+
+
+def leaderboard_entries(rows: Iterable[LeaderboardRow]) -> str:
+    """``LeaderboardEntry`` objects for ``(id, username, score, mode, date)`` rows."""
+    rank = rank_index.rank
+    return ",".join([
+        f'{{"id":{_str(id)},"rank":{rank(mode, score)},"username":{_str(username)},'
+        f'"score":{score},"mode":{_str(mode)},"date":{_str(date)}}}'
+        for id, username, score, mode, date in rows
+    ])
+
+
+def ranked_entries(rows: Iterable[Tuple[str, int, str, int, str, str]]) -> str:
+    """``LeaderboardEntry`` objects for ``(id, rank, username, score, mode, date)`` rows, ranks as given."""
+    return ",".join([
+        f'{{"id":{_str(id)},"rank":{rank},"username":{_str(username)},'
+        f'"score":{score},"mode":{_str(mode)},"date":{_str(date)}}}'
+        for id, rank, username, score, mode, date in rows
+    ])
+
+
+def leaderboard_ndjson(rows: Iterable[Tuple[str, Optional[int], str, int, str, str]]) -> str:
+    """One JSON object per line for ``(id, rank, username, score, mode, date)`` rows, ranks as stored."""
+    return "".join([
+        f'{{"id":{_str(id)},"rank":{"null" if rank is None else rank},"username":{_str(username)},'
+        f'"score":{score},"mode":{_str(mode)},"date":{_str(date)}}}\n'
+        for id, rank, username, score, mode, date in rows
+    ])
+
+
+def _pos(cell: Optional[Tuple[int, int]]) -> str:
+    return "null" if cell is None else f'{{"x":{cell[0]},"y":{cell[1]}}}'
+
+
+def live_player(game: LiveGame) -> str:
+    game.refresh()
+    snake = ",".join([f'{{"x":{x},"y":{y}}}' for x, y in game.body])
+    return (
+        f'{{"id":{_str(game.id)},"username":{_str(game.username)},"score":{game.score},'
+        f'"mode":{_str(game.mode)},"snake":[{snake}],"food":{_pos(game.food)},'
+        f'"direction":{_str(game.direction)},"viewers":{game.viewers}}}'
+    )
+
+
+def list_response(items: str) -> bytes:
+    """An ``ApiResponse`` holding a list, byte-for-byte as ``model_dump_json`` writes it."""
+    return f'{{"success":true,"data":[{items}],"error":null}}'.encode()
+
+
+def paged_response(items: str, next_cursor: Optional[str]) -> bytes:
+    """A successful ``PagedApiResponse`` holding a list."""
+    return f'{{"success":true,"data":[{items}],"error":null,"nextCursor":{_opt_str(next_cursor)}}}'.encode()
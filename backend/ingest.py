@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from .db_models import LeaderboardDB
+from .cache import leaderboard_cache
+
+logger = logging.getLogger(__name__)
+
+INGEST_QUEUE_SIZE = int(os.getenv("SCORE_INGEST_QUEUE_SIZE", "10000"))
+INGEST_BATCH_SIZE = int(os.getenv("SCORE_INGEST_BATCH_SIZE", "500"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("SCORE_INGEST_FLUSH_MS", "50")) / 1000
+INGEST_ENQUEUE_TIMEOUT = float(os.getenv("SCORE_INGEST_ENQUEUE_TIMEOUT_MS", "500")) / 1000
+
+_STOP = object()
+
+
+def _rejected(error: DBAPIError) -> bool:
+    """Whether the database refused the rows themselves, which no retry can fix."""
+    if isinstance(error, (IntegrityError, DataError)):
+        return True
+    # asyncpg reports some data exceptions (SQLSTATE class 22) as plain DBAPIError
+    code = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+    return isinstance(code, str) and code[:2] in ("22", "23")
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+class ScoreIngestor:
+    """Write-behind buffer for leaderboard rows.
+
+    Submissions are acknowledged as soon as they are queued and written in
+    multi-row INSERTs, one commit per batch, whenever ``batch_size`` rows are
+    waiting or ``flush_interval`` has passed since the first of them arrived.
+    A batch the database rejects outright is written row by row instead, and
+    the rows it still rejects are logged and dropped, then handed to the
+    :meth:`on_drop` callback to take back what was ranked on acknowledgement.
+    Other errors are retried.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = INGEST_QUEUE_SIZE,
+        batch_size: int = INGEST_BATCH_SIZE,
+        flush_interval: float = INGEST_FLUSH_INTERVAL,
+        enqueue_timeout: float = INGEST_ENQUEUE_TIMEOUT,
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._session_factory: Optional[async_sessionmaker] = None
+        self._closing = False
+        self.flushed = 0
+        self.batches = 0
+        self.dropped = 0
+        self._on_drop: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def on_drop(self, callback: Callable[[Dict[str, Any]], None]):
+        self._on_drop = callback
+
+    def _drop(self, row: Dict[str, Any]):
+        self.dropped += 1
+        if self._on_drop is not None:
+            self._on_drop(row)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self, session_factory: async_sessionmaker):
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop accepting rows and flush everything already acknowledged."""
+        if not self.running:
+            return
+        task = self._task
+        self._task = None
+        self._closing = True
+        # Rows queued before the sentinel are flushed before the loop exits
+        await self._queue.put(_STOP)
+        await task
+
+    async def submit(self, row: Dict[str, Any]):
+        # Backpressure: wait briefly for room, then push back on the caller
+        try:
+            await asyncio.wait_for(self._queue.put(row), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            raise IngestQueueFull()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch: List[Dict[str, Any]] = [item]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                # Take whatever is already queued without yielding
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        async with self._session_factory() as session:
+            await session.execute(insert(LeaderboardDB), rows)
+            await session.commit()
+        self.flushed += len(rows)
+
+    async def _insert_each(self, rows: List[Dict[str, Any]]):
+        """Write ``rows`` one at a time, removing each from the list once written or dropped."""
+        while rows:
+            try:
+                await self._insert(rows[:1])
+            except DBAPIError as e:
+                if not _rejected(e):
+                    raise
+                logger.error("Dropping queued score %s: %s", rows[0].get("id"), e.orig)
+                self._drop(rows[0])
+            del rows[0]
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        modes = {row["mode"] for row in batch}
+        pending = list(batch)
+        delay = 0.1
+        attempts = 0
+        while True:
+            try:
+                try:
+                    await self._insert(pending)
+                except DBAPIError as e:
+                    if not _rejected(e):
+                        raise
+                    # One bad row fails the whole INSERT; find it instead of retrying forever
+                    await self._insert_each(pending)
+                self.batches += 1
+                # Pages cached between acknowledgement and flush are missing these rows
+                for mode in modes:
+                    leaderboard_cache.invalidate(mode)
+                return
+            except Exception:
+                attempts += 1
+                # Keep retrying while running; on shutdown give up after a few tries
+                if self._closing and attempts >= 5:
+                    logger.exception("Dropping %d queued scores after %d failed flushes", len(pending), attempts)
+                    for row in pending:
+                        self._drop(row)
+                    return
+                logger.exception("Score flush failed, retrying in %.1fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+
+
+score_ingestor = ScoreIngestor()
@@ -0,0 +1,218 @@
+"""Bulk export and import of the leaderboard table, as NDJSON or CSV.
+
+Exports stream from a server-side cursor a batch at a time, so memory stays
+flat however large the table is. Imports load batches with one executemany
+INSERT each (``COPY`` on Postgres) in a single transaction, then set every
+stored rank with one windowed UPDATE:
+
+    python -m backend.leaderboard_io export season-3.ndjson
+    python -m backend.leaderboard_io import season-3.ndjson --replace
+
+Workers already running keep the rank index they loaded at start-up, so
+restart them after an import.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, TextIO
+
+import asyncpg
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from .db_models import LeaderboardDB
+from .engine import MAX_SCORE
+from .fast_json import leaderboard_ndjson
+from .models import ExportFormat, GameMode
+
+EXPORT_BATCH_SIZE = int(os.getenv("LEADERBOARD_EXPORT_BATCH_SIZE", "5000"))
+IMPORT_BATCH_SIZE = int(os.getenv("LEADERBOARD_IMPORT_BATCH_SIZE", "20000"))
+
+FIELDS = ("id", "rank", "username", "score", "mode", "date")
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+_MODES = {mode.value for mode in GameMode}
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _ndjson(rows: Iterable) -> bytes:
+    return leaderboard_ndjson(rows).encode()
+
+
+def _csv(rows: Iterable, header: bool = False) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    if header:
+        writer.writerow(FIELDS)
+    writer.writerows(rows)
+    return out.getvalue().encode()
+
+
+def export_query(mode: Optional[str] = None):
+    query = select(*(getattr(LeaderboardDB, field) for field in FIELDS))
+    if mode:
+        query = query.where(LeaderboardDB.mode == mode)
+    # Walks ix_leaderboard_(mode_)score_id, so the cursor never sorts
+    return query.order_by(LeaderboardDB.score.desc(), LeaderboardDB.id)
+
+
+async def export_chunks(db: AsyncSession, fmt: ExportFormat, mode: Optional[str] = None,
+                        batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Encoded rows, one chunk per ``batch_size`` rows fetched from the cursor."""
+    if fmt == ExportFormat.CSV:
+        yield _csv((), header=True)
+    encode = _ndjson if fmt == ExportFormat.NDJSON else _csv
+    result = await db.stream(export_query(mode).execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        yield encode(rows)
+
+
+def read_rows(lines: TextIO, fmt: ExportFormat) -> Iterator[Dict]:
+    """Validated leaderboard rows from an export; stored ranks are dropped, they are recomputed."""
+    if fmt == ExportFormat.CSV:
+        records = enumerate(csv.DictReader(lines), start=2)
+    else:
+        records = ((number, line) for number, line in enumerate(lines, start=1) if line.strip())
+    for number, record in records:
+        try:
+            if fmt == ExportFormat.NDJSON:
+                record = json.loads(record)
+            if isinstance(record["score"], (bool, float)):
+                raise ValueError(f"score {record['score']!r} is not an integer")
+            score = int(record["score"])
+            row = {
+                "id": str(record["id"]),
+                "rank": None,
+                "username": str(record["username"]),
+                "score": score,
+                "mode": record["mode"],
+                "date": record["date"],
+            }
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Line {number}: malformed row ({e})")
+        # Above MAX_SCORE no game is possible, and the rank index caps there anyway
+        if not 0 <= score <= MAX_SCORE or row["mode"] not in _MODES or not _DATE.fullmatch(str(row["date"])):
+            raise ValueError(f"Line {number}: invalid score, mode or date")
+        yield row
+
+
+def _batches(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _copy(conn: AsyncConnection, batch: List[Dict]):
+    raw = await conn.get_raw_connection()
+    try:
+        await raw.driver_connection.copy_records_to_table(
+            LeaderboardDB.__tablename__, columns=FIELDS, records=[tuple(row[field] for field in FIELDS) for row in batch]
+        )
+    except asyncpg.PostgresError as e:
+        # The raw COPY skips SQLAlchemy's error translation; give rejected rows the same errors as INSERT
+        if e.sqlstate.startswith("23"):
+            raise IntegrityError("COPY leaderboard", None, e) from e
+        if e.sqlstate.startswith("22"):
+            raise DataError("COPY leaderboard", None, e) from e
+        raise
+
+
+async def recompute_ranks(conn: AsyncConnection):
+    """Store each row's rank within its mode, ties sharing a rank as in the rank index."""
+    ranked = select(
+        LeaderboardDB.id,
+        func.rank().over(partition_by=LeaderboardDB.mode, order_by=LeaderboardDB.score.desc()).label("rank"),
+    ).subquery()
+    await conn.execute(update(LeaderboardDB).where(LeaderboardDB.id == ranked.c.id).values(rank=ranked.c.rank))
+
+
+async def import_rows(engine: AsyncEngine, rows: Iterable[Dict], replace: bool = False,
+                      batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """Load ``rows`` in one transaction and recompute ranks once at the end; returns the rows loaded."""
+    use_copy = engine.url.get_driver_name() == "asyncpg"
+    total = 0
+    async with engine.begin() as conn:
+        if replace:
+            await conn.execute(delete(LeaderboardDB))
+        else:
+            # Opens the transaction on the driver connection, which COPY then joins
+            await conn.execute(select(1))
+        for batch in _batches(rows, batch_size):
+            if use_copy:
+                await _copy(conn, batch)
+            else:
+                await conn.execute(insert(LeaderboardDB), batch)
+            total += len(batch)
+        await recompute_ranks(conn)
+    return total
+
+
+async def _export(engine: AsyncEngine, path: str, fmt: ExportFormat, mode: Optional[str]) -> int:
+    out = sys.stdout.buffer if path == "-" else open(path, "wb")
+    written = 0
+    try:
+        async with AsyncSession(engine) as session:
+            async for chunk in export_chunks(session, fmt, mode):
+                out.write(chunk)
+                written += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    return written
+
+
+async def _main(args) -> int:
+    from .database import DATABASE_URL, _async_url
+    from .db_engine import build_engine
+
+    fmt = ExportFormat(args.format or ("csv" if args.path.endswith(".csv") else "ndjson"))
+    engine = build_engine(_async_url(args.database_url) if args.database_url else DATABASE_URL)
+    start = time.perf_counter()
+    try:
+        if args.command == "export":
+            written = await _export(engine, args.path, fmt, args.mode)
+            print(f"Exported {written} bytes in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        else:
+            with (sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")) as lines:
+                try:
+                    total = await import_rows(engine, read_rows(lines, fmt), args.replace, args.batch_size)
+                except (ValueError, IntegrityError, DataError) as e:
+                    # One transaction, so a bad row or a duplicate id leaves the table as it was
+                    print(f"Import aborted, nothing was loaded: {getattr(e, 'orig', e)}", file=sys.stderr)
+                    return 1
+            print(f"Imported {total} rows in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("path", help="File to write or read; - for stdout/stdin")
+    parser.add_argument("--format", choices=[f.value for f in ExportFormat],
+                        help="Defaults to csv for .csv paths, ndjson otherwise")
+    parser.add_argument("--mode", choices=sorted(_MODES), help="Export one mode only")
+    parser.add_argument("--replace", action="store_true", help="Delete every existing row before importing")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--database-url", help="Defaults to DATABASE_URL")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Wire format for relaying live frames from the leader worker to the others.
+
+The leader sends one batch per tick holding the exact frame bytes its own
+viewers get, so followers forward them to their viewers without decoding.
+Followers only parse a game's frames when something reads the game
+(:func:`apply_frames`), through the same lazy ``LiveGame._source`` hook
+the simulator uses.
+"""
+import json
+import struct
+from collections import deque
+from typing import List, Sequence, Tuple
+
+from .live_store import LiveGame
+
+# Backplane channels
+FRAMES = "live.frames"
+SYNC = "live.sync"
+VIEWERS = "live.viewers"
+
+# Batch kinds: one tick's frames, or a keyframe of every game that replaces the follower's roster
+TICK = 0
+FULL = 1
+
+_HEADER = struct.Struct("<BIH")  # kind, tick, removed count
+_RECORD = struct.Struct("<HIBI")  # id length, seq, is keyframe, payload length
+_ID = struct.Struct("<H")
+
+Record = Tuple[str, int, bool, bytes]
+
+
+def encode_batch(kind: int, tick: int, records: Sequence[Record], removed: Sequence[str] = ()) -> bytes:
+    parts = [_HEADER.pack(kind, tick, len(removed))]
+    for game_id in removed:
+        raw = game_id.encode()
+        parts.append(_ID.pack(len(raw)) + raw)
+    for game_id, seq, key, payload in records:
+        raw = game_id.encode()
+        parts.append(_RECORD.pack(len(raw), seq, key, len(payload)) + raw)
+        parts.append(payload)
+    return b"".join(parts)
+
+
+def decode_batch(data: bytes) -> Tuple[int, int, List[str], List[Record]]:
+    kind, tick, removed_count = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    removed = []
+    for _ in range(removed_count):
+        size = _ID.unpack_from(data, offset)[0]
+        offset += _ID.size
+        removed.append(data[offset:offset + size].decode())
+        offset += size
+    records = []
+    while offset < len(data):
+        id_size, seq, key, payload_size = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        game_id = data[offset:offset + id_size].decode()
+        offset += id_size
+        records.append((game_id, seq, bool(key), data[offset:offset + payload_size]))
+        offset += payload_size
+    return kind, tick, removed, records
+
+
+def _cell(pos) -> Tuple[int, int]:
+    return (pos["x"], pos["y"])
+
+
+def game_from_keyframe(payload: bytes) -> LiveGame:
+    frame = json.loads(payload)
+    player = frame["player"]
+    game = LiveGame(
+        id=player["id"], username=player["username"], score=player["score"], mode=player["mode"],
+        snake=[_cell(cell) for cell in player["snake"]], food=_cell(player["food"]) if player["food"] else None,
+        direction=player["direction"], viewers=player["viewers"], persisted=True, place_food=False,
+    )
+    game.seq = frame["seq"]
+    return game
+
+
+def apply_frames(game: LiveGame, frames: List[bytes]):
+    """Bring a mirrored game up to date with the keyframes and deltas relayed since its last read."""
+    cells = deque(game.body)
+    direction, food, score = game.direction, game.food, game.score
+    for payload in frames:
+        frame = json.loads(payload)
+        if frame["type"] == "key":
+            player = frame["player"]
+            cells = deque(_cell(cell) for cell in player["snake"])
+            direction, score, game.viewers = player["direction"], player["score"], player["viewers"]
+            food = _cell(player["food"]) if player["food"] else None
+            continue
+        cells.appendleft(_cell(frame["head"]))
+        if frame["tailRemoved"]:
+            cells.pop()
+        if "food" in frame:
+            food = _cell(frame["food"]) if frame["food"] else None
+        score += frame.get("scoreDelta", 0)
+        direction = frame.get("direction", direction)
+        if "viewers" in frame:
+            game.viewers = frame["viewers"]
+    game.reset(cells, direction, food, score, place_food=False)
@@ -0,0 +1,425 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from .backplane import Backplane
+from .broadcast import BroadcastHub, Subscription
+from .batch_sim import DIRECTIONS, BatchSimulator, BatchStep
+from .bot_policy import BotPolicy
+from .engine import FOOD_SCORE, TickScheduler
+from .live_store import LiveGame, LiveStore, live_store, encode_frame
+from .live_relay import (FRAMES, FULL, SYNC, TICK, VIEWERS, Record, apply_frames, decode_batch, encode_batch,
+                         game_from_keyframe)
+
+logger = logging.getLogger(__name__)
+
+TICK_INTERVAL = float(os.getenv("LIVE_TICK_MS", "200")) / 1000
+# Followers report their viewer counts this often; the report doubles as a heartbeat
+VIEWER_REPORT_INTERVAL = float(os.getenv("LIVE_VIEWER_REPORT_SECONDS", "1"))
+FOLLOWER_TIMEOUT = float(os.getenv("LIVE_FOLLOWER_TIMEOUT_SECONDS", "5"))
+# Relayed frames held for an unread mirrored game before they are applied anyway
+MAX_PENDING_FRAMES = 256
+
+# Hub topic carrying every game's frames
+LOBBY = "lobby"
+
+
+class LiveSimulation:
+    """Registry of live games, the tick loop that advances them, and their viewers.
+
+    Every game's board is a slot in one :class:`BatchSimulator`, so a tick
+    is a single vectorized step, with moves chosen by :class:`BotPolicy`.
+    ``LiveGame`` objects are only brought up
+    to date (:meth:`_sync`) when something reads them: a keyframe, a REST
+    request or a snapshot.
+
+    With several workers, the backplane leader runs the simulation and
+    relays every game's frames each tick (see ``live_relay``); the other
+    workers follow, keeping mirrors of the games that serve REST reads,
+    keyframes and their own viewers, and report their viewer counts back.
+    """
+
+    def __init__(self, tick_interval: float = TICK_INTERVAL, hub: Optional[BroadcastHub] = None,
+                 store: Optional[LiveStore] = None):
+        self.tick_interval = tick_interval
+        self.hub = hub or BroadcastHub()
+        self.store = store or LiveStore()
+        self.batch = BatchSimulator()
+        self.policy = BotPolicy(self.batch)
+        self.tick_count = 0
+        self._slots: Dict[str, int] = {}
+        self._by_slot: List[LiveGame] = []
+        self._synced_at: Dict[str, int] = {}
+        self._added: Set[str] = set()
+        self._removed: List[str] = []
+        self._scheduler = TickScheduler(tick_interval, self.step)
+        self._lobby_key: Optional[Tuple[int, bytes]] = None
+        self.backplane: Optional[Backplane] = None
+        self.following = False
+        # Leader: worker -> (last report time, viewers per game); summed into _remote_viewers
+        self._followers: Dict[str, Tuple[float, Dict[str, int]]] = {}
+        self._remote_viewers: Dict[str, int] = {}
+        # Follower: relayed frames not yet applied to each mirrored game
+        self._pending: Dict[str, List[bytes]] = {}
+        self._synced = False
+        self._sync_requested_at = 0.0
+        self._reporter: Optional[asyncio.Task] = None
+
+    @property
+    def games(self) -> Dict[str, LiveGame]:
+        return self.store.games
+
+    def _reset_batch(self):
+        for game in self._by_slot:
+            game._source = None
+        self.batch = BatchSimulator()
+        self.policy = BotPolicy(self.batch)
+        self._slots = {}
+        self._by_slot = []
+        self._synced_at = {}
+
+    def clear(self):
+        for game_id in self.games:
+            self.hub.close(game_id)
+        self.store.clear()
+        self._reset_batch()
+        self._added = set()
+        self._removed = []
+        self._lobby_key = None
+        self._followers = {}
+        self._remote_viewers = {}
+        self._pending = {}
+        self._synced = False
+
+    async def load(self, db: AsyncSession):
+        self._reset_batch()
+        await self.store.load(db)
+        if self.following:
+            # Stand-in until the leader's full sync arrives
+            for game in self.games.values():
+                game._source = self._apply_pending
+        else:
+            for game in self.games.values():
+                self._attach(game)
+                game.viewers = self.viewers(game.id)
+        self._lobby_key = None
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if not self.store.loaded:
+            await self.load(db)
+
+    def _attach(self, game: LiveGame):
+        self._slots[game.id] = self.batch.add(list(game.body), game.direction, game.mode, game.food, game.score)
+        self._by_slot.append(game)
+        self._synced_at[game.id] = self.tick_count
+        game.seq = self.tick_count
+        game._source = self._sync
+
+    def _detach(self, game: LiveGame):
+        slot = self._slots.pop(game.id)
+        moved = self.batch.remove(slot)
+        self.policy.remove(slot, moved)
+        last = self._by_slot.pop()
+        if moved is not None:
+            self._by_slot[slot] = last
+            self._slots[last.id] = slot
+        del self._synced_at[game.id]
+        game._source = None
+
+    def _sync(self, game: LiveGame):
+        """Copy a game's board out of the batch if it has moved since the last read."""
+        if self._synced_at.get(game.id) == self.tick_count:
+            return
+        slot = self._slots[game.id]
+        batch = self.batch
+        game.reset(batch.snake(slot), DIRECTIONS[batch.direction[slot]], batch.food_at(slot), int(batch.score[slot]))
+        if game.seq != self.tick_count:
+            # No delta was built for this tick, so only a keyframe describes it
+            game.seq = self.tick_count
+            game.last_delta = None
+        game.dirty = True
+        self._synced_at[game.id] = self.tick_count
+
+    def add_game(self, game: LiveGame):
+        self.store.add(game)
+        self._attach(game)
+        game.viewers = self.viewers(game.id)
+        self._added.add(game.id)
+
+    def remove_game(self, game_id: str) -> Optional[LiveGame]:
+        game = self.games.get(game_id)
+        if game is None:
+            return None
+        game.refresh()
+        self._detach(game)
+        self.store.end(game_id)
+        self.hub.close(game_id)
+        self._added.discard(game_id)
+        self._removed.append(game_id)
+        return game
+
+    def viewers(self, game_id: str) -> int:
+        """Viewers across all workers, as far as the leader knows."""
+        return self.hub.viewers(game_id) + self._remote_viewers.get(game_id, 0)
+
+    def subscribe(self, game_id: str) -> Subscription:
+        sub = self.hub.subscribe(game_id)
+        game = self.games.get(game_id)
+        if game is not None and not self.following:
+            game.viewers = self.viewers(game_id)
+        return sub
+
+    def subscribe_lobby(self) -> Subscription:
+        return self.hub.subscribe(LOBBY)
+
+    def unsubscribe(self, sub: Subscription):
+        self.hub.unsubscribe(sub)
+        game = self.games.get(sub.topic)
+        if game is not None and not self.following:
+            game.viewers = self.viewers(sub.topic)
+
+    def lobby_keyframe(self) -> Tuple[int, bytes]:
+        # Shared by every lobby viewer that joins or resyncs during this tick
+        if self._lobby_key is None or self._lobby_key[0] != self.tick_count:
+            payload = encode_frame({
+                "type": "key",
+                "tick": self.tick_count,
+                "players": [game.to_dict() for game in self.games.values()]
+            })
+            self._lobby_key = (self.tick_count, payload)
+        return self._lobby_key
+
+    @property
+    def running(self) -> bool:
+        return self._scheduler.running
+
+    def start(self):
+        if not self.following:
+            self._scheduler.start()
+
+    async def stop(self):
+        await self._scheduler.stop()
+        if self._reporter is not None:
+            self._reporter.cancel()
+            try:
+                await self._reporter
+            except asyncio.CancelledError:
+                pass
+            self._reporter = None
+
+    def attach(self, backplane: Backplane):
+        """Exchange frames and viewer counts with the other workers over ``backplane``."""
+        self.backplane = backplane
+        backplane.subscribe(FRAMES, self._on_frames)
+        backplane.subscribe(SYNC, self._on_sync)
+        backplane.subscribe(VIEWERS, self._on_viewers)
+
+    def follow(self):
+        """Mirror the leader's games instead of simulating them."""
+        self.following = True
+        self._reset_batch()
+        for game in self.games.values():
+            game._source = self._apply_pending
+        self._request_sync()
+        if self._reporter is None:
+            self._reporter = asyncio.create_task(self._report_viewers())
+
+    async def lead(self):
+        """Take over the simulation from the mirrors, after this worker was promoted."""
+        if self._reporter is not None:
+            self._reporter.cancel()
+            self._reporter = None
+        self.following = False
+        for game in self.games.values():
+            game.refresh()
+            game._source = None
+        self._pending = {}
+        self._reset_batch()
+        for game in self.games.values():
+            self._attach(game)
+        self._scheduler.start()
+
+    def _relaying(self) -> bool:
+        if not self._followers:
+            return False
+        cutoff = time.monotonic() - FOLLOWER_TIMEOUT
+        if any(seen < cutoff for seen, _ in self._followers.values()):
+            # A worker went away; its viewers with it
+            self._followers = {worker: report for worker, report in self._followers.items() if report[0] >= cutoff}
+            self._sum_remote_viewers()
+        return bool(self._followers)
+
+    def _sum_remote_viewers(self):
+        totals: Dict[str, int] = {}
+        for _, counts in self._followers.values():
+            for game_id, count in counts.items():
+                totals[game_id] = totals.get(game_id, 0) + count
+        changed = set(totals) ^ set(self._remote_viewers)
+        changed.update(k for k, v in totals.items() if self._remote_viewers.get(k) != v)
+        self._remote_viewers = totals
+        for game_id in changed:
+            game = self.games.get(game_id)
+            if game is not None:
+                game.viewers = self.viewers(game_id)
+
+    def _on_viewers(self, message: bytes):
+        if self.following:
+            return
+        report = json.loads(message)
+        self._followers[report["worker"]] = (time.monotonic(), report["viewers"])
+        self._sum_remote_viewers()
+
+    def _on_sync(self, message: bytes):
+        if self.following:
+            return
+        worker = message.decode()
+        self._followers.setdefault(worker, (time.monotonic(), {}))
+        records = [(game.id, *game.keyframe_at()) for game in self.games.values()]
+        self.backplane.publish(FRAMES, encode_batch(FULL, self.tick_count, [
+            (game_id, seq, True, payload) for game_id, seq, payload in records
+        ]))
+
+    def _request_sync(self):
+        now = time.monotonic()
+        if now - self._sync_requested_at >= VIEWER_REPORT_INTERVAL:
+            self._sync_requested_at = now
+            self.backplane.publish(SYNC, self.backplane.worker_id.encode())
+
+    async def _report_viewers(self):
+        while True:
+            counts = {topic: self.hub.viewers(topic) for topic in self.hub.topics() if topic != LOBBY}
+            self.backplane.publish(VIEWERS, json.dumps({"worker": self.backplane.worker_id, "viewers": counts}).encode())
+            await asyncio.sleep(VIEWER_REPORT_INTERVAL)
+
+    def _apply_pending(self, game: LiveGame):
+        frames = self._pending.pop(game.id, None)
+        if frames:
+            apply_frames(game, frames)
+            game.dirty = True
+
+    def _on_frames(self, message: bytes):
+        if not self.following:
+            return
+        kind, tick, removed, records = decode_batch(message)
+        if kind == TICK and (not self._synced or tick != self.tick_count + 1):
+            # Missed a batch, or the leader changed: start over from a full sync
+            self._request_sync()
+            return
+
+        hub = self.hub
+        games = self.games
+        if kind == FULL:
+            listed = {record[0] for record in records}
+            removed = [game_id for game_id in games if game_id not in listed]
+            self._synced = True
+            self.store.loaded = True
+        self.tick_count = tick
+        for game_id in removed:
+            games.pop(game_id, None)
+            self._pending.pop(game_id, None)
+            hub.close(game_id)
+
+        lobby = hub.has_subscribers(LOBBY)
+        for game_id, seq, key, payload in records:
+            game = games.get(game_id)
+            if game is None:
+                if not key:
+                    self._synced = False
+                    self._request_sync()
+                    return
+                game = games[game_id] = game_from_keyframe(payload)
+                game._source = self._apply_pending
+            elif key:
+                self._pending[game_id] = [payload]
+            else:
+                pending = self._pending.setdefault(game_id, [])
+                pending.append(payload)
+                if len(pending) > MAX_PENDING_FRAMES:
+                    game.refresh()
+            game.seq = seq
+            hub.publish(game_id, seq, payload)
+
+        if lobby:
+            if kind == FULL:
+                self._lobby_key = None
+                hub.publish(LOBBY, tick, self.lobby_keyframe()[1])
+            else:
+                hub.publish(LOBBY, tick, self._lobby_tick(tick, [record[3] for record in records], removed))
+
+    @staticmethod
+    def _lobby_tick(tick: int, frames: List[bytes], removed: List[str]) -> bytes:
+        return b'{"type":"tick","tick":%d,"frames":[%s],"removed":%s}' % (
+            tick, b",".join(frames), json.dumps(removed).encode()
+        )
+
+    def _delta(self, game: LiveGame, result: BatchStep, slot: int) -> Dict[str, Any]:
+        x, y = result.heads[slot]
+        delta: Dict[str, Any] = {
+            "type": "delta", "seq": self.tick_count, "id": game.id,
+            "head": {"x": int(x), "y": int(y)}, "tailRemoved": bool(result.tail_removed[slot]),
+        }
+        if result.ate[slot]:
+            food = self.batch.food_at(slot)
+            delta["food"] = {"x": food[0], "y": food[1]} if food is not None else None
+            delta["scoreDelta"] = FOOD_SCORE
+        if result.turned[slot]:
+            delta["direction"] = DIRECTIONS[self.batch.direction[slot]]
+        if game.viewers != game.viewers_sent:
+            delta["viewers"] = game.viewers_sent = game.viewers
+        return delta
+
+    def _planned(self) -> List[int]:
+        """Slots of the games someone watches on their own stream, here or on another worker."""
+        slots = self._slots
+        planned = [slots[topic] for topic in self.hub.topics() if topic in slots]
+        planned.extend(slots[game_id] for game_id, count in self._remote_viewers.items() if count and game_id in slots)
+        return planned
+
+    def step(self):
+        self.tick_count += 1
+        batch = self.batch
+        # Watched bots play properly; the rest of the lobby steers greedily, so a tick stays cheap
+        result = batch.step(self.policy.directions(self._planned()))
+        self.policy.observe(result)
+
+        hub = self.hub
+        lobby = hub.has_subscribers(LOBBY)
+        relay = self._relaying()
+        if lobby or relay:
+            watched = range(batch.count)
+        else:
+            # Only games someone is watching are touched from Python this tick
+            watched = [self._slots[topic] for topic in hub.topics() if topic in self._slots]
+
+        records: List[Record] = []
+        for slot in watched:
+            game = self._by_slot[slot]
+            # Encoded once, shared by the game's viewers and the lobby frame
+            if game.id in self._added or result.dead[slot]:
+                # New game, or a bot restarted after a crash: resync with a keyframe
+                game.last_delta = None
+                game.viewers_sent = game.viewers
+                payload = game.keyframe_bytes()
+                key = True
+            else:
+                game.seq = self.tick_count
+                game.last_delta = self._delta(game, result, slot)
+                payload = game.frame_bytes()
+                key = False
+            hub.publish(game.id, game.seq, payload)
+            if lobby or relay:
+                records.append((game.id, game.seq, key, payload))
+
+        if lobby:
+            hub.publish(LOBBY, self.tick_count,
+                        self._lobby_tick(self.tick_count, [record[3] for record in records], self._removed))
+        if relay:
+            self.backplane.publish(FRAMES, encode_batch(TICK, self.tick_count, records, self._removed))
+        self._added.clear()
+        self._removed.clear()
+
+
+live_sim = LiveSimulation(store=live_store)
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from .db_models import LivePlayerDB
+from .engine import SnakeEngine, Cell
+from .snake_codec import decode_snake, encode_player, encode_snake
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL = float(os.getenv("LIVE_SNAPSHOT_SECONDS", "5"))
+
+def encode_frame(frame: Dict[str, Any]) -> bytes:
+    return json.dumps(frame, separators=(",", ":")).encode()
+
+
+def _pos(cell: Optional[Cell]) -> Optional[Dict[str, int]]:
+    if cell is None:
+        return None
+    return {"x": cell[0], "y": cell[1]}
+
+
+class LiveGame(SnakeEngine):
+    """One live game as held by the store: the engine state plus stream bookkeeping."""
+
+    __slots__ = (
+        "id", "username", "viewers", "seq", "last_delta", "dirty", "persisted",
+        "viewers_sent", "_frame_cache", "_key_cache", "_source",
+    )
+
+    def __init__(self, id: str, username: str, score: int, mode: str,
+                 snake: Iterable[Cell], food: Optional[Cell], direction: str, viewers: int = 0,
+                 seed: Optional[int] = None, persisted: bool = False, place_food: bool = True):
+        super().__init__(mode=mode, snake=snake, direction=direction, food=food, score=score, seed=seed,
+                         place_food=place_food)
+        self.id = id
+        self.username = username
+        self.viewers = viewers
+        self.seq = 0
+        # Delta that moved the game to ``seq``; None when only a keyframe describes it
+        self.last_delta: Optional[Dict[str, Any]] = None
+        self.dirty = not persisted
+        self.persisted = persisted
+        self.viewers_sent = viewers
+        self._frame_cache: Optional[Tuple[int, bytes]] = None
+        self._key_cache: Optional[Tuple[int, bytes]] = None
+        # Set while another simulator owns the state; called to pull it in before reads
+        self._source: Optional[Callable[["LiveGame"], None]] = None
+
+    @classmethod
+    def from_db(cls, p: LivePlayerDB) -> "LiveGame":
+        return cls(
+            id=p.id,
+            username=p.username,
+            score=p.score,
+            mode=p.mode,
+            snake=decode_snake(p.snake),
+            food=(p.food["x"], p.food["y"]),
+            direction=p.direction,
+            persisted=True,
+        )
+
+    def refresh(self):
+        if self._source is not None:
+            self._source(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        self.refresh()
+        return {
+            "id": self.id,
+            "username": self.username,
+            "score": self.score,
+            "mode": self.mode,
+            "snake": [_pos(cell) for cell in self.body],
+            "food": _pos(self.food),
+            "direction": self.direction,
+            "viewers": self.viewers,
+        }
+
+    def snapshot_row(self) -> Dict[str, Any]:
+        self.refresh()
+        return {
+            "id": self.id,
+            "username": self.username,
+            "score": self.score,
+            "mode": self.mode,
+            "snake": encode_snake(self.body),
+            "food": _pos(self.food),
+            "direction": self.direction,
+        }
+
+    def player_bytes(self) -> bytes:
+        """The game as a binary ``LivePlayer`` record (``snake_codec.encode_player``)."""
+        self.refresh()
+        return encode_player(self.id, self.username, self.mode, self.direction, self.food, self.score,
+                             self.viewers, self.body)
+
+    def keyframe(self) -> Dict[str, Any]:
+        return {"type": "key", "seq": self.seq, "player": self.to_dict()}
+
+    def keyframe_bytes(self) -> bytes:
+        self.refresh()
+        if self._key_cache is None or self._key_cache[0] != self.seq:
+            self._key_cache = (self.seq, encode_frame(self.keyframe()))
+        return self._key_cache[1]
+
+    def keyframe_at(self) -> Tuple[int, bytes]:
+        payload = self.keyframe_bytes()
+        return self.seq, payload
+
+    def frame_bytes(self) -> bytes:
+        """Encoded frame for the latest tick, built at most once per tick."""
+        if self.last_delta is None:
+            return self.keyframe_bytes()
+        if self._frame_cache is None or self._frame_cache[0] != self.seq:
+            self._frame_cache = (self.seq, encode_frame(self.last_delta))
+        return self._frame_cache[1]
+
+    def frame_since(self, seq: int) -> Dict[str, Any]:
+        """Frame that brings a viewer at ``seq`` up to date."""
+        self.refresh()
+        if self.last_delta is not None and seq == self.seq - 1:
+            return self.last_delta
+        return self.keyframe()
+
+
+class LiveStore:
+    """In-memory source of truth for active games.
+
+    Ticks only touch memory; the database sees a snapshot of every changed
+    game every ``snapshot_interval`` seconds, when a game ends, and on
+    shutdown.
+    """
+
+    def __init__(self, snapshot_interval: float = SNAPSHOT_INTERVAL):
+        self.snapshot_interval = snapshot_interval
+        self.games: Dict[str, LiveGame] = {}
+        self.loaded = False
+        self._ended: List[LiveGame] = []
+        self._session_factory: Optional[async_sessionmaker] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+        self.snapshots = 0
+
+    def clear(self):
+        self.games = {}
+        self.loaded = False
+        self._ended = []
+
+    async def load(self, db: AsyncSession):
+        result = await db.execute(select(LivePlayerDB))
+        self.games = {p.id: LiveGame.from_db(p) for p in result.scalars().all()}
+        self.loaded = True
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if not self.loaded:
+            await self.load(db)
+
+    def get(self, game_id: str) -> Optional[LiveGame]:
+        return self.games.get(game_id)
+
+    def add(self, game: LiveGame):
+        self.games[game.id] = game
+
+    def end(self, game_id: str) -> Optional[LiveGame]:
+        game = self.games.pop(game_id, None)
+        if game is not None:
+            self._ended.append(game)
+            # Persist the final state right away rather than at the next interval
+            if self.running:
+                task = asyncio.get_running_loop().create_task(self.snapshot())
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+        return game
+
+    async def snapshot(self, session_factory: Optional[async_sessionmaker] = None):
+        session_factory = session_factory or self._session_factory
+        for game in self.games.values():
+            game.refresh()
+        games = [g for g in self.games.values() if g.dirty]
+        ended = self._ended
+        self._ended = []
+        games.extend(ended)
+        if not games:
+            return
+
+        new_ids = {g.id for g in games if not g.persisted}
+        new_rows = [g.snapshot_row() for g in games if g.id in new_ids]
+        changed_rows = [g.snapshot_row() for g in games if g.id not in new_ids]
+        for game in games:
+            game.dirty = False
+            game.persisted = True
+
+        try:
+            async with session_factory() as session:
+                if new_rows:
+                    await session.execute(insert(LivePlayerDB), new_rows)
+                if changed_rows:
+                    # ORM bulk UPDATE by primary key: one executemany for all games
+                    await session.execute(update(LivePlayerDB), changed_rows)
+                await session.commit()
+            self.snapshots += 1
+        except Exception:
+            logger.exception("Live snapshot of %d games failed", len(games))
+            # Retry everything on the next snapshot
+            for game in games:
+                game.dirty = True
+                game.persisted = game.id not in new_ids
+            self._ended = ended + self._ended
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, session_factory: async_sessionmaker):
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, final_snapshot: bool = True):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            if self._pending:
+                await asyncio.gather(*self._pending, return_exceptions=True)
+            if final_snapshot:
+                await self.snapshot()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            await self.snapshot()
+
+
+live_store = LiveStore()
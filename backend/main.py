@@ -1,14 +1,47 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import auth, leaderboard, live
+from .routers import auth, leaderboard, live, system
 
 from contextlib import asynccontextmanager
-from .database import init_db
+from .database import init_db, AsyncSessionLocal, engine, read_engine, replica_router
+from .ranking import rank_index
+from .ingest import score_ingestor
+from .live_sim import live_sim
+from .live_store import live_store
+from .period_boards import period_boards
+from . import cluster
+from .replay import replay_verifier
+from .passwords import passwords
+from .metrics import MetricsMiddleware, instrument_engine, loop_lag_monitor
+from .admission import AdmissionMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    loop_lag_monitor.start()
     await init_db()
+    # Warm the in-memory indexes so the first requests don't pay for it
+    async with AsyncSessionLocal() as session:
+        await rank_index.load(session)
+        await period_boards.load(session)
+        await live_sim.load(session)
+    score_ingestor.start(AsyncSessionLocal)
+    replica_router.start(AsyncSessionLocal)
+    replay_verifier.start()
+    # Runs the live simulation here, or mirrors it from the worker that does
+    await cluster.start(AsyncSessionLocal)
     yield
+    await live_sim.stop()
+    # Final snapshot of every live game
+    await live_store.stop()
+    await period_boards.stop()
+    await replay_verifier.stop()
+    await passwords.stop()
+    # Drain queued submissions so every acknowledged score reaches the database
+    await score_ingestor.stop()
+    await replica_router.stop()
+    # Last, so another worker only takes over the simulation after the final snapshot
+    await cluster.stop()
+    await loop_lag_monitor.stop()
 
 app = FastAPI(
     title="Serpent Showdown API",
@@ -17,6 +50,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Innermost of the middleware, so turned-away requests still get CORS headers and are metered,
+# but before routing and dependencies: a 429 never takes a database connection
+app.add_middleware(AdmissionMiddleware)
+
 # Configure CORS
 origins = [
     "http://localhost:5173",  # Vite default
@@ -32,32 +69,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the timings cover every other middleware
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+if read_engine is not None:
+    instrument_engine(read_engine)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(leaderboard.router)
 app.include_router(live.router)
+app.include_router(system.router)
 
 import os
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import Request
+from .static_files import StaticSite
 
-# Serve static files if STATIC_DIR is set (Production/Docker)
+# Serve the built SPA from memory if STATIC_DIR is set (Production/Docker)
 static_dir = os.getenv("STATIC_DIR")
 if static_dir and os.path.exists(static_dir):
-    # Mount static files (but not at root to avoid conflicts)
-    app.mount("/assets", StaticFiles(directory=f"{static_dir}/assets"), name="assets")
-    
-    # Serve index.html for root
+    static_site = StaticSite(static_dir)
+
     @app.get("/")
-    async def serve_root():
-        return FileResponse(f"{static_dir}/index.html")
-    
+    async def serve_root(request: Request):
+        return static_site.respond("index.html", request.headers)
+
     # Catch-all route for SPA (must be last, after all API routes)
     # This will only match if no other route matched
     @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
-        # Serve index.html for all unmatched paths (SPA routing)
-        return FileResponse(f"{static_dir}/index.html")
+    async def serve_spa(full_path: str, request: Request):
+        return static_site.spa(full_path, request.headers)
 else:
     # Development mode - show API message
     @app.get("/")
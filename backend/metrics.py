@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .db_engine import WAIT_BUCKETS, pool_stats
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL_MS", "250")) / 1000
+# Statements kept per request for the slow-request log
+MAX_LOGGED_STATEMENTS = 20
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Fixed-bucket histogram, rendered the way Prometheus clients do."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation within a bucket, as ``histogram_quantile`` does."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= target:
+                return lower + (bound - lower) * (target - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1]
+
+    def render(self, name: str, labels: str = "") -> List[str]:
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class RequestStats:
+    """Database work done while serving one request."""
+
+    __slots__ = ("queries", "db_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: List[Tuple[str, float]] = []
+
+
+# Set by the middleware; SQLAlchemy runs queries in greenlets that inherit it
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Process-wide request, query and event-loop measurements."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+        self.queries = 0
+        self.db_time = 0.0
+        self.slow_requests = 0
+        self.loop_lag = Histogram(LAG_BUCKETS)
+        self.loop_lag_max = 0.0
+
+    def observe_request(self, method: str, route: str, status: int, elapsed: float):
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(elapsed)
+        status_key = (method, route, status)
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def observe_query(self, statement: str, elapsed: float):
+        self.queries += 1
+        self.db_time += elapsed
+        stats = _current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+            if len(stats.statements) < MAX_LOGGED_STATEMENTS:
+                stats.statements.append((statement, elapsed))
+
+    def observe_loop_lag(self, lag: float):
+        self.loop_lag.observe(lag)
+        self.loop_lag_max = max(self.loop_lag_max, lag)
+
+    def render(self, engines: Sequence[Tuple[str, AsyncEngine]] = ()) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Time to serve a request, by route template",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            lines.extend(histogram.render(
+                "http_request_duration_seconds", f'method="{method}",route="{_escape(route)}"'
+            ))
+        lines += [
+            "# HELP http_request_duration_quantile_seconds Latency quantiles estimated from the histogram",
+            "# TYPE http_request_duration_quantile_seconds gauge",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            for q in QUANTILES:
+                lines.append(
+                    f'http_request_duration_quantile_seconds{{method="{method}",route="{_escape(route)}",'
+                    f'quantile="{q:g}"}} {histogram.quantile(q):.6f}'
+                )
+        lines += ["# HELP http_responses_total Responses sent", "# TYPE http_responses_total counter"]
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(f'http_responses_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+        lines += [
+            "# HELP http_slow_requests_total Requests slower than SLOW_REQUEST_MS",
+            "# TYPE http_slow_requests_total counter",
+            f"http_slow_requests_total {self.slow_requests}",
+            "# HELP db_queries_total SQL statements executed",
+            "# TYPE db_queries_total counter",
+            f"db_queries_total {self.queries}",
+            "# HELP db_query_seconds_total Time spent executing SQL statements",
+            "# TYPE db_query_seconds_total counter",
+            f"db_query_seconds_total {self.db_time:.6f}",
+            "# HELP event_loop_lag_seconds How late the event loop ran a timer",
+            "# TYPE event_loop_lag_seconds histogram",
+            *self.loop_lag.render("event_loop_lag_seconds"),
+            "# HELP event_loop_lag_max_seconds Largest event loop lag seen",
+            "# TYPE event_loop_lag_max_seconds gauge",
+            f"event_loop_lag_max_seconds {self.loop_lag_max:.6f}",
+        ]
+        lines.extend(_pool_lines(engines))
+        return "\n".join(lines) + "\n"
+
+
+def _pool_lines(engines: Sequence[Tuple[str, AsyncEngine]]) -> List[str]:
+    # Grouped by metric, as the exposition format wants each family in one block
+    pooled = [(f'pool="{name}"', engine, pool_stats(engine)) for name, engine in engines]
+    pooled = [item for item in pooled if item[2]]
+    lines = []
+    for key, metric, kind in (
+        ("capacity", "db_pool_capacity", "gauge"),
+        ("checkedOut", "db_pool_checked_out", "gauge"),
+        ("saturation", "db_pool_saturation", "gauge"),
+        ("timeouts", "db_pool_timeouts_total", "counter"),
+    ):
+        if pooled:
+            lines.append(f"# TYPE {metric} {kind}")
+        lines += [f"{metric}{{{label}}} {stats[key]:g}" for label, _, stats in pooled]
+    if pooled:
+        lines.append("# TYPE db_pool_checkout_wait_seconds histogram")
+    for label, engine, _ in pooled:
+        wait = Histogram(WAIT_BUCKETS)
+        metrics = engine.pool.metrics
+        wait.counts, wait.sum, wait.count = metrics.wait_counts, metrics.wait_total, metrics.checkouts
+        lines.extend(wait.render("db_pool_checkout_wait_seconds", label))
+    return lines
+
+
+metrics = Metrics()
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Count queries and their time, per request and in total."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        metrics.observe_query(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request by route template.
+
+    Adds a ``Server-Timing`` header with the total and database time, and
+    logs requests slower than ``slow_ms`` along with the SQL they ran.
+    """
+
+    def __init__(self, app, slow_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.slow = slow_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = (time.perf_counter() - start) * 1000
+                timing = (
+                    f'app;dur={elapsed:.1f}, db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"'
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            metrics.observe_request(scope["method"], template, status, elapsed)
+            if elapsed >= self.slow:
+                metrics.slow_requests += 1
+                _log_slow(scope, status, elapsed, stats)
+
+
+def _log_slow(scope, status: int, elapsed: float, stats: RequestStats):
+    statements = "".join(
+        f"\n  {seconds * 1000:.1f}ms {' '.join(statement.split())}" for statement, seconds in stats.statements
+    )
+    if stats.queries > len(stats.statements):
+        statements += f"\n  ... {stats.queries - len(stats.statements)} more"
+    logger.warning(
+        "Slow request %s %s -> %d in %.1fms (%d queries, %.1fms in db)%s",
+        scope["method"], scope["path"], status, elapsed * 1000, stats.queries, stats.db_time * 1000, statements,
+    )
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how much later than asked a short sleep wakes up."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            metrics.observe_loop_lag(max(loop.time() - start - self.interval, 0.0))
+
+
+loop_lag_monitor = LoopLagMonitor()
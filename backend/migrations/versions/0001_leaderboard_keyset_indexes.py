@@ -0,0 +1,40 @@
+"""Add keyset pagination indexes to leaderboard
+
+Tables themselves are still created by ``init_db`` at startup; this revision
+brings existing databases up to the indexes declared on ``LeaderboardDB``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_leaderboard_mode_score_id",
+        "leaderboard",
+        ["mode", sa.text("score DESC"), "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_leaderboard_score_id",
+        "leaderboard",
+        [sa.text("score DESC"), "id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_leaderboard_score_id", table_name="leaderboard", if_exists=True)
+    op.drop_index("ix_leaderboard_mode_score_id", table_name="leaderboard", if_exists=True)
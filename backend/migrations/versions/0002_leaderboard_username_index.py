@@ -0,0 +1,33 @@
+"""Add username lookup index to leaderboard
+
+Serves the "best entry for a player" lookup behind
+``GET /leaderboard/around/user/{username}``.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_leaderboard_username_score",
+        "leaderboard",
+        ["username", sa.text("score DESC")],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_leaderboard_username_score", table_name="leaderboard", if_exists=True)
@@ -0,0 +1,68 @@
+"""Store live player snakes in the packed binary format
+
+Converts ``live_players.snake`` from a JSON list of ``{"x", "y"}`` objects to
+the bytes written by ``snake_codec.encode_snake``: a format byte, a uint16
+segment count and one x, y byte pair per segment.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+import json
+import struct
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of the snake_codec format, so later codec changes cannot alter this revision
+_HEADER = struct.Struct("<BH")
+
+
+def _pack(cells) -> bytes:
+    return _HEADER.pack(1, len(cells)) + bytes(v for cell in cells for v in (cell["x"], cell["y"]))
+
+
+def _unpack(data: bytes):
+    _, length = _HEADER.unpack_from(data)
+    body = data[_HEADER.size:_HEADER.size + 2 * length]
+    return [{"x": body[i], "y": body[i + 1]} for i in range(0, len(body), 2)]
+
+
+def _snake_type():
+    columns = sa.inspect(op.get_bind()).get_columns("live_players")
+    return next(c["type"] for c in columns if c["name"] == "snake")
+
+
+def _convert(new_type, convert):
+    conn = op.get_bind()
+    op.add_column("live_players", sa.Column("snake_new", new_type, nullable=True))
+    rows = conn.execute(sa.text("SELECT id, snake FROM live_players")).fetchall()
+    if rows:
+        conn.execute(
+            sa.text("UPDATE live_players SET snake_new = :snake WHERE id = :id"),
+            [{"id": row.id, "snake": convert(row.snake)} for row in rows],
+        )
+    with op.batch_alter_table("live_players") as batch:
+        batch.drop_column("snake")
+        batch.alter_column("snake_new", new_column_name="snake", existing_type=new_type, nullable=False)
+
+
+def upgrade() -> None:
+    # Tables created by init_db after this change already have the binary column
+    if isinstance(_snake_type(), sa.LargeBinary):
+        return
+    _convert(sa.LargeBinary(), lambda snake: _pack(json.loads(snake) if isinstance(snake, str) else snake))
+
+
+def downgrade() -> None:
+    if not isinstance(_snake_type(), sa.LargeBinary):
+        return
+    _convert(sa.JSON(), lambda snake: json.dumps(_unpack(snake)))
@@ -0,0 +1,38 @@
+"""Add login sessions
+
+Sessions are keyed by the SHA-256 of their token. Plaintext passwords
+already in ``users`` are replaced by argon2 hashes on each user's next
+login, so no data migration is needed here.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sessions",
+        sa.Column("token_hash", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_sessions_user_id", "sessions", ["user_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_user_id", table_name="sessions", if_exists=True)
+    op.drop_table("sessions", if_exists=True)
@@ -0,0 +1,33 @@
+"""Add the replica heartbeat table
+
+Workers write one row here on the primary and read it back from the read
+replica to measure replication lag.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "replica_heartbeat",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("at", sa.Float(), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("replica_heartbeat", if_exists=True)
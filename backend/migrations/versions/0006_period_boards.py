@@ -0,0 +1,43 @@
+"""Add the period board mirror table and a per-day score index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_leaderboard_mode_date_score_id",
+        "leaderboard",
+        ["mode", "date", sa.text("score DESC"), "id"],
+        if_not_exists=True,
+    )
+    op.create_table(
+        "period_leaderboard",
+        sa.Column("period", sa.String(), primary_key=True),
+        sa.Column("mode", sa.String(), primary_key=True),
+        sa.Column("entry_id", sa.String(), primary_key=True),
+        sa.Column("starts", sa.String(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column("date", sa.String(), nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("period_leaderboard", if_exists=True)
+    op.drop_index("ix_leaderboard_mode_date_score_id", table_name="leaderboard", if_exists=True)
@@ -0,0 +1,40 @@
+"""Drop live_players.viewers
+
+Viewer counts are tracked live by the broadcast hub; the column was only
+ever written by the seed data.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_viewers() -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns("live_players")
+    return any(c["name"] == "viewers" for c in columns)
+
+
+def upgrade() -> None:
+    # Tables created by init_db after this change never had the column
+    if not _has_viewers():
+        return
+    with op.batch_alter_table("live_players") as batch:
+        batch.drop_column("viewers")
+
+
+def downgrade() -> None:
+    if _has_viewers():
+        return
+    with op.batch_alter_table("live_players") as batch:
+        batch.add_column(sa.Column("viewers", sa.Integer(), nullable=True, server_default="0"))
@@ -1,4 +1,4 @@
-from typing import List, Optional, Generic, TypeVar
+from typing import Dict, List, Optional, Generic, TypeVar
 from enum import Enum
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
@@ -9,6 +9,15 @@ class GameMode(str, Enum):
     WALLS = "walls"
     PASS_THROUGH = "pass-through"
 
+class Period(str, Enum):
+    DAY = "day"
+    WEEK = "week"  # Monday to Sunday
+    ALL = "all"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 class Direction(str, Enum):
     UP = "UP"
     DOWN = "DOWN"
@@ -38,6 +47,28 @@ class LeaderboardEntry(BaseModel):
     mode: GameMode
     date: str  # Kept as string to match frontend 'YYYY-MM-DD'
 
+class LeaderboardNeighbourhood(BaseModel):
+    entry: LeaderboardEntry
+    above: List[LeaderboardEntry]  # Best first, ending just above the entry
+    below: List[LeaderboardEntry]  # Starting just below the entry
+
+class HistogramBucket(BaseModel):
+    min: int
+    max: int  # Inclusive
+    count: int
+
+class ScoreStats(BaseModel):
+    mode: GameMode
+    count: int
+    mean: float
+    min: Optional[int] = None
+    max: Optional[int] = None
+    percentiles: Dict[str, int]  # e.g. "90": the score 90% of entries are at or below
+    histogram: List[HistogramBucket]
+    score: Optional[int] = None
+    rank: Optional[int] = None
+    beats: Optional[float] = None  # Percentage of entries scoring strictly less than score
+
 class LivePlayer(BaseModel):
     id: str
     username: str
@@ -52,3 +83,6 @@ class ApiResponse(BaseModel, Generic[T]):
     success: bool
     data: Optional[T] = None
     error: Optional[str] = None
+
+class PagedApiResponse(ApiResponse[T], Generic[T]):
+    nextCursor: Optional[str] = None
@@ -0,0 +1,92 @@
+import asyncio
+import hmac
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+# argon2-cffi's defaults (RFC 9106 low-memory profile) unless overridden
+PASSWORD_TIME_COST = int(os.getenv("PASSWORD_TIME_COST", "3"))
+PASSWORD_MEMORY_KIB = int(os.getenv("PASSWORD_MEMORY_KIB", "65536"))
+PASSWORD_PARALLELISM = int(os.getenv("PASSWORD_PARALLELISM", "4"))
+
+ARGON2_PREFIX = "$argon2"
+
+
+class HasherBusy(Exception):
+    pass
+
+
+class Passwords:
+    """Argon2id hashing in a bounded thread pool.
+
+    argon2 releases the GIL while it works, so a few threads hash in
+    parallel without stalling the event loop. At most ``max_pending``
+    hashes wait at once; beyond that calls raise :class:`HasherBusy` so
+    the caller can shed load instead of queueing logins for seconds.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING,
+                 time_cost: int = PASSWORD_TIME_COST, memory_kib: int = PASSWORD_MEMORY_KIB,
+                 parallelism: int = PASSWORD_PARALLELISM):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Hash of a random password with these parameters, verified against for unknown accounts.
+        # Made here rather than on the first miss, so that miss takes no longer than the rest
+        self._dummy = self.hasher.hash(secrets.token_urlsafe(16))
+        self.pending = 0
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise HasherBusy()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hash")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def stop(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.hasher.hash, password)
+
+    async def verify(self, stored: str, password: str) -> Tuple[bool, Optional[str]]:
+        """Check ``password`` against ``stored``; also returns a new hash if the stored one should be replaced."""
+        return await self._run(self._verify, stored, password)
+
+    async def verify_absent(self, password: str) -> Tuple[bool, None]:
+        """Do the work of ``verify`` for an account that does not exist, so the miss is not faster."""
+        return await self._run(self._verify_absent, password)
+
+    def _verify_absent(self, password: str) -> Tuple[bool, None]:
+        self._verify(self._dummy, password)
+        return False, None
+
+    def _verify(self, stored: str, password: str) -> Tuple[bool, Optional[str]]:
+        if not stored.startswith(ARGON2_PREFIX):
+            # Rows from before passwords were hashed are upgraded on their next login
+            if hmac.compare_digest(stored.encode(), password.encode()):
+                return True, self.hasher.hash(password)
+            return False, None
+        try:
+            self.hasher.verify(stored, password)
+        except (VerificationError, InvalidHashError):
+            return False, None
+        if self.hasher.check_needs_rehash(stored):
+            return True, self.hasher.hash(password)
+        return True, None
+
+
+passwords = Passwords()
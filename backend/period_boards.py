@@ -0,0 +1,268 @@
+"""Daily, weekly and all-time top-K leaderboards per game mode, held in memory.
+
+Each board is a min-heap of its best PERIOD_BOARD_SIZE entries, offered
+every submission in O(log K), this worker's and (via the backplane) every
+other's, so ``GET /leaderboard?period=day`` reads K entries and no table.
+A board starts empty again the first time it is touched in a new period,
+and the flush loop touches every board, so rollover needs no traffic.
+
+The backplane leader mirrors changed boards to ``period_leaderboard`` every
+PERIOD_BOARD_FLUSH_SECONDS. At start-up boards are rebuilt from the
+leaderboard table itself, at most K rows per mode and day off
+``ix_leaderboard_mode_date_score_id``, so they never inherit a stale mirror.
+"""
+import asyncio
+import heapq
+import logging
+import os
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .db_models import LeaderboardDB, PeriodBoardDB
+from .models import GameMode, Period
+
+logger = logging.getLogger(__name__)
+
+PERIOD_BOARD_SIZE = int(os.getenv("PERIOD_BOARD_SIZE", "100"))
+PERIOD_BOARD_FLUSH_SECONDS = float(os.getenv("PERIOD_BOARD_FLUSH_SECONDS", "5"))
+
+Row = Tuple[str, str, int, str, str]  # id, username, score, mode, date
+RankedRow = Tuple[str, int, str, int, str, str]  # id, rank, username, score, mode, date
+
+_COLUMNS = (LeaderboardDB.id, LeaderboardDB.username, LeaderboardDB.score, LeaderboardDB.mode, LeaderboardDB.date)
+
+
+def period_start(period: Period, day: date) -> str:
+    """First day of the period holding ``day``, as stored in ``LeaderboardDB.date``; empty for all-time."""
+    if period == Period.DAY:
+        return day.isoformat()
+    if period == Period.WEEK:
+        return (day - timedelta(days=day.weekday())).isoformat()
+    return ""
+
+
+class _Later:
+    """Heap key for an entry id: on equal scores the later id is the worse entry, as on the full board."""
+
+    __slots__ = ("id",)
+
+    def __init__(self, id: str):
+        self.id = id
+
+    def __lt__(self, other: "_Later") -> bool:
+        return self.id > other.id
+
+
+class TopK:
+    """The best ``size`` entries seen, worst at the top of a min-heap."""
+
+    __slots__ = ("size", "starts", "dirty", "_heap", "_ids", "_ranked")
+
+    def __init__(self, size: int, starts: str):
+        self.size = size
+        self.starts = starts
+        # New boards are mirrored even while empty, which clears the previous period's rows
+        self.dirty = True
+        self._heap: List[Tuple[int, _Later, Row]] = []
+        self._ids: Set[str] = set()
+        self._ranked: Optional[List[RankedRow]] = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def offer(self, row: Row) -> bool:
+        """Keep ``row`` if it makes the board; False if it doesn't or is already on it."""
+        entry_id, score = row[0], row[2]
+        if entry_id in self._ids:
+            return False
+        item = (score, _Later(entry_id), row)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, item)
+        elif self._heap[0] < item:
+            self._ids.discard(heapq.heapreplace(self._heap, item)[2][0])
+        else:
+            return False
+        self._ids.add(entry_id)
+        self._ranked = None
+        self.dirty = True
+        return True
+
+    def discard(self, row: Row) -> bool:
+        """Take ``row`` off the board; the place it frees stays empty until the board is rebuilt."""
+        kept = [item for item in self._heap if item[2] != row]
+        if len(kept) == len(self._heap):
+            return False
+        heapq.heapify(kept)
+        self._heap = kept
+        self._ids.discard(row[0])
+        self._ranked = None
+        self.dirty = True
+        return True
+
+    def ranked(self) -> List[RankedRow]:
+        """Best first, ties sharing a rank; sorted once per change."""
+        if self._ranked is None:
+            ranked = []
+            rank = 0
+            previous = None
+            for position, (score, _, (entry_id, username, _, mode, day)) in enumerate(sorted(self._heap, reverse=True), 1):
+                if score != previous:
+                    rank, previous = position, score
+                ranked.append((entry_id, rank, username, score, mode, day))
+            self._ranked = ranked
+        return self._ranked
+
+
+class PeriodBoards:
+    """A ``TopK`` per period and game mode."""
+
+    def __init__(self, size: int = PERIOD_BOARD_SIZE, flush_interval: float = PERIOD_BOARD_FLUSH_SECONDS,
+                 today: Callable[[], date] = date.today):
+        self.size = size
+        self.flush_interval = flush_interval
+        # Server-local, like the dates submit_score stamps on entries
+        self.today = today
+        self._boards: Dict[Tuple[Period, str], TopK] = {}
+        self.loaded = False
+        self.rollovers = 0
+        self.flushes = 0
+        self._session_factory: Optional[async_sessionmaker] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def clear(self):
+        self._boards = {}
+        self.loaded = False
+
+    def board(self, period: Period, mode: str) -> TopK:
+        """The mode's board for the current period, rolled over first if that period has ended."""
+        starts = period_start(period, self.today())
+        board = self._boards.get((period, mode))
+        if board is None or board.starts < starts:
+            if board is not None:
+                self.rollovers += 1
+            board = self._boards[(period, mode)] = TopK(self.size, starts)
+        return board
+
+    async def _best(self, db: AsyncSession, period: Period, mode: str, today: date) -> List[Row]:
+        same_mode = select(*_COLUMNS).where(LeaderboardDB.mode == mode)
+        order = (LeaderboardDB.score.desc(), LeaderboardDB.id)
+        if period == Period.ALL:
+            days = [None]
+        else:
+            first = date.fromisoformat(period_start(period, today))
+            days = [(first + timedelta(days=n)).isoformat() for n in range((today - first).days + 1)]
+        rows = []
+        for day in days:
+            # One bounded range scan per day; a date range would have to sort the whole week
+            query = same_mode if day is None else same_mode.where(LeaderboardDB.date == day)
+            rows.extend((await db.execute(query.order_by(*order).limit(self.size))).all())
+        return rows
+
+    async def load(self, db: AsyncSession):
+        today = self.today()
+        boards = {}
+        for mode in GameMode:
+            for period in Period:
+                board = boards[(period, mode.value)] = TopK(self.size, period_start(period, today))
+                for row in await self._best(db, period, mode.value, today):
+                    board.offer(tuple(row))
+        self._boards = boards
+        self.loaded = True
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if not self.loaded:
+            await self.load(db)
+
+    def adopt(self, other: "PeriodBoards"):
+        """Take over the boards of a separately loaded copy; they are all mirrored again."""
+        self._boards = other._boards
+        self.loaded = other.loaded
+        self.mark_dirty()
+
+    def add(self, row: Row):
+        """Offer a new entry to each of its mode's boards whose current period contains its date."""
+        mode, day = row[3], date.fromisoformat(row[4])
+        for period in Period:
+            board = self.board(period, mode)
+            if period_start(period, day) == board.starts:
+                board.offer(row)
+
+    def discard(self, row: Row):
+        """Take an entry back off every board of its mode, e.g. once its row failed to be stored."""
+        for (_, mode), board in self._boards.items():
+            if mode == row[3]:
+                board.discard(row)
+
+    def top(self, period: Period, mode: Optional[str], limit: int) -> List[RankedRow]:
+        """The best ``limit`` entries of one mode, or of every mode merged with per-mode ranks."""
+        if mode is not None:
+            return self.board(period, mode).ranked()[:limit]
+        merged = heapq.merge(*(self.board(period, m.value).ranked() for m in GameMode),
+                             key=lambda row: (-row[3], row[0]))
+        return [row for _, row in zip(range(limit), merged)]
+
+    def mark_dirty(self):
+        for board in self._boards.values():
+            board.dirty = True
+
+    async def flush(self, session_factory: Optional[async_sessionmaker] = None):
+        """Rewrite the mirror rows of every board that changed or rolled over since the last flush."""
+        session_factory = session_factory or self._session_factory
+        for period, mode in list(self._boards):
+            self.board(period, mode)
+        dirty = [(key, board) for key, board in self._boards.items() if board.dirty]
+        if not dirty:
+            return
+        for _, board in dirty:
+            board.dirty = False
+        try:
+            async with session_factory() as session:
+                for (period, mode), board in dirty:
+                    await session.execute(delete(PeriodBoardDB).where(
+                        PeriodBoardDB.period == period.value, PeriodBoardDB.mode == mode
+                    ))
+                    rows = [
+                        dict(period=period.value, mode=mode, entry_id=entry_id, starts=board.starts, rank=rank,
+                             username=username, score=score, date=day)
+                        for entry_id, rank, username, score, _, day in board.ranked()
+                    ]
+                    if rows:
+                        await session.execute(insert(PeriodBoardDB), rows)
+                await session.commit()
+            self.flushes += 1
+        except Exception:
+            logger.exception("Mirroring %d period boards failed", len(dirty))
+            for _, board in dirty:
+                board.dirty = True
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, session_factory: async_sessionmaker):
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, final_flush: bool = True):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            if final_flush:
+                await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+period_boards = PeriodBoards()
@@ -0,0 +1,174 @@
+import math
+from typing import Dict, List, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from .db_models import LeaderboardDB
+from .engine import MAX_SCORE
+
+
+class ScoreFenwick:
+    """Fenwick tree over integer score buckets.
+
+    Bucket ``s`` holds the number of entries with score ``s``; prefix sums give
+    "how many entries score at most s" in O(log max_score). Memory grows
+    with the highest score, so scores above ``MAX_SCORE`` are counted as
+    ``MAX_SCORE``.
+    """
+
+    __slots__ = ("_tree", "_size", "total", "sum")
+
+    def __init__(self, capacity: int = 1024):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._size = size
+        self._tree = [0] * (size + 1)
+        self.total = 0
+        self.sum = 0
+
+    def _grow(self, score: int):
+        # Doubling a power-of-two Fenwick tree only needs the new root to carry
+        # the running total; every other new node covers an empty range.
+        while score >= self._size:
+            self._tree.extend([0] * self._size)
+            self._size <<= 1
+            self._tree[self._size] = self.total
+
+    def add(self, score: int, delta: int = 1):
+        if score < 0:
+            raise ValueError("Scores must be non-negative")
+        # Rows stored before submissions were capped may hold anything
+        score = min(score, MAX_SCORE)
+        if score >= self._size:
+            self._grow(score)
+        i = score + 1
+        tree = self._tree
+        size = self._size
+        while i <= size:
+            tree[i] += delta
+            i += i & -i
+        self.total += delta
+        self.sum += score * delta
+
+    def count_at_most(self, score: int) -> int:
+        if score < 0:
+            return 0
+        i = min(score + 1, self._size)
+        tree = self._tree
+        count = 0
+        while i > 0:
+            count += tree[i]
+            i -= i & -i
+        return count
+
+    def count_above(self, score: int) -> int:
+        return self.total - self.count_at_most(score)
+
+    def rank(self, score: int) -> int:
+        # Competition ranking: ties share a rank, matching the original
+        # "number of higher scores + 1" rule.
+        return self.count_above(score) + 1
+
+    def score_at(self, position: int) -> int:
+        """Score of the entry at 1-based ``position`` counted from the top."""
+        if position < 1 or position > self.total:
+            raise IndexError("position out of range")
+        # Find the smallest bucket whose prefix reaches the k-th lowest entry
+        target = self.total - position + 1
+        i = 0
+        step = self._size
+        tree = self._tree
+        while step:
+            nxt = i + step
+            if nxt <= self._size and tree[nxt] < target:
+                i = nxt
+                target -= tree[nxt]
+            step >>= 1
+        return i
+
+    def quantile(self, q: float) -> int:
+        """Nearest-rank quantile: the lowest score with at least a ``q`` share of entries at or below it."""
+        # Rounded first so that e.g. 0.07 * 100 is 7, not 8
+        k = max(1, math.ceil(round(q * self.total, 9)))
+        return self.score_at(self.total - k + 1)
+
+    def histogram(self, buckets: int) -> List[Tuple[int, int, int]]:
+        """``(low, high, count)`` for up to ``buckets`` equal-width ranges, inclusive, from the lowest score to the highest."""
+        if not self.total:
+            return []
+        low, high = self.score_at(self.total), self.score_at(1)
+        width = -(-(high - low + 1) // buckets)
+        result = []
+        below = 0
+        for start in range(low, high + 1, width):
+            end = min(start + width - 1, high)
+            upto = self.count_at_most(end)
+            result.append((start, end, upto - below))
+            below = upto
+        return result
+
+
+class RankIndex:
+    """Per-mode order-statistic index of leaderboard scores."""
+
+    def __init__(self):
+        self._modes: Dict[str, ScoreFenwick] = {}
+        self.loaded = False
+
+    def clear(self):
+        self._modes = {}
+        self.loaded = False
+
+    def _tree(self, mode: str) -> ScoreFenwick:
+        tree = self._modes.get(mode)
+        if tree is None:
+            tree = self._modes[mode] = ScoreFenwick()
+        return tree
+
+    async def load(self, db: AsyncSession):
+        # One grouped pass instead of pulling every row over the wire
+        result = await db.execute(
+            select(LeaderboardDB.mode, LeaderboardDB.score, func.count())
+            .group_by(LeaderboardDB.mode, LeaderboardDB.score)
+        )
+        modes: Dict[str, ScoreFenwick] = {}
+        for mode, score, count in result:
+            tree = modes.get(mode)
+            if tree is None:
+                tree = modes[mode] = ScoreFenwick()
+            tree.add(score, count)
+        self._modes = modes
+        self.loaded = True
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if not self.loaded:
+            await self.load(db)
+
+    def adopt(self, other: "RankIndex"):
+        """Take over the trees of an index loaded separately, e.g. while this one kept serving."""
+        self._modes = other._modes
+        self.loaded = other.loaded
+
+    def add(self, mode: str, score: int):
+        self._tree(mode).add(score)
+
+    def remove(self, mode: str, score: int):
+        self._tree(mode).add(score, -1)
+
+    def rank(self, mode: str, score: int) -> int:
+        tree = self._modes.get(mode)
+        return tree.rank(score) if tree else 1
+
+    def count(self, mode: str) -> int:
+        tree = self._modes.get(mode)
+        return tree.total if tree else 0
+
+    def score_at(self, mode: str, position: int) -> int:
+        return self._tree(mode).score_at(position)
+
+    def scores(self, mode: str) -> ScoreFenwick:
+        """The mode's tree, for distribution queries; read-only."""
+        return self._tree(mode)
+
+
+rank_index = RankIndex()
@@ -0,0 +1,193 @@
+import asyncio
+import base64
+import binascii
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .engine import MOVES, OPPOSITES, SnakeEngine, Cell
+
+REPLAY_WORKERS = int(os.getenv("REPLAY_WORKERS", "0")) or None
+REPLAY_MAX_PENDING = int(os.getenv("REPLAY_MAX_PENDING", "256"))
+MAX_REPLAY_TICKS = int(os.getenv("REPLAY_MAX_TICKS", "200000"))
+
+# 2-bit move codes, matching MOVE_CODES in frontend/src/hooks/useSnakeGame.ts
+DIRECTIONS = tuple(MOVES)
+_MASK = 0xFFFFFFFF
+
+
+class InvalidReplay(ValueError):
+    pass
+
+
+class VerifierBusy(Exception):
+    pass
+
+
+class Mulberry32:
+    """The 32-bit PRNG the browser seeds for food placement (``createRng`` in useSnakeGame.ts)."""
+
+    __slots__ = ("state",)
+
+    def __init__(self, seed: int):
+        self.state = seed & _MASK
+
+    def random(self) -> float:
+        a = self.state = (self.state + 0x6D2B79F5) & _MASK
+        t = ((a ^ (a >> 15)) * (a | 1)) & _MASK
+        t = ((t + ((t ^ (t >> 7)) * (t | 61))) & _MASK) ^ t
+        return ((t ^ (t >> 14)) & _MASK) / 4294967296
+
+
+class ReplayEngine(SnakeEngine):
+    """SnakeEngine whose food placement reproduces ``generateFood`` in the browser.
+
+    Food is the k-th free cell in row-major order, with k drawn from the
+    game's seeded Mulberry32 stream.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, mode: str, seed: int):
+        super().__init__(mode=mode, rng=Mulberry32(seed))
+
+    def _random_free_cell(self) -> Optional[Cell]:
+        free = len(self._free)
+        if not free:
+            return None
+        k = int(self.rng.random() * free)
+        cell = self._occupied.find(0)
+        for _ in range(k):
+            cell = self._occupied.find(0, cell + 1)
+        return (cell % self.size, cell // self.size)
+
+
+def pack_moves(codes: Sequence[int]) -> bytes:
+    """Pack 2-bit move codes, four per byte, first move in the low bits."""
+    packed = bytearray((len(codes) + 3) // 4)
+    for i, code in enumerate(codes):
+        packed[i >> 2] |= code << ((i & 3) * 2)
+    return bytes(packed)
+
+
+def decode_replay(data: Any) -> Tuple[int, bytes, int]:
+    """Validate a submitted ``{"seed", "moves", "ticks"}`` object."""
+    if not isinstance(data, dict):
+        raise InvalidReplay("Replay is required")
+    seed, moves, ticks = data.get("seed"), data.get("moves"), data.get("ticks")
+    if not isinstance(seed, int) or not 0 <= seed <= _MASK:
+        raise InvalidReplay("Replay seed must be a 32-bit unsigned integer")
+    if not isinstance(ticks, int) or not 0 < ticks <= MAX_REPLAY_TICKS:
+        raise InvalidReplay(f"Replay must have between 1 and {MAX_REPLAY_TICKS} ticks")
+    if not isinstance(moves, str):
+        raise InvalidReplay("Replay moves must be a base64 string")
+    try:
+        packed = base64.b64decode(moves, validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidReplay("Replay moves must be a base64 string")
+    if len(packed) != (ticks + 3) // 4:
+        raise InvalidReplay("Replay moves do not match its tick count")
+    return seed, packed, ticks
+
+
+def simulate(mode: str, seed: int, moves: bytes, ticks: int) -> int:
+    """Re-play a game and return its score.
+
+    Each tick moves in the recorded direction as-is: the browser applies
+    whatever direction its ref holds, so a fast double turn can reverse
+    the snake into its own neck. The replay must end on the crash that
+    ended the game.
+    """
+    engine = ReplayEngine(mode, seed)
+    for i in range(ticks):
+        engine.direction = DIRECTIONS[(moves[i >> 2] >> ((i & 3) * 2)) & 3]
+        if engine.step().dead:
+            if i != ticks - 1:
+                raise InvalidReplay("Replay continues after the snake crashed")
+            return engine.score
+    raise InvalidReplay("Replay ends before the game was over")
+
+
+def record(mode: str, seed: int, score: int) -> Dict[str, Any]:
+    """Play a game that ends with exactly ``score`` and return its replay.
+
+    The snake follows a Hamiltonian cycle of the board, so it can never
+    run into itself, and reverses into its own neck once it has ``score``
+    points. Used by the tests and benchmarks.
+    """
+    engine = ReplayEngine(mode, seed)
+    codes: List[int] = []
+    while engine.score < score:
+        if engine.food is None:
+            raise ValueError(f"Board is full at {engine.score} points")
+        engine.direction = _cycle_direction(engine.body.head(), engine.size)
+        codes.append(DIRECTIONS.index(engine.direction))
+        engine.step()
+    codes.append(DIRECTIONS.index(OPPOSITES[engine.direction]))
+    return {"seed": seed, "moves": base64.b64encode(pack_moves(codes)).decode(), "ticks": len(codes)}
+
+
+def _cycle_direction(head: Cell, size: int) -> str:
+    # Rows are swept right on even y and left on odd y over columns 1..size-1;
+    # column 0 leads back from the bottom-left corner to the top
+    x, y = head
+    if x == 0:
+        return "RIGHT" if y == 0 else "UP"
+    if y % 2 == 0:
+        return "RIGHT" if x < size - 1 else "DOWN"
+    if x > 1:
+        return "LEFT"
+    return "DOWN" if y < size - 1 else "LEFT"
+
+
+class ReplayVerifier:
+    """Re-simulates submitted replays in a process pool, off the event loop.
+
+    At most ``max_pending`` replays wait at once; beyond that
+    :meth:`verify` raises :class:`VerifierBusy` so the caller can shed load.
+    Without a pool (no :meth:`start`), replays are simulated inline.
+    """
+
+    def __init__(self, workers: Optional[int] = REPLAY_WORKERS, max_pending: int = REPLAY_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.verified = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self):
+        if self._pool is None:
+            # Spawned workers only import the engine, not the app or its event loop
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def stop(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown)
+
+    async def verify(self, mode: str, seed: int, moves: bytes, ticks: int) -> int:
+        if self.pending >= self.max_pending:
+            raise VerifierBusy()
+        self.pending += 1
+        try:
+            if self._pool is None:
+                score = simulate(mode, seed, moves, ticks)
+            else:
+                loop = asyncio.get_running_loop()
+                score = await loop.run_in_executor(self._pool, simulate, mode, seed, moves, ticks)
+        except InvalidReplay:
+            self.rejected += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.verified += 1
+        return score
+
+
+replay_verifier = ReplayVerifier()
@@ -0,0 +1,134 @@
+"""Routing of read-only queries to a replica while it keeps up with the primary.
+
+Every worker writes a heartbeat row to the primary each
+REPLICA_HEARTBEAT_SECONDS and reads it back from the replica; how old the
+replica's copy is gives its lag. A read goes to the replica unless the
+replica is further behind than REPLICA_MAX_LAG_SECONDS or unreachable, or
+the client wrote within the last READ_PIN_SECONDS. That pin travels in a
+cookie, so it holds whichever worker serves the next request.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from .db_models import ReplicaHeartbeatDB
+
+logger = logging.getLogger(__name__)
+
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+REPLICA_HEARTBEAT_SECONDS = float(os.getenv("REPLICA_HEARTBEAT_SECONDS", "0.5"))
+# Should exceed REPLICA_MAX_LAG, so a pinned client's write has reached the replica when the pin ends
+READ_PIN_SECONDS = float(os.getenv("READ_PIN_SECONDS", "5"))
+PIN_COOKIE = "db_pin"
+
+HEARTBEAT_ID = 1
+
+
+class ReplicaRouter:
+    """Decides, per request, whether a read may go to the replica."""
+
+    def __init__(self, replica: Optional[async_sessionmaker], max_lag: float = REPLICA_MAX_LAG,
+                 pin_seconds: float = READ_PIN_SECONDS, interval: float = REPLICA_HEARTBEAT_SECONDS):
+        self.replica = replica
+        self.max_lag = max_lag
+        self.pin_seconds = pin_seconds
+        self.interval = interval
+        # None until the first heartbeat makes it through, and after a failed probe
+        self.lag: Optional[float] = None
+        # Wall-clock time up to which the replica is known to have every primary commit
+        self.visible_until = 0.0
+        self.last_write = 0.0
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.probe_errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def configured(self) -> bool:
+        return self.replica is not None
+
+    def healthy(self) -> bool:
+        return self.configured and self.lag is not None and self.lag <= self.max_lag
+
+    def pinned(self, request: Request) -> bool:
+        try:
+            return float(request.cookies.get(PIN_COOKIE, "0")) > time.time()
+        except ValueError:
+            return False
+
+    def use_replica(self, request: Request) -> bool:
+        if not self.configured:
+            return False
+        if self.healthy() and not self.pinned(request):
+            self.replica_reads += 1
+            return True
+        self.primary_reads += 1
+        return False
+
+    def wrote(self, response: Optional[Response] = None):
+        """Note a write to the primary; with a response, also pin that client to the primary for a while."""
+        now = time.time()
+        self.last_write = now
+        if response is not None and self.configured:
+            response.set_cookie(
+                PIN_COOKIE, f"{now + self.pin_seconds:.3f}",
+                max_age=math.ceil(self.pin_seconds), httponly=True, samesite="lax",
+            )
+
+    def caught_up(self) -> bool:
+        """Whether the replica has every write this worker knows of, so pages read from it may be cached."""
+        return self.last_write < self.visible_until
+
+    async def probe(self, primary: async_sessionmaker):
+        try:
+            async with primary() as session:
+                await session.merge(ReplicaHeartbeatDB(id=HEARTBEAT_ID, at=time.time()))
+                await session.commit()
+            async with self.replica() as session:
+                seen = await session.scalar(select(ReplicaHeartbeatDB.at).where(ReplicaHeartbeatDB.id == HEARTBEAT_ID))
+        except Exception as e:
+            self.lag = None
+            self.probe_errors += 1
+            logger.warning("Replica probe failed, reading from the primary: %s", e)
+            return
+        if seen is None:
+            # Replication has not delivered the first heartbeat yet
+            self.lag = None
+            return
+        self.visible_until = max(self.visible_until, seen)
+        self.lag = max(time.time() - seen, 0.0)
+
+    async def _run(self, primary: async_sessionmaker):
+        while True:
+            await self.probe(primary)
+            await asyncio.sleep(self.interval)
+
+    def start(self, primary: async_sessionmaker):
+        if self.configured and self._task is None:
+            self._task = asyncio.create_task(self._run(primary))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "configured": self.configured,
+            "healthy": self.healthy(),
+            "lagSeconds": self.lag,
+            "replicaReads": self.replica_reads,
+            "primaryReads": self.primary_reads,
+            "probeErrors": self.probe_errors,
+        }
@@ -1,65 +1,111 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import uuid
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy import select
 from datetime import datetime, timezone
+from typing import Optional
 from ..models import User, AuthCredentials, ApiResponse
 from ..db_models import UserDB
 from ..database import get_db
+from ..passwords import HasherBusy, passwords
+from ..sessions import (SESSION_COOKIE, SESSION_COOKIE_SECURE, current_user, request_token, session_store,
+                        to_user, token_hash)
+from .. import cluster
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+def _busy() -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content=ApiResponse(success=False, error="Too many sign-ins, try again shortly").model_dump(),
+        headers={"Retry-After": "1"}
+    )
+
+async def _start_session(db: AsyncSession, user: User, response: Response):
+    token = await session_store.create(db, user)
+    response.set_cookie(
+        SESSION_COOKIE, token,
+        max_age=int(session_store.ttl),
+        httponly=True,
+        secure=SESSION_COOKIE_SECURE,
+        samesite="lax",
+    )
+
 @router.post("/login", response_model=ApiResponse[User])
-async def login(credentials: AuthCredentials, db: AsyncSession = Depends(get_db)):
+async def login(credentials: AuthCredentials, response: Response, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(UserDB).where(UserDB.email == credentials.email))
     user_db = result.scalars().first()
-    
-    if user_db and user_db.password == credentials.password:
-        user = User(
-            id=user_db.id,
-            username=user_db.username,
-            email=user_db.email,
-            createdAt=user_db.created_at
-        )
-        return ApiResponse(success=True, data=user)
-    
-    return ApiResponse(success=False, error="Invalid email or password")
+    if user_db is None:
+        session_store.mark_email_absent(credentials.email)
+
+    # Hashing is deliberately slow, so it runs off the event loop; unknown
+    # emails cost the same, so timing does not tell which accounts exist
+    try:
+        if user_db is None:
+            valid, rehashed = await passwords.verify_absent(credentials.password)
+        else:
+            valid, rehashed = await passwords.verify(user_db.password, credentials.password)
+    except HasherBusy:
+        return _busy()
+    if not valid:
+        return ApiResponse(success=False, error="Invalid email or password")
+    if rehashed:
+        user_db.password = rehashed
+
+    user = to_user(user_db)
+    await _start_session(db, user, response)
+    return ApiResponse(success=True, data=user)
 
 @router.post("/signup", response_model=ApiResponse[User])
-async def signup(credentials: AuthCredentials, db: AsyncSession = Depends(get_db)):
-    # Check if email exists
-    result = await db.execute(select(UserDB).where(UserDB.email == credentials.email))
-    if result.scalars().first():
-        return ApiResponse(success=False, error="Email already registered")
-    
+async def signup(credentials: AuthCredentials, response: Response, db: AsyncSession = Depends(get_db)):
     if not credentials.username:
         return ApiResponse(success=False, error="Username is required")
 
+    # Check if email exists, unless it was just looked up and not found
+    if not session_store.email_absent(credentials.email):
+        result = await db.execute(select(UserDB.id).where(UserDB.email == credentials.email))
+        if result.first():
+            return ApiResponse(success=False, error="Email already registered")
+
+    try:
+        password = await passwords.hash(credentials.password)
+    except HasherBusy:
+        return _busy()
+
     new_user_db = UserDB(
-        id=f"user_{int(datetime.now().timestamp())}",
+        id=f"user_{uuid.uuid4().hex}",
         username=credentials.username,
         email=credentials.email,
-        password=credentials.password,
+        password=password,
         created_at=datetime.now(timezone.utc)
     )
-    
     db.add(new_user_db)
-    await db.commit()
-    await db.refresh(new_user_db)
-    
-    user = User(
-        id=new_user_db.id,
-        username=new_user_db.username,
-        email=new_user_db.email,
-        createdAt=new_user_db.created_at
-    )
-    
+    try:
+        await db.flush()
+    except IntegrityError:
+        # Registered concurrently, or by another worker since the email was cached as free
+        await db.rollback()
+        session_store.mark_email_taken(credentials.email)
+        return ApiResponse(success=False, error="Email already registered")
+    session_store.mark_email_taken(credentials.email)
+
+    user = to_user(new_user_db)
+    await _start_session(db, user, response)
     return ApiResponse(success=True, data=user)
 
 @router.post("/logout", response_model=ApiResponse[None])
-async def logout():
+async def logout(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    token = request_token(request)
+    if token:
+        await session_store.revoke(db, token)
+        # Other workers may have the session cached
+        cluster.session_revoked(token_hash(token))
+    response.delete_cookie(SESSION_COOKIE, httponly=True, secure=SESSION_COOKIE_SECURE, samesite="lax")
     return ApiResponse(success=True)
 
 @router.get("/me", response_model=ApiResponse[User])
-async def get_current_user(db: AsyncSession = Depends(get_db)):
-    # Still stateless for now, return None to indicate not logged in
-    return ApiResponse(success=True, data=None)
+async def get_current_user(user: Optional[User] = Depends(current_user)):
+    # None when not logged in
+    return ApiResponse(success=True, data=user)
@@ -1,78 +1,349 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import select, or_, and_
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from ..models import LeaderboardEntry, ApiResponse, GameMode
+import base64
+import json
+import uuid
+from ..models import (LeaderboardEntry, LeaderboardNeighbourhood, ApiResponse, PagedApiResponse, GameMode, User,
+                      ExportFormat, ScoreStats, HistogramBucket, Period)
 from ..db_models import LeaderboardDB
-from ..database import get_db
+from ..database import get_db, get_read_db, replica_router
+from ..ranking import rank_index
+from ..engine import MAX_SCORE
+from ..period_boards import period_boards, period_start
+from ..ingest import score_ingestor, IngestQueueFull
+from ..cache import leaderboard_cache, etag_matches
+from ..fast_json import leaderboard_entries, paged_response, ranked_entries
+from ..leaderboard_io import MEDIA_TYPES, export_chunks
+from ..replay import replay_verifier, decode_replay, InvalidReplay, VerifierBusy
+from ..sessions import current_user
+from .. import cluster
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
-@router.get("", response_model=ApiResponse[List[LeaderboardEntry]])
-async def get_leaderboard(mode: Optional[GameMode] = None, db: AsyncSession = Depends(get_db)):
-    query = select(LeaderboardDB)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_WINDOW = 50
+MAX_BUCKETS = 200
+MAX_USERNAME_LENGTH = 32
+
+def _encode_cursor(score: int, entry_id: str) -> str:
+    raw = json.dumps([score, entry_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[int, str]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    score, entry_id = json.loads(base64.urlsafe_b64decode(padded))
+    if not isinstance(score, int) or not isinstance(entry_id, str):
+        raise ValueError("Malformed cursor")
+    return score, entry_id
+
+def _to_entry(e: LeaderboardDB) -> LeaderboardEntry:
+    # Ranks come from the live index rather than the stored snapshot column
+    return LeaderboardEntry(
+        id=e.id,
+        rank=rank_index.rank(e.mode, e.score),
+        username=e.username,
+        score=e.score,
+        mode=GameMode(e.mode),
+        date=e.date
+    )
+
+async def _load_page(
+    db: AsyncSession, mode: Optional[GameMode], limit: int, after: Optional[Tuple[int, str]]
+) -> bytes:
+    # Only the columns the response needs, as plain tuples rather than ORM objects
+    query = select(
+        LeaderboardDB.id, LeaderboardDB.username, LeaderboardDB.score, LeaderboardDB.mode, LeaderboardDB.date
+    )
     if mode:
         query = query.where(LeaderboardDB.mode == mode)
+
+    # Keyset pagination: resume strictly after the last (score, id) of the previous page
+    if after:
+        last_score, last_id = after
+        query = query.where(or_(
+            LeaderboardDB.score < last_score,
+            and_(LeaderboardDB.score == last_score, LeaderboardDB.id > last_id)
+        ))
     
-    # Sort by score descending
-    query = query.order_by(LeaderboardDB.score.desc())
+    # Sort by score descending, id as a stable tie-breaker
+    query = query.order_by(LeaderboardDB.score.desc(), LeaderboardDB.id).limit(limit + 1)
     
     result = await db.execute(query)
-    entries_db = result.scalars().all()
-    
-    entries = [
-        LeaderboardEntry(
-            id=e.id,
-            rank=e.rank,
-            username=e.username,
-            score=e.score,
-            mode=GameMode(e.mode),
-            date=e.date
-        ) for e in entries_db
-    ]
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_id, _, last_score, _, _ = rows[-1]
+        next_cursor = _encode_cursor(last_score, last_id)
     
-    return ApiResponse(success=True, data=entries)
+    # Encoded straight to the PagedApiResponse wire format, skipping per-row models
+    return paged_response(leaderboard_entries(rows), next_cursor)
+
+@router.get("", response_model=PagedApiResponse[List[LeaderboardEntry]])
+async def get_leaderboard(
+    mode: Optional[GameMode] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    period: Optional[Period] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    primary: AsyncSession = Depends(get_db)
+):
+    tag = mode.value if mode else None
+    if period:
+        # A single page straight from the in-memory top-K boards, O(K) and no query
+        if cursor:
+            return PagedApiResponse(success=False, error="Period leaderboards have a single page")
+        if limit > period_boards.size:
+            return JSONResponse(
+                status_code=422,
+                content=PagedApiResponse(
+                    success=False, error=f"Period leaderboards hold at most {period_boards.size} entries"
+                ).model_dump()
+            )
+        # The period's first day is part of the key, so a rollover never serves the last period's page
+        key = ("period", period, period_start(period, period_boards.today()), tag, limit)
+    else:
+        key = (tag, limit, cursor)
+
+    cached = leaderboard_cache.get(key)
+    if cached is None and period:
+        generation = leaderboard_cache.generation(tag)
+        await period_boards.ensure_loaded(primary)
+        body = paged_response(ranked_entries(period_boards.top(period, tag, limit)), None)
+        cached = leaderboard_cache.put(key, body, tag, generation)
+    elif cached is None:
+        after = None
+        if cursor:
+            try:
+                after = _decode_cursor(cursor)
+            except (ValueError, TypeError):
+                return PagedApiResponse(success=False, error="Invalid cursor")
+        # Read the generation first so a submit racing this query leaves the page uncached
+        generation = leaderboard_cache.generation(tag)
+        # From the primary: an index built from a lagging replica would stay short of those scores
+        await rank_index.ensure_loaded(primary)
+        body = await _load_page(db, mode, limit, after)
+        ttl = None
+        if db.info.get("replica") and not replica_router.caught_up():
+            # The replica may not have the latest scores yet; keep the page no longer than it may lag
+            ttl = replica_router.max_lag
+        cached = leaderboard_cache.put(key, body, tag, generation, ttl)
+
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_leaderboard(
+    format: ExportFormat = ExportFormat.NDJSON,
+    mode: Optional[GameMode] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Rows as stored, ranks included, streamed a batch at a time from a server-side cursor
+    filename = f"leaderboard{'-' + mode.value if mode else ''}.{format.value}"
+    return StreamingResponse(
+        export_chunks(db, format, mode.value if mode else None),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def _parse_percentiles(raw: str) -> List[float]:
+    values = [float(part) for part in raw.split(",") if part.strip()]
+    if not values or any(not 0 < p <= 100 for p in values):
+        raise ValueError("Percentiles must be between 0 and 100")
+    return values
+
+@router.get("/stats", response_model=ApiResponse[ScoreStats])
+async def get_score_stats(
+    mode: GameMode,
+    buckets: int = Query(20, ge=1, le=MAX_BUCKETS),
+    percentiles: str = "50,90,99",
+    score: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    # Read straight off the rank index, so the figures are exact and cost no query once it is loaded
+    try:
+        wanted = _parse_percentiles(percentiles)
+    except ValueError:
+        return ApiResponse(success=False, error="Percentiles must be comma-separated numbers in (0, 100]")
+
+    await rank_index.ensure_loaded(db)
+    tree = rank_index.scores(mode.value)
+    total = tree.total
+    stats = ScoreStats(
+        mode=mode,
+        count=total,
+        mean=tree.sum / total if total else 0.0,
+        min=tree.score_at(total) if total else None,
+        max=tree.score_at(1) if total else None,
+        percentiles={f"{p:g}": tree.quantile(p / 100) for p in wanted} if total else {},
+        histogram=[HistogramBucket(min=low, max=high, count=count) for low, high, count in tree.histogram(buckets)]
+    )
+    if score is not None:
+        stats.score = score
+        stats.rank = tree.rank(score)
+        stats.beats = 100 * tree.count_at_most(score - 1) / total if total else 0.0
+    return ApiResponse(success=True, data=stats)
+
+@router.get("/cache/stats", response_model=ApiResponse[Dict[str, int]])
+async def get_cache_stats():
+    return ApiResponse(success=True, data=leaderboard_cache.stats())
+
+async def _around(db: AsyncSession, target: LeaderboardDB, window: int) -> LeaderboardNeighbourhood:
+    # Two bounded range scans on (mode, score DESC, id), walking away from the target
+    same_mode = LeaderboardDB.mode == target.mode
+    above_query = (
+        select(LeaderboardDB)
+        .where(same_mode)
+        .where(or_(
+            LeaderboardDB.score > target.score,
+            and_(LeaderboardDB.score == target.score, LeaderboardDB.id < target.id)
+        ))
+        .order_by(LeaderboardDB.score.asc(), LeaderboardDB.id.desc())
+        .limit(window)
+    )
+    below_query = (
+        select(LeaderboardDB)
+        .where(same_mode)
+        .where(or_(
+            LeaderboardDB.score < target.score,
+            and_(LeaderboardDB.score == target.score, LeaderboardDB.id > target.id)
+        ))
+        .order_by(LeaderboardDB.score.desc(), LeaderboardDB.id)
+        .limit(window)
+    )
+
+    above = (await db.execute(above_query)).scalars().all() if window else []
+    below = (await db.execute(below_query)).scalars().all() if window else []
+
+    return LeaderboardNeighbourhood(
+        entry=_to_entry(target),
+        above=[_to_entry(e) for e in reversed(above)],
+        below=[_to_entry(e) for e in below]
+    )
+
+@router.get("/around/user/{username}", response_model=ApiResponse[LeaderboardNeighbourhood])
+async def get_user_neighbourhood(
+    username: str,
+    mode: Optional[GameMode] = None,
+    window: int = Query(5, ge=0, le=MAX_WINDOW),
+    db: AsyncSession = Depends(get_db)
+):
+    # The player's best entry, optionally within one mode
+    query = select(LeaderboardDB).where(LeaderboardDB.username == username)
+    if mode:
+        query = query.where(LeaderboardDB.mode == mode)
+    query = query.order_by(LeaderboardDB.score.desc(), LeaderboardDB.id).limit(1)
+
+    target = (await db.execute(query)).scalars().first()
+    if not target:
+        return ApiResponse(success=False, error="Entry not found")
+
+    await rank_index.ensure_loaded(db)
+    return ApiResponse(success=True, data=await _around(db, target, window))
+
+@router.get("/around/{entry_id}", response_model=ApiResponse[LeaderboardNeighbourhood])
+async def get_entry_neighbourhood(
+    entry_id: str,
+    window: int = Query(5, ge=0, le=MAX_WINDOW),
+    db: AsyncSession = Depends(get_db)
+):
+    target = await db.get(LeaderboardDB, entry_id)
+    if not target:
+        return ApiResponse(success=False, error="Entry not found")
+
+    await rank_index.ensure_loaded(db)
+    return ApiResponse(success=True, data=await _around(db, target, window))
+
+def _busy(error: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content=ApiResponse(success=False, error=error).model_dump(),
+        headers={"Retry-After": "1"}
+    )
 
 @router.post("", response_model=ApiResponse[LeaderboardEntry])
-async def submit_score(data: dict, db: AsyncSession = Depends(get_db)):
-    # In a real app, we'd get the user from the token
-    # For now, we'll just create a mock entry or update if we knew the user
-    # Let's assume a generic user for this mock submission
-    
+async def submit_score(data: dict, response: Response, db: AsyncSession = Depends(get_db),
+                       user: Optional[User] = Depends(current_user)):
+    # Signed-in players are ranked under their own name; anonymous ones under the name they send
+
     score = data.get("score")
     mode = data.get("mode")
     
     if score is None or mode is None:
         return ApiResponse(success=False, error="Score and mode are required")
 
-    # Generate a new entry
-    new_entry_db = LeaderboardDB(
-        id=f"score_{int(datetime.now().timestamp())}",
-        rank=0, # Rank needs recalculation
-        username=data.get("username", "Player1"),
+    if not isinstance(score, int) or isinstance(score, bool) or score < 0:
+        return ApiResponse(success=False, error="Score must be a non-negative integer")
+    if score > MAX_SCORE:
+        return ApiResponse(success=False, error=f"Score cannot exceed {MAX_SCORE}")
+
+    try:
+        mode = GameMode(mode)
+    except ValueError:
+        return ApiResponse(success=False, error="Invalid game mode")
+
+    username = user.username if user else data.get("username", "Player1")
+    if not isinstance(username, str) or not 0 < len(username) <= MAX_USERNAME_LENGTH or not username.isprintable():
+        return ApiResponse(success=False,
+                           error=f"Username must be 1 to {MAX_USERNAME_LENGTH} printable characters")
+
+    # Only scores the server can reproduce from the replay are ranked
+    try:
+        verified = await replay_verifier.verify(mode.value, *decode_replay(data.get("replay")))
+    except InvalidReplay as e:
+        return ApiResponse(success=False, error=str(e))
+    except VerifierBusy:
+        return _busy("Too many score submissions, try again shortly")
+    if verified != score:
+        return ApiResponse(success=False, error="Score does not match the replay")
+
+    await rank_index.ensure_loaded(db)
+    await period_boards.ensure_loaded(db)
+
+    # Rank is known up front from the index, so a single insert + commit is enough
+    entry = LeaderboardEntry(
+        id=f"score_{uuid.uuid4().hex}",
+        rank=rank_index.rank(mode.value, score),
+        username=username,
         score=score,
         mode=mode,
         date=datetime.now().strftime("%Y-%m-%d")
     )
-    
-    db.add(new_entry_db)
-    await db.commit()
-    await db.refresh(new_entry_db)
-    
-    # Simple rank calculation (just count how many have higher score + 1)
-    result = await db.execute(select(LeaderboardDB).where(LeaderboardDB.score > score).where(LeaderboardDB.mode == mode))
-    higher_scores = len(result.scalars().all())
-    new_entry_db.rank = higher_scores + 1
-    await db.commit()
-    
-    entry = LeaderboardEntry(
-        id=new_entry_db.id,
-        rank=new_entry_db.rank,
-        username=new_entry_db.username,
-        score=new_entry_db.score,
-        mode=GameMode(new_entry_db.mode),
-        date=new_entry_db.date
+
+    row = dict(
+        id=entry.id,
+        rank=entry.rank,
+        username=entry.username,
+        score=entry.score,
+        mode=mode.value,
+        date=entry.date
     )
+
+    if score_ingestor.running:
+        # Write-behind: acknowledge now with a provisional rank, flush in bulk later
+        try:
+            await score_ingestor.submit(row)
+        except IngestQueueFull:
+            return _busy("Too many score submissions, try again shortly")
+    else:
+        db.add(LeaderboardDB(**row))
+        await db.commit()
+
+    rank_index.add(mode.value, score)
+    board_row = (entry.id, entry.username, score, mode.value, entry.date)
+    period_boards.add(board_row)
+    leaderboard_cache.invalidate(mode.value)
+    # Reads from this client go to the primary until the replica has the new score
+    replica_router.wrote(response)
+    cluster.score_added(board_row)
     
     return ApiResponse(success=True, data=entry)
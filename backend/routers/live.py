@@ -1,50 +1,101 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 from ..models import LivePlayer, ApiResponse, GameMode, Position, Direction
-from ..db_models import LivePlayerDB
-from ..database import get_db
+from ..database import get_db, get_read_db
+from ..live_sim import live_sim
+from ..live_store import LiveGame
+from ..broadcast import Subscription, RESYNC, CLOSED
+from ..snake_codec import OCTET_STREAM
+from ..fast_json import list_response, live_player
 
 router = APIRouter(prefix="/live", tags=["Live"])
 
+def _to_player(game: LiveGame) -> LivePlayer:
+    game.refresh()
+    return LivePlayer(
+        id=game.id,
+        username=game.username,
+        score=game.score,
+        mode=GameMode(game.mode),
+        snake=[Position(x=x, y=y) for x, y in game.body],
+        food=Position(x=game.food[0], y=game.food[1]),
+        direction=Direction(game.direction),
+        viewers=game.viewers
+    )
+
 @router.get("/players", response_model=ApiResponse[List[LivePlayer]])
-async def get_active_players(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(LivePlayerDB))
-    players_db = result.scalars().all()
-    
-    players = [
-        LivePlayer(
-            id=p.id,
-            username=p.username,
-            score=p.score,
-            mode=GameMode(p.mode),
-            snake=[Position(**pos) for pos in p.snake],
-            food=Position(**p.food),
-            direction=Direction(p.direction),
-            viewers=p.viewers
-        ) for p in players_db
-    ]
+async def get_active_players(db: AsyncSession = Depends(get_read_db)):
+    # Served from the in-memory live store; the table only holds snapshots
+    await live_sim.ensure_loaded(db)
+    players = ",".join([live_player(game) for game in live_sim.games.values()])
     
-    return ApiResponse(success=True, data=players)
+    return Response(list_response(players), media_type="application/json")
+
+async def _attach(websocket: WebSocket, db: AsyncSession):
+    await live_sim.ensure_loaded(db)
+    # Release the connection now; a stream can stay open for hours
+    await db.close()
+    live_sim.start()
+    await websocket.accept()
+
+async def _pump(websocket: WebSocket, sub: Subscription, seq: int, keyframe: Callable[[], Tuple[int, bytes]]):
+    # Frames arrive pre-encoded from the hub and are sent as-is
+    while True:
+        frame_seq, payload = await sub.get()
+        if payload is CLOSED:
+            await websocket.close(code=1000, reason="Game ended")
+            return
+        if payload is RESYNC:
+            # We fell behind and frames were dropped; start over from current state
+            seq, payload = keyframe()
+        elif frame_seq <= seq:
+            continue
+        else:
+            seq = frame_seq
+        await websocket.send_bytes(payload)
+
+@router.websocket("/players/stream")
+async def stream_lobby(websocket: WebSocket, db: AsyncSession = Depends(get_db)):
+    await _attach(websocket, db)
+    sub = live_sim.subscribe_lobby()
+    try:
+        tick, payload = live_sim.lobby_keyframe()
+        await websocket.send_bytes(payload)
+        await _pump(websocket, sub, tick, live_sim.lobby_keyframe)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_sim.unsubscribe(sub)
+
+@router.websocket("/players/{player_id}/stream")
+async def stream_player(websocket: WebSocket, player_id: str, db: AsyncSession = Depends(get_db)):
+    await _attach(websocket, db)
+    game = live_sim.games.get(player_id)
+    if not game:
+        await websocket.close(code=4404, reason="Player not found")
+        return
+    sub = live_sim.subscribe(player_id)
+    try:
+        seq, payload = game.keyframe_at()
+        await websocket.send_bytes(payload)
+        await _pump(websocket, sub, seq, game.keyframe_at)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_sim.unsubscribe(sub)
 
 @router.get("/players/{player_id}", response_model=ApiResponse[LivePlayer])
-async def get_player_stream(player_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(LivePlayerDB).where(LivePlayerDB.id == player_id))
-    player_db = result.scalars().first()
+async def get_player_stream(player_id: str, db: AsyncSession = Depends(get_read_db),
+                            accept: Optional[str] = Header(None)):
+    await live_sim.ensure_loaded(db)
+    game = live_sim.games.get(player_id)
     
-    if not player_db:
+    if not game:
         return ApiResponse(success=True, data=None)
-        
-    player = LivePlayer(
-        id=player_db.id,
-        username=player_db.username,
-        score=player_db.score,
-        mode=GameMode(player_db.mode),
-        snake=[Position(**pos) for pos in player_db.snake],
-        food=Position(**player_db.food),
-        direction=Direction(player_db.direction),
-        viewers=player_db.viewers
-    )
+
+    # Opt-in binary form; JSON stays the default
+    if accept and OCTET_STREAM in accept:
+        return Response(game.player_bytes(), media_type=OCTET_STREAM, headers={"Vary": "Accept"})
     
-    return ApiResponse(success=True, data=player)
+    return ApiResponse(success=True, data=_to_player(game))
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Response
+from typing import Any, Dict
+from ..models import ApiResponse
+from ..database import engine, read_engine, replica_router
+from ..db_engine import pool_stats
+from ..metrics import metrics
+from ..cluster import backplane
+from ..live_sim import live_sim
+from ..admission import admission
+
+router = APIRouter(tags=["System"])
+
+PROMETHEUS_TEXT = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/system/db-pool", response_model=ApiResponse[Dict[str, float]])
+async def get_db_pool_stats():
+    return ApiResponse(success=True, data=pool_stats(engine))
+
+@router.get("/system/replica", response_model=ApiResponse[Dict[str, Any]])
+async def get_replica_stats():
+    stats = replica_router.stats()
+    stats["pool"] = pool_stats(read_engine) if read_engine is not None else {}
+    return ApiResponse(success=True, data=stats)
+
+@router.get("/system/backplane", response_model=ApiResponse[Dict[str, Any]])
+async def get_backplane_stats():
+    stats = backplane.stats()
+    stats["following"] = live_sim.following
+    return ApiResponse(success=True, data=stats)
+
+@router.get("/system/admission", response_model=ApiResponse[Dict[str, Any]])
+async def get_admission_stats():
+    return ApiResponse(success=True, data=admission.stats())
+
+@router.get("/metrics")
+async def get_metrics():
+    engines = [("primary", engine)]
+    if read_engine is not None:
+        engines.append(("replica", read_engine))
+    return Response(metrics.render(engines), media_type=PROMETHEUS_TEXT)
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import TTLCache
+from .database import get_db
+from .db_models import SessionDB, UserDB
+from .models import User
+
+SESSION_COOKIE = "session"
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(30 * 24 * 3600)))
+SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "0") == "1"
+# A logout in another worker evicts the cached entry over the backplane; expiry only
+# matters if that message is lost
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "60"))
+EMAIL_CACHE_SIZE = int(os.getenv("EMAIL_CACHE_SIZE", "10000"))
+EMAIL_CACHE_TTL = float(os.getenv("EMAIL_CACHE_TTL", "300"))
+
+# Cached for tokens that resolve to nobody, so made-up tokens don't each cost a query
+_ANONYMOUS = object()
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def to_user(user_db: UserDB) -> User:
+    return User(id=user_db.id, username=user_db.username, email=user_db.email, createdAt=user_db.created_at)
+
+
+def request_token(request: Request) -> Optional[str]:
+    """The session token from the cookie, or from an ``Authorization: Bearer`` header."""
+    token = request.cookies.get(SESSION_COOKIE)
+    if token:
+        return token
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials.strip()
+    return None
+
+
+class SessionStore:
+    """Login sessions in the database, with an LRU + TTL cache in front.
+
+    Resolving a cached token costs no query, which is what ``/auth/me`` and
+    authenticated score submissions hit on every call. The store also
+    remembers emails recently looked up and not found, so signups for a
+    fresh address can skip the existence check; the unique constraint on
+    ``users.email`` still has the final word.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, cache_size: int = SESSION_CACHE_SIZE,
+                 cache_ttl: float = SESSION_CACHE_TTL, email_cache_size: int = EMAIL_CACHE_SIZE,
+                 email_cache_ttl: float = EMAIL_CACHE_TTL):
+        self.ttl = ttl
+        self.users = TTLCache(cache_size, cache_ttl)
+        self.absent_emails = TTLCache(email_cache_size, email_cache_ttl)
+
+    def clear(self):
+        self.users.clear()
+        self.absent_emails.clear()
+
+    async def create(self, db: AsyncSession, user: User) -> str:
+        """Start a session for ``user`` and commit; returns the token for the client."""
+        token = secrets.token_urlsafe(32)
+        now = datetime.now(timezone.utc)
+        # Expired sessions are swept per user as they log in again
+        await db.execute(delete(SessionDB).where(SessionDB.user_id == user.id, SessionDB.expires_at <= now))
+        db.add(SessionDB(token_hash=token_hash(token), user_id=user.id, created_at=now,
+                         expires_at=now + timedelta(seconds=self.ttl)))
+        await db.commit()
+        self.users.put(token_hash(token), user)
+        return token
+
+    async def resolve(self, db: AsyncSession, token: Optional[str]) -> Optional[User]:
+        if not token:
+            return None
+        key = token_hash(token)
+        cached = self.users.get(key)
+        if cached is not None:
+            return None if cached is _ANONYMOUS else cached
+
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            select(UserDB, SessionDB.expires_at)
+            .join(SessionDB, SessionDB.user_id == UserDB.id)
+            .where(SessionDB.token_hash == key, SessionDB.expires_at > now)
+        )
+        row = result.first()
+        if row is None:
+            self.users.put(key, _ANONYMOUS)
+            return None
+        user_db, expires_at = row
+        if expires_at.tzinfo is None:
+            # SQLite hands back naive datetimes; everything is stored in UTC
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        user = to_user(user_db)
+        self.users.put(key, user, ttl=(expires_at - now).total_seconds())
+        return user
+
+    async def revoke(self, db: AsyncSession, token: Optional[str]):
+        if not token:
+            return
+        key = token_hash(token)
+        await db.execute(delete(SessionDB).where(SessionDB.token_hash == key))
+        await db.commit()
+        self.users.discard(key)
+
+    def email_absent(self, email: str) -> bool:
+        return self.absent_emails.get(email, False)
+
+    def mark_email_absent(self, email: str):
+        self.absent_emails.put(email, True)
+
+    def mark_email_taken(self, email: str):
+        self.absent_emails.discard(email)
+
+
+session_store = SessionStore()
+
+
+async def current_user(request: Request, db: AsyncSession = Depends(get_db)) -> Optional[User]:
+    """Dependency resolving the signed-in user, or ``None`` for anonymous requests."""
+    return await session_store.resolve(db, request_token(request))
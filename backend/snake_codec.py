@@ -0,0 +1,123 @@
+import json
+import struct
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+Cell = Tuple[int, int]
+Buffer = Union[bytes, bytearray, memoryview]
+
+OCTET_STREAM = "application/octet-stream"
+
+SNAKE_FORMAT = 1
+PLAYER_FORMAT = 1
+MODES = ("walls", "pass-through")
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+NO_FOOD = 0xFF
+
+# format, segment count; then one (x, y) byte pair per segment, head first
+_SNAKE_HEADER = struct.Struct("<BH")
+# format, mode, direction, food x, food y, score, viewers; then id, username and the snake
+_PLAYER_HEADER = struct.Struct("<BBBBBIH")
+
+
+def encode_snake(cells: Iterable[Cell]) -> bytes:
+    """Pack a snake as a 3-byte header plus two bytes per segment."""
+    packed = bytes(chain.from_iterable(cells))
+    return _SNAKE_HEADER.pack(SNAKE_FORMAT, len(packed) // 2) + packed
+
+
+class SnakeView:
+    """Read-only snake over an encoded buffer; cells are read in place, never copied."""
+
+    __slots__ = ("_cells",)
+
+    def __init__(self, cells: memoryview):
+        self._cells = cells
+
+    def __len__(self) -> int:
+        return len(self._cells) // 2
+
+    def __getitem__(self, index: int) -> Cell:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("snake index out of range")
+        return (self._cells[2 * index], self._cells[2 * index + 1])
+
+    def __iter__(self) -> Iterator[Cell]:
+        it = iter(self._cells)
+        return zip(it, it)
+
+    def head(self) -> Cell:
+        return self[0]
+
+    @property
+    def nbytes(self) -> int:
+        return _SNAKE_HEADER.size + len(self._cells)
+
+
+def _legacy_snake(data: Union[Buffer, str, list]) -> Optional[SnakeView]:
+    """The JSON list of ``{"x", "y"}`` objects stored before migration 0003, if ``data`` is one."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        if bytes(data[:1]) != b"[":
+            return None
+        data = bytes(data).decode()
+    if isinstance(data, str):
+        data = json.loads(data)
+    return SnakeView(memoryview(bytes(v for cell in data for v in (cell["x"], cell["y"]))))
+
+
+def decode_snake(data: Buffer, offset: int = 0) -> SnakeView:
+    # A packed snake starts with its format byte, never "["
+    legacy = _legacy_snake(data) if offset == 0 else None
+    if legacy is not None:
+        return legacy
+    view = memoryview(data)
+    fmt, length = _SNAKE_HEADER.unpack_from(view, offset)
+    if fmt != SNAKE_FORMAT:
+        raise ValueError(f"Unknown snake format {fmt}")
+    start = offset + _SNAKE_HEADER.size
+    cells = view[start:start + 2 * length]
+    if len(cells) != 2 * length:
+        raise ValueError("Truncated snake")
+    return SnakeView(cells)
+
+
+def _pack_str(value: str) -> bytes:
+    raw = value.encode()
+    if len(raw) > 255:
+        raise ValueError("String too long to encode")
+    return bytes((len(raw),)) + raw
+
+
+def encode_player(id: str, username: str, mode: str, direction: str, food: Optional[Cell],
+                  score: int, viewers: int, cells: Iterable[Cell]) -> bytes:
+    """Binary form of a ``LivePlayer``; see ``LivePlayerBinary`` in openapi.yaml."""
+    fx, fy = food if food is not None else (NO_FOOD, NO_FOOD)
+    header = _PLAYER_HEADER.pack(
+        PLAYER_FORMAT, MODES.index(mode), DIRECTIONS.index(direction), fx, fy, score, min(viewers, 0xFFFF)
+    )
+    return b"".join((header, _pack_str(id), _pack_str(username), encode_snake(cells)))
+
+
+def decode_player(data: Buffer) -> Dict[str, Any]:
+    view = memoryview(data)
+    fmt, mode, direction, fx, fy, score, viewers = _PLAYER_HEADER.unpack_from(view)
+    if fmt != PLAYER_FORMAT:
+        raise ValueError(f"Unknown player format {fmt}")
+    offset = _PLAYER_HEADER.size
+    strings = []
+    for _ in range(2):
+        length = view[offset]
+        strings.append(str(view[offset + 1:offset + 1 + length], "utf-8"))
+        offset += 1 + length
+    return {
+        "id": strings[0],
+        "username": strings[1],
+        "score": score,
+        "mode": MODES[mode],
+        "snake": decode_snake(view, offset),
+        "food": None if fx == NO_FOOD else (fx, fy),
+        "direction": DIRECTIONS[direction],
+        "viewers": viewers,
+    }
@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+import brotli
+from fastapi.responses import Response
+
+from .cache import etag_matches
+
+logger = logging.getLogger(__name__)
+
+INDEX = "index.html"
+# Vite writes content-hashed file names under assets/, so they never change in place
+HASHED_PREFIX = "assets/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+SHORT = "public, max-age=3600"
+# Smaller files gain too little from compression to pay for the extra header bytes
+MIN_COMPRESS_SIZE = 512
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/wasm",
+                "application/manifest+json", "image/x-icon", "image/vnd.microsoft.icon")
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip")
+
+
+class StaticAsset:
+    """One file held in memory, with its precompressed variants."""
+
+    __slots__ = ("media_type", "cache_control", "variants", "etags")
+
+    def __init__(self, body: bytes, media_type: str, cache_control: str):
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= MIN_COMPRESS_SIZE and media_type.startswith(COMPRESSIBLE):
+            for encoding, data in (("br", brotli.compress(body, quality=11)), ("gzip", gzip.compress(body, 9, mtime=0))):
+                if len(data) < len(body):
+                    self.variants[encoding] = data
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        # Each encoding is a different representation, so each gets its own strong ETag
+        self.etags = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in self.variants
+        }
+
+    def negotiate(self, accept_encoding: Optional[str]) -> str:
+        if not accept_encoding or len(self.variants) == 1:
+            return "identity"
+        accepted = {}
+        for part in accept_encoding.split(","):
+            name, _, params = part.strip().partition(";")
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[name.strip().lower()] = q
+        for encoding in ENCODINGS:
+            if encoding in self.variants and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return encoding
+        return "identity"
+
+
+class StaticSite:
+    """The built SPA, loaded from disk once and served from memory.
+
+    Every file under ``root`` is read at startup together with its brotli
+    and gzip variants, so a request costs a dict lookup: no disk I/O and no
+    compression. Hashed assets are cached forever by browsers; everything
+    else revalidates with its ETag.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.files: Dict[str, StaticAsset] = {}
+        for path in sorted(self.root.rglob("*")):
+            if not path.is_file():
+                continue
+            name = path.relative_to(self.root).as_posix()
+            media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if media_type.startswith("text/") or media_type == "application/javascript":
+                media_type += "; charset=utf-8"
+            if name.startswith(HASHED_PREFIX):
+                cache_control = IMMUTABLE
+            elif name == INDEX:
+                cache_control = REVALIDATE
+            else:
+                cache_control = SHORT
+            self.files[name] = StaticAsset(path.read_bytes(), media_type, cache_control)
+        total = sum(len(v) for asset in self.files.values() for v in asset.variants.values())
+        logger.info("Loaded %d static files (%d bytes with variants) from %s", len(self.files), total, root)
+
+    def respond(self, name: str, headers: Mapping[str, str]) -> Response:
+        asset = self.files.get(name)
+        if asset is None:
+            return Response(status_code=404)
+        encoding = asset.negotiate(headers.get("accept-encoding"))
+        etag = asset.etags[encoding]
+        response_headers = {"ETag": etag, "Cache-Control": asset.cache_control}
+        if len(asset.variants) > 1:
+            response_headers["Vary"] = "Accept-Encoding"
+        if etag_matches(headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=response_headers)
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(asset.variants[encoding], media_type=asset.media_type, headers=response_headers)
+
+    def spa(self, path: str, headers: Mapping[str, str]) -> Response:
+        """Serve a file if there is one, else index.html so client-side routes load."""
+        if path in self.files:
+            return self.respond(path, headers)
+        if path.startswith(HASHED_PREFIX):
+            # A stale asset name must not be answered with HTML
+            return Response(status_code=404)
+        return self.respond(INDEX, headers)
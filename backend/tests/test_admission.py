@@ -0,0 +1,43 @@
+from backend.admission import Admission, TokenBuckets, parse_limits
+
+
+def test_parse_limits():
+    assert parse_limits("POST /leaderboard=30/60, post /auth/login=5/1,") == {
+        ("POST", "/leaderboard"): (30, 60.0),
+        ("POST", "/auth/login"): (5, 1.0),
+    }
+
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate():
+    buckets = TokenBuckets(burst=3, seconds=3)
+    assert [buckets.take("a", now=100) for _ in range(3)] == [0, 0, 0]
+    assert buckets.take("a", now=100) == 1
+    # Other keys have their own bucket
+    assert buckets.take("b", now=100) == 0
+    assert buckets.take("a", now=100.5) == 0.5
+    assert buckets.take("a", now=101) == 0
+    assert buckets.take("a", now=101) == 1
+    assert (buckets.allowed, buckets.limited) == (5, 3)
+
+
+def test_full_buckets_lapse_and_the_store_is_capped():
+    buckets = TokenBuckets(burst=2, seconds=10, max_keys=3)
+    for n in range(5):
+        buckets.take(n, now=0)
+    assert len(buckets) == 3
+
+    # Refilled buckets are dropped a couple at a time as other keys are seen
+    buckets.take("late", now=100)
+    assert len(buckets) == 2
+    buckets.take("later", now=100)
+    assert len(buckets) == 2
+
+
+def test_gate_sheds_past_the_concurrency_cap():
+    admission = Admission("POST /leaderboard=100/1", max_concurrency=1)
+    scope = {"method": "POST", "path": "/leaderboard", "headers": [], "client": ("10.0.0.1", 5000)}
+    assert admission.admit({**scope, "path": "/live/players"})[0] is False
+    assert admission.admit(scope)[:2] == (True, 0)
+    admission.in_flight = 1
+    assert admission.admit(scope)[:2] == (True, 1)
+    assert admission.stats()["shed"] == 1
@@ -1,3 +1,4 @@
+import json
 import pytest
 import asyncio
 from fastapi.testclient import TestClient
@@ -9,6 +10,11 @@ from backend.main import app
 from backend.database import get_db
 from backend.db_models import Base, UserDB, LeaderboardDB, LivePlayerDB
 from backend.models import GameMode
+from backend.ranking import rank_index
+from backend.period_boards import period_boards
+from backend.cache import leaderboard_cache
+from backend.live_sim import live_sim
+from backend.snake_codec import decode_player, encode_snake
 
 # Use in-memory SQLite for tests
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -40,7 +46,7 @@ def client():
             ))
             session.add(LivePlayerDB(
                 id="live1", username="LivePlayer1", score=100, mode="walls", 
-                snake=[{"x": 10, "y": 10}], food={"x": 5, "y": 5}, direction="RIGHT", viewers=10
+                snake=encode_snake([(10, 10)]), food={"x": 5, "y": 5}, direction="RIGHT"
             ))
             await session.commit()
 
@@ -50,6 +56,11 @@ def client():
     loop.run_until_complete(init_test_db())
     
     with TestClient(app) as c:
+        # Startup warmed the index from the app database; rebuild it from the test one
+        rank_index.clear()
+        period_boards.clear()
+        leaderboard_cache.clear()
+        live_sim.clear()
         yield c
     
     loop.close()
@@ -104,3 +115,48 @@ def test_live_players(client):
     data = response.json()
     assert data["success"] is True
     assert len(data["data"]) > 0
+
+def test_live_player_binary(client):
+    player = client.get("/live/players/live1").json()["data"]
+
+    response = client.get("/live/players/live1", headers={"Accept": "application/octet-stream"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    decoded = decode_player(response.content)
+    assert decoded["id"] == player["id"]
+    assert decoded["username"] == player["username"]
+    assert decoded["mode"] == player["mode"]
+    assert len(response.content) < len(json.dumps(player))
+
+def test_live_player_stream(client):
+    with client.websocket_connect("/live/players/live1/stream") as ws:
+        key = ws.receive_json(mode="binary")
+        assert key["type"] == "key"
+        assert key["player"]["id"] == "live1"
+        # The simulation may already have moved the one-segment seeded snake
+        assert len(key["player"]["snake"]) == 1
+        assert key["player"]["viewers"] == 1
+
+        frame = ws.receive_json(mode="binary")
+        assert frame["type"] in ("delta", "key")
+        assert frame["seq"] == key["seq"] + 1
+
+def test_live_lobby_stream(client):
+    with client.websocket_connect("/live/players/stream") as ws:
+        key = ws.receive_json(mode="binary")
+        assert key["type"] == "key"
+        assert [p["id"] for p in key["players"]] == ["live1"]
+
+        tick = ws.receive_json(mode="binary")
+        assert tick["type"] == "tick"
+        assert len(tick["frames"]) == 1
+
+def test_metrics_endpoint(client):
+    response = client.get("/leaderboard")
+    assert "server-timing" in response.headers
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/leaderboard"}' in response.text
+    assert "event_loop_lag_seconds_count" in response.text
@@ -0,0 +1,111 @@
+import asyncio
+import os
+
+import pytest
+
+from backend.backplane import (ChunkAssembler, LocalBackplane, LocalBus, SocketBackplane, create_backplane,
+                               notify_chunks, pack_envelope, unpack_envelope)
+
+
+def test_envelope_round_trip():
+    envelope = pack_envelope("w1", "live.frames", b"\x00\xffdata")
+    assert unpack_envelope(envelope) == ("w1", "live.frames", b"\x00\xffdata")
+
+
+def test_notify_chunks_reassemble_in_order():
+    envelope = pack_envelope("w1", "scores", os.urandom(20000))
+    chunks = notify_chunks("w1", 5, envelope, size=4000)
+    assert len(chunks) > 1
+    assert all(len(chunk) < 8000 for chunk in chunks)
+
+    assembler = ChunkAssembler()
+    results = [assembler.add(chunk) for chunk in chunks]
+    assert results[:-1] == [None] * (len(chunks) - 1)
+    assert results[-1] == ("w1", envelope)
+
+    # A message with a chunk missing is dropped, and the next one still gets through
+    assert [assembler.add(chunk) for chunk in chunks[:1] + chunks[2:]] == [None] * (len(chunks) - 1)
+    assert assembler.add(notify_chunks("w1", 6, b"short")[0]) == ("w1", b"short")
+
+
+def test_local_backplane_delivers_to_the_others_and_hands_over_leadership():
+    async def run():
+        bus = LocalBus()
+        first, second = LocalBackplane(bus), LocalBackplane(bus)
+        got = {"first": [], "second": []}
+        first.subscribe("ch", got["first"].append)
+        second.subscribe("ch", got["second"].append)
+        promoted = []
+
+        async def promote():
+            promoted.append(second.worker_id)
+
+        second.on_promote(promote)
+        await first.start()
+        await second.start()
+        assert first.leader and not second.leader
+
+        first.publish("ch", b"hello")
+        await asyncio.sleep(0)
+        assert got == {"first": [], "second": [b"hello"]}
+
+        await first.stop()
+        assert second.leader and promoted == [second.worker_id]
+        await second.stop()
+
+    asyncio.run(run())
+
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_socket_backplane_relays_between_workers_and_fails_over(tmp_path):
+    async def run():
+        path = str(tmp_path / "bp.sock")
+        workers = [SocketBackplane(path, retry=0.1) for _ in range(3)]
+        got = [[] for _ in workers]
+        for worker, inbox in zip(workers, got):
+            worker.subscribe("ch", inbox.append)
+        promoted = []
+        for worker in workers[1:]:
+            async def promote(worker=worker):
+                promoted.append(worker.worker_id)
+            worker.on_promote(promote)
+
+        for worker in workers:
+            await worker.start()
+        assert [worker.leader for worker in workers] == [True, False, False]
+        await wait_for(lambda: len(workers[0]._peers) == 2)
+
+        # Through the broker, from a follower to everyone else
+        workers[1].publish("ch", b"from follower")
+        workers[0].publish("ch", b"from leader")
+        await wait_for(lambda: len(got[2]) == 2 and got[0] and got[1])
+        assert got[:2] == [[b"from follower"], [b"from leader"]]
+        assert sorted(got[2]) == [b"from follower", b"from leader"]
+
+        await workers[0].stop()
+        await wait_for(lambda: len(promoted) == 1)
+        new_leader = next(worker for worker in workers[1:] if worker.leader)
+        other = next(worker for worker in workers[1:] if not worker.leader)
+        await wait_for(lambda: len(new_leader._peers) == 1)
+        new_leader.publish("ch", b"after failover")
+        await wait_for(lambda: got[workers.index(other)][-1:] == [b"after failover"])
+
+        for worker in workers[1:]:
+            await worker.stop()
+        assert not os.path.exists(path)
+
+    asyncio.run(run())
+
+
+def test_create_backplane():
+    assert isinstance(create_backplane("local"), LocalBackplane)
+    with pytest.raises(ValueError):
+        create_backplane("postgres", "sqlite+aiosqlite:///./serpent.db")
+    with pytest.raises(ValueError):
+        create_backplane("carrier-pigeon")
@@ -0,0 +1,75 @@
+import json
+import random
+
+import numpy as np
+
+from backend.batch_sim import DIRECTIONS, DIRECTION_INDEX, BatchSimulator
+from backend.engine import SnakeEngine
+from backend.live_sim import LiveSimulation
+from backend.live_store import LiveGame
+
+from .test_live_sim import apply_frame
+
+
+def test_matches_the_engine_rules():
+    rng = random.Random(5)
+    batch = BatchSimulator(capacity=2, seed=5)
+    engines = []
+    for i in range(8):
+        mode = "walls" if i % 2 else "pass-through"
+        engine = SnakeEngine(mode=mode, seed=i)
+        batch.add(list(engine.body), engine.direction, mode, engine.food)
+        engines.append(engine)
+
+    for _ in range(500):
+        directions = [rng.choice(DIRECTIONS) for _ in engines]
+        result = batch.step(np.array([DIRECTION_INDEX[d] for d in directions], dtype=np.int8))
+        for slot, (engine, direction) in enumerate(zip(engines, directions)):
+            engine.turn(direction)
+            step = engine.step()
+            assert bool(result.dead[slot]) == step.dead
+            assert bool(result.ate[slot]) == step.ate
+            if step.dead:
+                engine.reset(food=batch.food_at(slot))
+            elif step.ate:
+                # Food respawns from a different RNG; follow the batch
+                engine.food = batch.food_at(slot)
+            assert batch.snake(slot) == list(engine.body)
+            assert int(batch.score[slot]) == engine.score
+            assert DIRECTIONS[batch.direction[slot]] == engine.direction
+            assert not batch.occupied[slot].ravel()[batch.food[slot, 1] * batch.size + batch.food[slot, 0]]
+
+
+def test_remove_moves_the_last_board_into_the_gap():
+    batch = BatchSimulator()
+    for x in range(3):
+        batch.add([(x, 0)], "DOWN", "walls", food=(x, 5))
+    assert batch.remove(0) == 2
+    assert batch.count == 2
+    assert batch.snake(0) == [(2, 0)]
+    assert batch.remove(1) is None
+    assert batch.snake(0) == [(2, 0)]
+
+
+def test_lobby_frames_reconstruct_every_game():
+    sim = LiveSimulation()
+    for i in range(6):
+        sim.add_game(LiveGame(
+            id=f"g{i}", username="Bot", score=0, mode="walls" if i % 2 else "pass-through",
+            snake=[(10, 10), (9, 10), (8, 10)], food=(15, 10), direction="RIGHT", seed=i,
+        ))
+    lobby = sim.subscribe_lobby()
+    _, key = sim.lobby_keyframe()
+    states = {p["id"]: p for p in json.loads(key)["players"]}
+
+    for _ in range(300):
+        sim.step()
+        _, payload = lobby._queue.get_nowait()
+        for frame in json.loads(payload)["frames"]:
+            game_id = frame["player"]["id"] if frame["type"] == "key" else frame["id"]
+            states[game_id] = apply_frame(states.get(game_id), frame)
+
+    for game_id, game in sim.games.items():
+        state = dict(states[game_id])
+        state["viewers"] = game.viewers
+        assert state == game.to_dict()
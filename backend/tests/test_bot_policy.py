@@ -0,0 +1,86 @@
+import numpy as np
+
+from backend.batch_sim import BatchSimulator
+from backend.bot_policy import BotPolicy, DistanceField, board_tables, room
+
+
+def test_incremental_field_matches_a_rebuild():
+    batch = BatchSimulator(seed=3)
+    for i in range(6):
+        batch.add([(10, 10), (9, 10), (8, 10)], "RIGHT", "walls" if i % 2 else "pass-through")
+    policy = BotPolicy(batch)
+
+    for _ in range(400):
+        result = batch.step(policy.directions())
+        policy.observe(result)
+        occupied = batch.occupied[:batch.count].reshape(batch.count, -1)
+        for slot, field in enumerate(policy._fields):
+            if field is None:
+                continue
+            fresh = DistanceField(field.neighbours)
+            fresh.rebuild(policy._food_cell(slot), occupied[slot].tobytes())
+            assert field.dist == fresh.dist
+
+
+def test_bots_reach_food_and_avoid_traps():
+    batch = BatchSimulator(seed=1)
+    for i in range(20):
+        batch.add([(10, 10), (9, 10), (8, 10)], "RIGHT", "walls" if i % 2 else "pass-through")
+    policy = BotPolicy(batch)
+    deaths = 0
+    for _ in range(300):
+        result = batch.step(policy.directions())
+        policy.observe(result)
+        deaths += int(result.dead.sum())
+    assert batch.score[:batch.count].min() >= 100
+    # The old random-walk bots crash within a few dozen moves; these rarely do
+    assert deaths <= 2
+
+
+def test_room_counts_up_to_the_limit():
+    neighbours, _ = board_tables(4, False)
+    occupied = bytearray(16)
+    for cell in (1, 5, 9, 13):  # a wall splitting the board into 4 and 8 cells
+        occupied[cell] = 1
+    assert room(0, bytes(occupied), neighbours, 100) == 4
+    assert room(2, bytes(occupied), neighbours, 100) == 8
+    assert room(2, bytes(occupied), neighbours, 3) == 3
+
+
+def test_removing_a_board_keeps_fields_aligned():
+    batch = BatchSimulator(seed=2)
+    for x in (2, 10, 17):
+        batch.add([(x, 5)], "DOWN", "walls", food=(x, 15))
+    policy = BotPolicy(batch)
+    policy.directions()
+    middle, last = policy._fields[1], policy._fields[2]
+    policy.remove(0, batch.remove(0))
+    # The last board moved into the freed slot, as in the batch
+    assert len(policy._fields) == 2
+    assert policy._fields[0] is last
+    assert policy._fields[1] is middle
+    assert np.array_equal(policy.directions(), [1, 1])
+
+
+def test_greedy_steps_never_enter_walls_or_bodies():
+    batch = BatchSimulator(seed=4)
+    # Heading into the left wall with food straight above and its own body below
+    batch.add([(0, 5), (1, 5), (1, 6), (0, 6)], "LEFT", "walls", food=(0, 0))
+    batch.add([(0, 5), (1, 5)], "LEFT", "pass-through", food=(19, 5))
+    assert BotPolicy(batch).greedy().tolist() == [0, 2]  # UP; LEFT wraps to the food
+
+
+def test_planning_is_bounded_per_tick():
+    batch = BatchSimulator(seed=5)
+    for i in range(10):
+        batch.add([(10, 10), (9, 10), (8, 10)], "RIGHT", "walls" if i % 2 else "pass-through")
+    policy = BotPolicy(batch, max_planned=2, max_fills=3)
+
+    for _ in range(50):
+        fills = policy.fills
+        policy.observe(batch.step(policy.directions([7, 1, 4])))
+        assert policy.fills - fills <= 3
+        assert [slot for slot, field in enumerate(policy._fields) if field is not None] in ([1, 4], [1], [4], [])
+    # Dropped from the plan, so no field is patched for them any more
+    policy.directions([])
+    assert policy._fields == [None] * 10
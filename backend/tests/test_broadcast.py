@@ -0,0 +1,83 @@
+import asyncio
+
+from backend.broadcast import BroadcastHub, RESYNC, CLOSED
+from backend.live_sim import LiveSimulation, LOBBY
+from backend.live_store import LiveGame
+
+
+def make_game(game_id="g1"):
+    return LiveGame(
+        id=game_id, username="Bot", score=0, mode="pass-through",
+        snake=[(10, 10), (9, 10), (8, 10)], food=(15, 10), direction="RIGHT", viewers=0, seed=7,
+    )
+
+
+def drain(sub):
+    async def _drain():
+        items = []
+        while not sub._queue.empty():
+            items.append(await sub.get())
+        return items
+    return asyncio.run(_drain())
+
+
+def test_publish_fans_out_and_counts_viewers():
+    hub = BroadcastHub(queue_size=4)
+    a = hub.subscribe("g1")
+    b = hub.subscribe("g1")
+    assert hub.viewers("g1") == 2
+
+    hub.publish("g1", 1, b"frame")
+    assert drain(a) == [(1, b"frame")]
+    assert drain(b) == [(1, b"frame")]
+
+    hub.unsubscribe(a)
+    hub.unsubscribe(b)
+    assert hub.viewers("g1") == 0
+    assert not hub.has_subscribers("g1")
+
+
+def test_slow_consumer_is_coalesced_into_resync():
+    hub = BroadcastHub(queue_size=2)
+    slow = hub.subscribe("g1")
+    for seq in range(1, 6):
+        hub.publish("g1", seq, b"x")
+
+    items = drain(slow)
+    # The backlog never grows past the bound, and the gap is flagged for a keyframe
+    assert len(items) <= 2
+    assert RESYNC in [payload for _, payload in items]
+    assert hub.stats()["dropped"] > 0
+
+
+def test_close_notifies_subscribers():
+    hub = BroadcastHub(queue_size=1)
+    sub = hub.subscribe("g1")
+    hub.publish("g1", 1, b"x")
+    hub.close("g1")
+    assert drain(sub) == [(0, CLOSED)]
+
+
+def test_simulation_encodes_each_frame_once():
+    sim = LiveSimulation()
+    sim.add_game(make_game("g1"))
+    sim.add_game(make_game("g2"))
+    sim.step()
+
+    a = sim.subscribe("g1")
+    b = sim.subscribe("g1")
+    lobby = sim.subscribe_lobby()
+    assert sim.games["g1"].viewers == 2
+
+    sim.step()
+    (_, frame_a), = drain(a)
+    (_, frame_b), = drain(b)
+    (_, lobby_frame), = drain(lobby)
+    assert frame_a is frame_b
+    assert frame_a in lobby_frame
+    # g2 has no viewers of its own but still appears in the lobby frame
+    assert b'"id":"g2"' in lobby_frame
+
+    sim.unsubscribe(a)
+    assert sim.games["g1"].viewers == 1
+    assert sim.hub.viewers(LOBBY) == 1
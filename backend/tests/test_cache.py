@@ -0,0 +1,82 @@
+import time
+
+from backend.cache import ResponseCache, TTLCache, etag_matches
+
+
+def test_hit_miss_and_lru_eviction():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    assert cache.get("a") is None
+
+    cache.put("a", b"1", "walls", cache.generation("walls"))
+    cache.put("b", b"2", "walls", cache.generation("walls"))
+    assert cache.get("a").body == b"1"  # "a" is now most recent
+
+    cache.put("c", b"3", "walls", cache.generation("walls"))
+    assert cache.get("b") is None
+    assert cache.get("c").body == b"3"
+    assert cache.stats()["evictions"] == 1
+    assert cache.hits == 2
+    assert cache.misses == 2
+
+
+def test_invalidation_only_drops_affected_mode_and_unfiltered():
+    cache = ResponseCache()
+    cache.put("walls", b"w", "walls", cache.generation("walls"))
+    cache.put("pass", b"p", "pass-through", cache.generation("pass-through"))
+    cache.put("all", b"*", None, cache.generation(None))
+
+    cache.invalidate("walls")
+
+    assert cache.get("walls") is None
+    assert cache.get("all") is None
+    assert cache.get("pass").body == b"p"
+
+
+def test_put_with_stale_generation_is_not_stored():
+    cache = ResponseCache()
+    generation = cache.generation("walls")
+    cache.invalidate("walls")  # a write landed while the page was being built
+
+    entry = cache.put("walls", b"old", "walls", generation)
+    assert entry.body == b"old"
+    assert cache.get("walls") is None
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl=0.01)
+    cache.put("k", b"v", None, cache.generation(None))
+    time.sleep(0.02)
+    assert cache.get("k") is None
+
+
+def test_per_entry_ttl_only_shortens():
+    cache = ResponseCache(ttl=60)
+    cache.put("short", b"v", None, cache.generation(None), ttl=0.01)
+    cache.put("long", b"v", None, cache.generation(None), ttl=3600)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache._entries["long"].expires_at <= time.monotonic() + 60
+
+
+def test_ttl_cache_lru_and_per_entry_ttl():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # Evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("missing", False) is False
+
+    cache.put("short", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert len(cache) == 1  # Expired entries are dropped when read
+
+
+def test_etag_matching():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abd"', etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from sqlalchemy import exc, text
+
+from backend.db_engine import MeteredPool, build_engine, engine_options, pool_stats
+
+
+def test_engine_options_by_backend():
+    memory = engine_options("sqlite+aiosqlite:///:memory:")
+    assert memory == {"echo": False}
+
+    sqlite = engine_options("sqlite+aiosqlite:///./serpent.db")
+    assert sqlite["poolclass"] is MeteredPool
+    assert "connect_args" not in sqlite
+
+    postgres = engine_options("postgresql+asyncpg://u:p@db/serpent")
+    assert postgres["pool_pre_ping"] is True
+    assert postgres["connect_args"]["prepared_statement_cache_size"] == postgres["connect_args"]["statement_cache_size"]
+
+
+def test_sqlite_file_uses_wal(tmp_path):
+    async def run():
+        engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'wal.db'}")
+        try:
+            async with engine.connect() as conn:
+                mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+                sync = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+            return mode, sync
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(run()) == ("wal", 1)  # 1 is NORMAL
+
+
+def test_pool_stats_track_saturation_and_timeouts(tmp_path, monkeypatch):
+    monkeypatch.setattr("backend.db_engine.DB_POOL_SIZE", 1)
+    monkeypatch.setattr("backend.db_engine.DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr("backend.db_engine.DB_POOL_TIMEOUT", 0.05)
+
+    async def run():
+        engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+        try:
+            async with engine.connect():
+                held = pool_stats(engine)
+                with pytest.raises(exc.TimeoutError):
+                    async with engine.connect():
+                        pass
+            return held, pool_stats(engine)
+        finally:
+            await engine.dispose()
+
+    held, after = asyncio.run(run())
+    assert held["capacity"] == 1
+    assert held["saturation"] == 1.0
+    assert after["saturation"] == 0.0
+    assert after["checkouts"] == 1
+    assert after["timeouts"] == 1
+    assert after["waitSecondsTotal"] <= after["waitSecondsMax"] + 1e-9
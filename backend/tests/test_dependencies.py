@@ -0,0 +1,28 @@
+import re
+import tomllib
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def _requirements(entries):
+    return {re.split(r"[<>=!~ \[;]", entry, 1)[0].lower(): entry for entry in entries}
+
+
+def test_lock_matches_pyproject():
+    # The Dockerfiles run `uv sync --frozen`, which installs from the lock and ignores pyproject
+    project = tomllib.loads((BACKEND / "pyproject.toml").read_text())["project"]
+    lock = tomllib.loads((BACKEND / "uv.lock").read_text())
+    backend = next(package for package in lock["package"] if package["name"] == "backend")
+    locked = {req["name"]: req["name"] + req.get("specifier", "") for req in backend["metadata"]["requires-dist"]}
+    assert locked == _requirements(project["dependencies"])
+
+    resolved = {package["name"] for package in lock["package"]}
+    assert set(locked) <= resolved
+
+
+def test_websocket_routes_have_a_server_implementation():
+    # uvicorn only speaks WebSocket with websockets or wsproto installed; without either it answers 404
+    assert any("@router.websocket(" in path.read_text() for path in (BACKEND / "routers").glob("*.py"))
+    project = tomllib.loads((BACKEND / "pyproject.toml").read_text())["project"]
+    assert {"websockets", "wsproto"} & set(_requirements(project["dependencies"]))
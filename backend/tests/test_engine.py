@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from backend.engine import BOARD_SIZE, INITIAL_SPEED, MIN_SPEED, SnakeEngine, TickScheduler
+
+
+def test_walls_kill_and_pass_through_wraps():
+    engine = SnakeEngine(mode="walls", snake=[(BOARD_SIZE - 1, 5)], food=(0, 0))
+    assert engine.step().dead
+    assert not engine.alive
+
+    engine = SnakeEngine(mode="pass-through", snake=[(BOARD_SIZE - 1, 5)], food=(0, 0))
+    result = engine.step()
+    assert not result.dead
+    assert result.head == (0, 5)
+    assert result.tail == (BOARD_SIZE - 1, 5)
+
+
+def test_moving_into_own_tail_is_fatal():
+    # As in the browser, the tail cell still counts as occupied on the move that would free it
+    engine = SnakeEngine(snake=[(1, 1), (1, 0), (0, 0), (0, 1)], direction="LEFT", food=(9, 9))
+    assert engine.step().dead
+
+
+def test_reverse_turns_are_ignored():
+    engine = SnakeEngine(food=(0, 0))
+    assert not engine.turn("LEFT")
+    assert engine.direction == "RIGHT"
+    assert engine.turn("UP")
+    assert engine.next_head() == (10, 9)
+
+
+def test_eating_grows_scores_and_speeds_up():
+    engine = SnakeEngine(food=(11, 10), seed=3)
+    result = engine.step()
+    assert result.ate and result.tail is None
+    assert len(engine.body) == 4
+    assert engine.score == 10
+    assert engine.speed == INITIAL_SPEED - 5
+
+    engine.speed = MIN_SPEED
+    engine.food = engine.next_head()
+    engine.step()
+    assert engine.speed == MIN_SPEED
+
+
+def test_food_and_free_cells_track_the_body():
+    engine = SnakeEngine(mode="pass-through", seed=7)
+    for i in range(3000):
+        engine.turn(engine.rng.choice(["UP", "DOWN", "LEFT", "RIGHT"]))
+        if not engine.is_safe(engine.next_head()):
+            engine.reset()
+        if i % 4 == 0:
+            # Feed the snake now and then so it keeps growing
+            engine.food = engine.next_head()
+        assert not engine.step().dead
+
+        cells = set(engine.body)
+        assert len(cells) == len(engine.body)
+        assert engine.free_cells == BOARD_SIZE * BOARD_SIZE - len(cells)
+        assert engine.food not in cells
+        assert all(engine.is_occupied(cell) for cell in cells)
+
+
+def test_food_is_none_when_the_board_is_full():
+    engine = SnakeEngine(snake=[(0, 0), (1, 0), (1, 1)], direction="LEFT", size=2)
+    assert engine.food == (0, 1)
+    engine.turn("DOWN")
+    assert engine.step().ate
+    assert engine.food is None
+    assert engine.free_cells == 0
+
+
+def test_food_can_be_left_off_without_drawing_from_the_rng():
+    engine = SnakeEngine(seed=3, place_food=False)
+    assert engine.food is None
+    engine.reset(food=None, place_food=False)
+    assert engine.food is None
+    # The stream is where a fresh engine's would be
+    assert engine.rng.random() == SnakeEngine(seed=3, place_food=False).rng.random()
+
+
+def test_scheduler_skips_missed_ticks():
+    def tick():
+        if scheduler.ticks == 2:
+            time.sleep(0.05)
+
+    async def run():
+        scheduler.start()
+        await asyncio.sleep(0.15)
+        await scheduler.stop()
+
+    scheduler = TickScheduler(0.01, tick)
+    asyncio.run(run())
+    assert scheduler.ticks > 3
+    assert scheduler.overruns >= 3
+    assert not scheduler.running
@@ -0,0 +1,45 @@
+from typing import List
+
+from backend.fast_json import leaderboard_entries, list_response, live_player, paged_response
+from backend.live_store import LiveGame
+from backend.models import ApiResponse, LeaderboardEntry, LivePlayer, PagedApiResponse
+from backend.ranking import rank_index
+from backend.routers.live import _to_player
+
+# Quotes, backslashes, control characters, non-ASCII and astral code points
+AWKWARD = 'q"b\\s/\x00\x1f\x7f\n\té😀'
+
+
+def test_leaderboard_page_matches_pydantic():
+    rank_index.clear()
+    rows = [("1", "alice", 300, "walls", "2024-01-01"), ("2", AWKWARD, 100, "walls", AWKWARD),
+            ("3", "bob", 50, "pass-through", "2024-01-02")]
+    for _, _, score, mode, _ in rows:
+        rank_index.add(mode, score)
+    entries = [
+        LeaderboardEntry(id=id, rank=rank_index.rank(mode, score), username=username, score=score,
+                         mode=mode, date=date)
+        for id, username, score, mode, date in rows
+    ]
+
+    for cursor in (None, "abc_-"):
+        expected = PagedApiResponse[List[LeaderboardEntry]](success=True, data=entries, nextCursor=cursor)
+        assert paged_response(leaderboard_entries(rows), cursor) == expected.model_dump_json().encode()
+
+    empty = PagedApiResponse[List[LeaderboardEntry]](success=True, data=[])
+    assert paged_response(leaderboard_entries([]), None) == empty.model_dump_json().encode()
+    rank_index.clear()
+
+
+def test_live_players_match_pydantic():
+    games = [
+        LiveGame(id="g1", username=AWKWARD, score=70, mode="walls", snake=[(5, 5), (4, 5), (3, 5)],
+                 food=(0, 19), direction="RIGHT", viewers=4),
+        LiveGame(id="g2", username="bot", score=0, mode="pass-through", snake=[(1, 1)],
+                 food=(2, 2), direction="UP"),
+    ]
+    expected = ApiResponse[List[LivePlayer]](success=True, data=[_to_player(g) for g in games])
+    assert list_response(",".join(live_player(g) for g in games)) == expected.model_dump_json().encode()
+
+    empty = ApiResponse[List[LivePlayer]](success=True, data=[])
+    assert list_response("") == empty.model_dump_json().encode()
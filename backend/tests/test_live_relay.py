@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+from backend.backplane import LocalBackplane, LocalBus
+from backend.broadcast import CLOSED
+from backend.live_relay import FULL, TICK, decode_batch, encode_batch
+from backend import live_sim
+from backend.live_sim import LiveSimulation
+from backend.live_store import LiveGame, LiveStore
+
+
+def make_game(game_id):
+    return LiveGame(
+        id=game_id, username=f"Bot {game_id}", score=0, mode="pass-through",
+        snake=[(10, 10), (9, 10), (8, 10)], food=(15, 10), direction="RIGHT", viewers=0, seed=7,
+    )
+
+
+def make_sim(bus):
+    sim = LiveSimulation(store=LiveStore())
+    backplane = LocalBackplane(bus)
+    sim.attach(backplane)
+    return sim, backplane
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_batch_round_trip():
+    records = [("g1", 7, True, b'{"type":"key"}'), ("gé", 8, False, b"")]
+    assert decode_batch(encode_batch(TICK, 42, records, ["gone"])) == (TICK, 42, ["gone"], records)
+    assert decode_batch(encode_batch(FULL, 0, [])) == (FULL, 0, [], [])
+
+
+def test_follower_mirrors_the_leader(monkeypatch):
+    monkeypatch.setattr(live_sim, "VIEWER_REPORT_INTERVAL", 0.01)
+
+    async def run():
+        bus = LocalBus()
+        leader, leader_bp = make_sim(bus)
+        follower, follower_bp = make_sim(bus)
+        for game_id in ("g1", "g2", "g3"):
+            leader.add_game(make_game(game_id))
+        leader.step()
+        await leader_bp.start()
+        await follower_bp.start()
+        assert leader_bp.leader and not follower_bp.leader
+
+        follower.follow()
+        await settle()
+        assert set(follower.games) == {"g1", "g2", "g3"}
+
+        for _ in range(30):
+            leader.step()
+        await settle()
+        sub = follower.subscribe("g1")
+        lobby = follower.subscribe_lobby()
+        leader.step()
+        leader.remove_game("g3")
+        leader.step()
+        await settle()
+
+        for game_id in ("g1", "g2"):
+            assert follower.games[game_id].to_dict() == leader.games[game_id].to_dict()
+        assert "g3" not in follower.games
+        assert follower.tick_count == leader.tick_count
+
+        # The follower's viewers get the leader's frame bytes as they are
+        frames = []
+        while not sub._queue.empty():
+            frames.append(await sub.get())
+        assert frames[-1] == (leader.games["g1"].seq, leader.games["g1"].frame_bytes())
+        lobby_frame = json.loads((await lobby.get())[1])
+        assert lobby_frame["type"] == "tick"
+
+        # Viewers on the follower count on the leader once reported
+        await asyncio.sleep(0.05)
+        assert leader.games["g1"].viewers == 1
+        assert leader.viewers("g1") == 1
+        follower.unsubscribe(sub)
+        follower.unsubscribe(lobby)
+        await follower.stop()
+        await leader_bp.stop()
+        await follower_bp.stop()
+
+    asyncio.run(run())
+
+
+def test_missed_batch_triggers_full_sync():
+    async def run():
+        bus = LocalBus()
+        leader, leader_bp = make_sim(bus)
+        follower, follower_bp = make_sim(bus)
+        leader.add_game(make_game("g1"))
+        await leader_bp.start()
+        await follower_bp.start()
+        follower.follow()
+        await settle()
+
+        # As if a batch went missing: the next one no longer lines up
+        leader.step()
+        await settle()
+        follower.tick_count -= 1
+        follower._sync_requested_at = 0
+        leader.step()
+        await settle()
+        leader.step()
+        await settle()
+        assert follower.games["g1"].to_dict() == leader.games["g1"].to_dict()
+        assert follower.tick_count == leader.tick_count
+        await follower.stop()
+
+    asyncio.run(run())
+
+
+def test_follower_takes_over_from_its_mirror():
+    async def run():
+        bus = LocalBus()
+        leader, leader_bp = make_sim(bus)
+        follower, follower_bp = make_sim(bus)
+        leader.add_game(make_game("g1"))
+        await leader_bp.start()
+        await follower_bp.start()
+        follower_bp.on_promote(follower.lead)
+        follower.follow()
+        await settle()
+        for _ in range(5):
+            leader.step()
+        await settle()
+        before = leader.games["g1"].to_dict()
+
+        await leader_bp.stop()
+        assert follower_bp.leader and not follower.following
+        assert follower.games["g1"].to_dict() == before
+        sub = follower.subscribe("g1")
+        follower.step()
+        seq, _ = await sub.get()
+        assert seq == follower.tick_count
+        follower.remove_game("g1")
+        assert (await sub.get())[1] is CLOSED
+        await follower.stop()
+
+    asyncio.run(run())
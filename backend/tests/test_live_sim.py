@@ -0,0 +1,61 @@
+from backend.engine import BOARD_SIZE
+from backend.benchmarks.batch_sim import tick_game
+from backend.live_store import LiveGame
+
+
+def apply_frame(state, frame):
+    """Reference client: rebuild a player from a keyframe plus deltas."""
+    if frame["type"] == "key":
+        return {**frame["player"], "snake": list(frame["player"]["snake"])}
+    state = {**state, "snake": [frame["head"]] + state["snake"]}
+    if frame["tailRemoved"]:
+        state["snake"].pop()
+    if "food" in frame:
+        state["food"] = frame["food"]
+    state["score"] += frame.get("scoreDelta", 0)
+    if "direction" in frame:
+        state["direction"] = frame["direction"]
+    return state
+
+
+def make_game(mode="walls", seed=1, snake=((10, 10), (9, 10), (8, 10)), food=(15, 10)):
+    return LiveGame(
+        id="g1", username="Bot", score=0, mode=mode,
+        snake=snake, food=food, direction="RIGHT", viewers=0, seed=seed,
+    )
+
+
+def test_deltas_reconstruct_full_state():
+    for mode in ("walls", "pass-through"):
+        game = make_game(mode)
+        state = apply_frame(None, game.keyframe())
+        for _ in range(2000):
+            seq = game.seq
+            tick_game(game)
+            state = apply_frame(state, game.frame_since(seq))
+            assert state == game.to_dict()
+
+
+def test_pass_through_wraps_and_walls_reset():
+    game = make_game("pass-through")
+    for _ in range(500):
+        tick_game(game)
+        x, y = game.body.head()
+        assert 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE
+
+    # Food past the edge lures the bot into the wall
+    game = make_game("walls", snake=[(BOARD_SIZE - 1, 10), (BOARD_SIZE - 2, 10)], food=(BOARD_SIZE + 5, 10))
+    for _ in range(200):
+        if tick_game(game) is None:
+            break
+    assert list(game.body) == [(10, 10), (9, 10), (8, 10)]
+    assert game.score == 0
+
+
+def test_lagging_viewer_gets_keyframe():
+    game = make_game()
+    seq = game.seq
+    tick_game(game)
+    tick_game(game)
+    assert game.frame_since(seq)["type"] == "key"
+    assert game.frame_since(game.seq)["type"] == "key"
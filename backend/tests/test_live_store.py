@@ -0,0 +1,39 @@
+import sys
+
+from backend.engine import SnakeBody
+from backend.live_store import LiveGame
+
+
+def test_ring_buffer_moves_and_grows():
+    body = SnakeBody([(3, 0), (2, 0), (1, 0)], capacity=4)
+    assert list(body) == [(3, 0), (2, 0), (1, 0)]
+
+    body.push_head((4, 0))
+    assert body.pop_tail() == (1, 0)
+    assert body.head() == (4, 0)
+
+    # Eating without popping the tail grows past the initial capacity
+    for x in range(5, 40):
+        body.push_head((x, 0))
+    assert len(body) == 38
+    assert list(body)[:2] == [(39, 0), (38, 0)]
+    assert list(body)[-1] == (2, 0)
+
+    body.reset([(10, 10)])
+    assert list(body) == [(10, 10)]
+
+
+def test_ring_buffer_wraps_around():
+    body = SnakeBody([(0, 1), (0, 0)], capacity=4)
+    for step in range(2, 50):
+        body.push_head((0, step))
+        body.pop_tail()
+        assert list(body) == [(0, step), (0, step - 1)]
+
+
+def test_records_are_compact():
+    game = LiveGame(id="g", username="u", score=0, mode="walls",
+                    snake=[(x, 0) for x in range(100)], food=(0, 1), direction="RIGHT")
+    assert not hasattr(game, "__dict__")
+    # Two shorts per segment rather than a tuple of ints per segment
+    assert sys.getsizeof(game.body._cells) < 100 * 4 * 2 + 128
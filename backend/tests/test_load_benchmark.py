@@ -0,0 +1,24 @@
+from backend.benchmarks.load import compare, summarize
+
+
+def _report(p95: float, rps: float):
+    stats = {"requests": 100, "errors": 0, "rps": rps, "p50_ms": 1.0, "p95_ms": p95, "p99_ms": p95, "max_ms": p95}
+    return {"transports": {"asgi": {"total": stats, "endpoints": {"leaderboard": stats}}}}
+
+
+def test_summarize_reports_percentiles():
+    stats = summarize([i / 1000 for i in range(1, 101)], errors=2, elapsed=2.0)
+    assert stats["requests"] == 100
+    assert stats["rps"] == 50.0
+    assert stats["p50_ms"] == 51.0
+    assert stats["p99_ms"] == 100.0
+    assert stats["errors"] == 2
+
+
+def test_compare_flags_slower_endpoints_only():
+    baseline = _report(p95=10.0, rps=100.0)
+    assert compare(_report(p95=11.0, rps=90.0), baseline, tolerance=0.25) == []
+    regressions = compare(_report(p95=20.0, rps=50.0), baseline, tolerance=0.25)
+    assert regressions == ["asgi leaderboard: p95 10.0ms -> 20.0ms", "asgi leaderboard: 100.0 -> 50.0 req/s"]
+    # Transports missing from the baseline are not compared
+    assert compare({"transports": {"uvicorn": _report(20.0, 1.0)["transports"]["asgi"]}}, baseline, 0.25) == []
@@ -0,0 +1,55 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from backend.metrics import Histogram, MetricsMiddleware, instrument_engine, metrics
+
+
+def test_histogram_quantiles_and_rendering():
+    histogram = Histogram((0.1, 0.2, 0.4))
+    for value in (0.05, 0.15, 0.15, 0.3, 1.0):
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 0.1 + 0.1 * (2.5 - 1) / 2
+    assert histogram.quantile(0.99) == 0.4  # Beyond the last bucket
+    lines = histogram.render("t", 'route="/x"')
+    assert lines[0] == 't_bucket{route="/x",le="0.1"} 1'
+    assert lines[3] == 't_bucket{route="/x",le="+Inf"} 5'
+    assert lines[-1] == 't_count{route="/x"} 5'
+
+
+def test_requests_are_timed_with_their_queries(caplog):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, slow_ms=0)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT :id"), {"id": item_id})
+        return {"id": item_id}
+
+    metrics.clear()
+    with caplog.at_level(logging.WARNING, logger="backend.metrics"), TestClient(app) as client:
+        response = client.get("/items/7")
+        client.get("/items/8")
+        client.get("/nowhere")
+
+    assert response.headers["server-timing"].startswith("app;dur=")
+    assert 'desc="2 queries"' in response.headers["server-timing"]
+    assert metrics.queries == 4
+    assert metrics.latency[("GET", "/items/{item_id}")].count == 2
+    assert metrics.responses[("GET", "unmatched", 404)] == 1
+    assert metrics.slow_requests == 3
+    assert "SELECT 1" in caplog.records[0].getMessage()
+
+    rendered = metrics.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 2' in rendered
+    assert 'http_request_duration_quantile_seconds{method="GET",route="/items/{item_id}",quantile="0.99"}' in rendered
+    assert "db_queries_total 4" in rendered
+    metrics.clear()
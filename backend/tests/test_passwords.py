@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+from backend.passwords import HasherBusy, Passwords
+
+
+def fast_passwords(**kwargs) -> Passwords:
+    return Passwords(time_cost=1, memory_kib=1024, parallelism=1, **kwargs)
+
+
+def test_hash_and_verify_off_the_loop():
+    passwords = fast_passwords(workers=2)
+    loop_thread = threading.get_ident()
+    seen = []
+    verify = passwords._verify
+    passwords._verify = lambda *args: seen.append(threading.get_ident()) or verify(*args)
+
+    async def run():
+        stored = await passwords.hash("s3cret")
+        results = [await passwords.verify(stored, "s3cret"), await passwords.verify(stored, "wrong")]
+        await passwords.stop()
+        return stored, results
+
+    stored, results = asyncio.run(run())
+    assert stored.startswith("$argon2id$")
+    assert results == [(True, None), (False, None)]
+    assert seen and loop_thread not in seen
+
+
+def test_plaintext_and_outdated_hashes_are_upgraded():
+    passwords = fast_passwords()
+    old = Passwords(time_cost=1, memory_kib=512, parallelism=1).hasher.hash("s3cret")
+
+    async def run():
+        results = [
+            await passwords.verify("s3cret", "s3cret"),
+            await passwords.verify("s3cret", "other"),
+            await passwords.verify(old, "s3cret"),
+            await passwords.verify("$argon2id$garbage", "s3cret"),
+        ]
+        await passwords.stop()
+        return results
+
+    plain, wrong, outdated, garbage = asyncio.run(run())
+    assert plain[0] and plain[1].startswith("$argon2id$")
+    assert wrong == (False, None)
+    assert outdated[0] and "m=1024" in outdated[1]
+    assert garbage == (False, None)
+
+
+def test_sheds_load_beyond_max_pending():
+    passwords = fast_passwords(workers=1, max_pending=2)
+
+    async def run():
+        results = await asyncio.gather(*(passwords.hash("s3cret") for _ in range(4)), return_exceptions=True)
+        await passwords.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert sum(isinstance(r, HasherBusy) for r in results) == 2
+    assert passwords.pending == 0
+
+
+def test_unknown_accounts_cost_a_verification():
+    passwords = fast_passwords()
+    # Hashed up front, so the first miss costs no more than later ones
+    dummy = passwords._dummy
+    assert dummy.startswith("$argon2")
+    verified = []
+    verify = passwords._verify
+    passwords._verify = lambda *args: verified.append(args[0]) or verify(*args)
+
+    async def run():
+        results = [await passwords.verify_absent("s3cret"), await passwords.verify_absent("other")]
+        await passwords.stop()
+        return results
+
+    assert asyncio.run(run()) == [(False, None), (False, None)]
+    assert verified == [dummy, dummy]
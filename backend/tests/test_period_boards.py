@@ -0,0 +1,76 @@
+import random
+from datetime import date
+
+from backend.models import Period
+from backend.period_boards import PeriodBoards, TopK, period_start
+
+
+def row(entry_id, score, day="2026-10-14", mode="walls"):
+    return (entry_id, f"user-{entry_id}", score, mode, day)
+
+
+def test_top_k_keeps_the_best_entries_in_board_order():
+    rng = random.Random(3)
+    rows = [row(f"e{n:03}", rng.randrange(50)) for n in range(300)]
+    board = TopK(10, "2026-10-14")
+    for r in rows:
+        board.offer(r)
+
+    expected = sorted(rows, key=lambda r: (-r[2], r[0]))[:10]
+    assert [r[0] for r in board.ranked()] == [r[0] for r in expected]
+    assert len(board) == 10
+    # Already on the board
+    assert not board.offer(expected[0])
+
+
+def test_top_k_ranks_ties_together():
+    board = TopK(5, "")
+    for r in [row("a", 10), row("b", 30), row("c", 30), row("d", 20)]:
+        board.offer(r)
+    assert [(r[0], r[1]) for r in board.ranked()] == [("b", 1), ("c", 1), ("d", 3), ("a", 4)]
+
+
+def test_period_start():
+    wednesday = date(2026, 10, 14)
+    assert period_start(Period.DAY, wednesday) == "2026-10-14"
+    assert period_start(Period.WEEK, wednesday) == "2026-10-12"
+    assert period_start(Period.ALL, wednesday) == ""
+
+
+def test_boards_roll_over_at_period_boundaries():
+    today = [date(2026, 10, 18)]  # A Sunday
+    boards = PeriodBoards(size=3, today=lambda: today[0])
+    boards.add(row("sun", 10, "2026-10-18"))
+    boards.add(row("mon", 5, "2026-10-12"))
+    # From an earlier day: only the week and all-time boards take it
+    assert [r[0] for r in boards.top(Period.DAY, "walls", 10)] == ["sun"]
+    assert [r[0] for r in boards.top(Period.WEEK, "walls", 10)] == ["sun", "mon"]
+
+    today[0] = date(2026, 10, 19)
+    assert boards.top(Period.DAY, "walls", 10) == []
+    assert boards.top(Period.WEEK, "walls", 10) == []
+    assert [r[0] for r in boards.top(Period.ALL, "walls", 10)] == ["sun", "mon"]
+    assert boards.rollovers == 2
+
+    # A late arrival from the previous period does not reach the new boards
+    boards.add(row("late", 99, "2026-10-18"))
+    assert boards.top(Period.DAY, "walls", 10) == []
+    assert boards.top(Period.ALL, "walls", 1)[0][0] == "late"
+
+
+def test_top_without_a_mode_merges_the_boards():
+    boards = PeriodBoards(size=3, today=lambda: date(2026, 10, 14))
+    boards.add(row("w1", 10))
+    boards.add(row("w2", 30))
+    boards.add(row("p1", 20, mode="pass-through"))
+    assert [(r[0], r[1]) for r in boards.top(Period.DAY, None, 2)] == [("w2", 1), ("p1", 1)]
+
+
+def test_discard_takes_a_row_off_its_boards():
+    boards = PeriodBoards(size=3, today=lambda: date(2026, 10, 14))
+    for r in [row("a", 10), row("b", 30), row("c", 20)]:
+        boards.add(r)
+    boards.discard(row("b", 30))
+    assert [r[0] for r in boards.top(Period.WEEK, "walls", 10)] == ["c", "a"]
+    # Only the exact row goes, not another entry that shares its id
+    assert not boards.board(Period.DAY, "walls").discard(row("c", 99))
@@ -0,0 +1,107 @@
+import math
+import random
+
+import pytest
+
+from backend.engine import MAX_SCORE
+from backend.ranking import ScoreFenwick, RankIndex
+
+
+def test_rank_counts_strictly_higher_scores():
+    tree = ScoreFenwick(capacity=8)
+    for score in [100, 50, 50, 10]:
+        tree.add(score)
+
+    assert tree.total == 4
+    assert tree.rank(100) == 1
+    assert tree.rank(50) == 2  # ties share a rank
+    assert tree.rank(10) == 4
+    assert tree.rank(75) == 2
+    assert tree.rank(500) == 1
+
+
+def test_grows_past_initial_capacity():
+    tree = ScoreFenwick(capacity=4)
+    tree.add(3)
+    tree.add(2)
+    tree.add(3_000)
+
+    assert tree.count_at_most(3) == 2
+    assert tree.count_above(3) == 1
+    assert tree.rank(2) == 3
+    assert tree.score_at(1) == 3_000
+
+
+def test_score_at_walks_from_the_top():
+    tree = ScoreFenwick()
+    scores = [40, 990, 40, 0, 1200, 310]
+    for score in scores:
+        tree.add(score)
+
+    assert [tree.score_at(k) for k in range(1, len(scores) + 1)] == sorted(scores, reverse=True)
+    with pytest.raises(IndexError):
+        tree.score_at(len(scores) + 1)
+
+
+def test_remove_and_negative_scores():
+    tree = ScoreFenwick()
+    tree.add(20)
+    tree.add(20, -1)
+    assert tree.total == 0
+    assert tree.rank(20) == 1
+    with pytest.raises(ValueError):
+        tree.add(-5)
+
+
+def test_scores_above_the_cap_count_as_the_cap():
+    tree = ScoreFenwick()
+    # A legacy row from before submissions were capped must not size the tree by its score
+    tree.add(10**9)
+    tree.add(MAX_SCORE)
+    assert len(tree._tree) <= 2 * (MAX_SCORE + 1) + 1
+    assert tree.score_at(1) == MAX_SCORE
+    assert tree.rank(10**9) == 1 and tree.rank(MAX_SCORE) == 1
+
+
+def test_rank_index_keeps_modes_separate():
+    index = RankIndex()
+    index.add("walls", 300)
+    index.add("walls", 200)
+    index.add("pass-through", 900)
+
+    assert index.rank("walls", 200) == 2
+    assert index.rank("pass-through", 200) == 2
+    assert index.rank("pass-through", 900) == 1
+    assert index.count("walls") == 2
+    assert index.rank("unknown", 5) == 1
+
+
+def test_distribution_matches_a_sorted_list():
+    rng = random.Random(7)
+    tree = ScoreFenwick(capacity=16)
+    scores = [rng.randrange(0, MAX_SCORE + 1) for _ in range(997)]
+    for score in scores:
+        tree.add(score)
+    for score in scores[:100]:
+        tree.add(score, -1)
+    scores = sorted(scores[100:])
+
+    assert tree.sum == sum(scores)
+    # Exact nearest-rank quantiles, with no approximation error
+    for q in (0.01, 0.07, 0.25, 0.5, 0.9, 0.99, 1.0):
+        assert tree.quantile(q) == scores[math.ceil(round(q * len(scores), 9)) - 1]
+
+    histogram = tree.histogram(12)
+    assert len(histogram) <= 12
+    assert histogram[0][0] == scores[0] and histogram[-1][1] == scores[-1]
+    for low, high, count in histogram:
+        assert count == sum(low <= s <= high for s in scores)
+    assert sum(count for _, _, count in histogram) == len(scores)
+
+
+def test_histogram_of_a_single_score():
+    tree = ScoreFenwick()
+    tree.add(40, 3)
+    assert tree.histogram(10) == [(40, 40, 3)]
+    assert tree.quantile(0.5) == 40
+    assert ScoreFenwick().histogram(10) == []
@@ -0,0 +1,78 @@
+import asyncio
+import base64
+
+import pytest
+
+from backend.replay import (
+    InvalidReplay, Mulberry32, ReplayEngine, ReplayVerifier, VerifierBusy,
+    decode_replay, pack_moves, record, simulate,
+)
+
+
+def test_rng_matches_the_browser():
+    # Reference values from the JavaScript mulberry32 in useSnakeGame.ts
+    rng = Mulberry32(123456789)
+    assert [rng.random() for _ in range(3)] == [0.2577907438389957, 0.9707721115555614, 0.7853280142880976]
+
+
+def test_food_is_the_kth_free_cell_in_row_major_order():
+    engine = ReplayEngine("walls", 0)
+    # First draw is 0.2664 of 397 free cells: k = 105, and no snake cell comes before it
+    assert engine.food == (5, 5)
+
+
+def test_pack_moves_puts_the_first_move_in_the_low_bits():
+    assert pack_moves([3, 0, 1, 2, 3]) == bytes([0b10010011, 0b11])
+
+
+def test_recorded_games_verify():
+    for mode in ("walls", "pass-through"):
+        replay = record(mode, 42, 150)
+        assert simulate(mode, *decode_replay(replay)) == 150
+
+
+def test_replay_must_end_on_the_crash():
+    seed, moves, ticks = decode_replay(record("walls", 1, 30))
+    # Continuing past the crash
+    codes = [(moves[i >> 2] >> ((i & 3) * 2)) & 3 for i in range(ticks)]
+    with pytest.raises(InvalidReplay):
+        simulate("walls", seed, pack_moves(codes + [3]), ticks + 1)
+    # Stopping before it
+    with pytest.raises(InvalidReplay):
+        simulate("walls", seed, pack_moves(codes[:-1]), ticks - 1)
+
+
+def test_decode_rejects_malformed_replays():
+    moves = base64.b64encode(b"\x00").decode()
+    for bad in (None, {"seed": -1, "moves": moves, "ticks": 4}, {"seed": 1, "moves": "@@", "ticks": 4},
+                {"seed": 1, "moves": moves, "ticks": 9}, {"seed": 1, "moves": moves, "ticks": 0}):
+        with pytest.raises(InvalidReplay):
+            decode_replay(bad)
+
+
+def test_verifier_runs_replays_in_worker_processes():
+    replay = decode_replay(record("pass-through", 3, 80))
+    seed, moves, ticks = replay
+    # Drops the final, fatal move
+    truncated = (seed, moves[:(ticks - 2) // 4 + 1], ticks - 1)
+
+    async def run():
+        verifier = ReplayVerifier(workers=2)
+        verifier.start()
+        try:
+            scores = await asyncio.gather(*(verifier.verify("pass-through", *replay) for _ in range(4)))
+            with pytest.raises(InvalidReplay):
+                await verifier.verify("pass-through", *truncated)
+        finally:
+            await verifier.stop()
+        return verifier, scores
+
+    verifier, scores = asyncio.run(run())
+    assert scores == [80] * 4
+    assert (verifier.verified, verifier.rejected, verifier.pending) == (4, 1, 0)
+
+
+def test_verifier_sheds_load_when_full():
+    verifier = ReplayVerifier(max_pending=0)
+    with pytest.raises(VerifierBusy):
+        asyncio.run(verifier.verify("walls", *decode_replay(record("walls", 1, 10))))
@@ -0,0 +1,59 @@
+import pytest
+
+from backend.live_store import LiveGame
+from backend.snake_codec import decode_player, decode_snake, encode_snake
+
+
+def test_snake_round_trip():
+    cells = [(0, 0), (19, 0), (19, 19), (254, 7)]
+    data = encode_snake(cells)
+    assert len(data) == 3 + 2 * len(cells)
+
+    snake = decode_snake(data)
+    assert len(snake) == 4
+    assert list(snake) == cells
+    assert snake.head() == (0, 0)
+    assert snake[-1] == (254, 7)
+    with pytest.raises(IndexError):
+        snake[4]
+
+
+def test_decode_reads_from_the_buffer_in_place():
+    data = bytearray(encode_snake([(1, 2), (3, 4)]))
+    snake = decode_snake(data)
+    data[5] = 9
+    assert snake[1] == (9, 4)
+
+
+def test_decode_rejects_bad_input():
+    data = encode_snake([(1, 2), (3, 4)])
+    with pytest.raises(ValueError):
+        decode_snake(data[:-1])
+    with pytest.raises(ValueError):
+        decode_snake(b"\x02" + data[1:])
+    with pytest.raises(ValueError):
+        encode_snake([(256, 0)])
+
+
+@pytest.mark.parametrize("stored", [
+    [{"x": 5, "y": 5}, {"x": 4, "y": 5}],
+    '[{"x": 5, "y": 5}, {"x": 4, "y": 5}]',
+    b'[{"x": 5, "y": 5}, {"x": 4, "y": 5}]',
+])
+def test_decode_reads_snakes_stored_before_the_packed_format(stored):
+    # What a live_players row not yet upgraded by migration 0003 holds, per driver
+    assert list(decode_snake(stored)) == [(5, 5), (4, 5)]
+
+
+def test_player_round_trip():
+    game = LiveGame(id="g1", username="Ünïcode", score=70000, mode="pass-through",
+                    snake=[(5, 5), (4, 5), (3, 5)], food=(9, 9), direction="LEFT", viewers=3)
+    player = decode_player(game.player_bytes())
+    assert list(player.pop("snake")) == [(5, 5), (4, 5), (3, 5)]
+    assert player == {
+        "id": "g1", "username": "Ünïcode", "score": 70000, "mode": "pass-through",
+        "food": (9, 9), "direction": "LEFT", "viewers": 3,
+    }
+
+    game.food = None
+    assert decode_player(game.player_bytes())["food"] is None
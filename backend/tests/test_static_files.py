@@ -0,0 +1,90 @@
+import gzip
+
+import brotli
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.static_files import IMMUTABLE, REVALIDATE, StaticSite
+
+INDEX = "<!doctype html><html><body><div id=root></div>" + "<!-- padding -->" * 100 + "</body></html>"
+SCRIPT = "export const board = [" + ",".join(str(i) for i in range(2000)) + "];"
+
+
+def make_site(tmp_path) -> StaticSite:
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text(INDEX)
+    (tmp_path / "assets" / "index-3f2a9c1b.js").write_text(SCRIPT)
+    (tmp_path / "assets" / "logo-77aa01.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 4)
+    (tmp_path / "robots.txt").write_text("User-agent: *\n")
+    return StaticSite(str(tmp_path))
+
+
+def make_client(site: StaticSite) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/api")
+    async def api():
+        return {"ok": True}
+
+    @app.get("/{full_path:path}")
+    async def serve_spa(full_path: str, request: Request):
+        return site.spa(full_path, request.headers)
+
+    return TestClient(app)
+
+
+def test_variants_are_precomputed_only_where_they_help(tmp_path):
+    site = make_site(tmp_path)
+
+    script = site.files["assets/index-3f2a9c1b.js"]
+    assert brotli.decompress(script.variants["br"]) == SCRIPT.encode()
+    assert gzip.decompress(script.variants["gzip"]) == SCRIPT.encode()
+    assert set(site.files["assets/logo-77aa01.png"].variants) == {"identity"}
+    assert set(site.files["robots.txt"].variants) == {"identity"}  # Too small to bother
+
+
+def test_encoding_negotiation(tmp_path):
+    client = make_client(make_site(tmp_path))
+    url = "/assets/index-3f2a9c1b.js"
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == SCRIPT
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"].startswith("text/javascript")
+
+    response = client.get(url, headers={"Accept-Encoding": "br;q=0, gzip;q=0.5"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == SCRIPT
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.text == SCRIPT
+
+
+def test_index_revalidates_with_etag(tmp_path):
+    client = make_client(make_site(tmp_path))
+
+    first = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == REVALIDATE
+    assert first.text == INDEX
+
+    again = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    # The uncompressed representation has its own ETag
+    plain = client.get("/", headers={"Accept-Encoding": "identity", "If-None-Match": first.headers["etag"]})
+    assert plain.status_code == 200
+    assert plain.headers["etag"] != first.headers["etag"]
+
+
+def test_spa_fallback(tmp_path):
+    client = make_client(make_site(tmp_path))
+
+    assert client.get("/api").json() == {"ok": True}
+    assert client.get("/live/abc").text == INDEX
+    assert client.get("/robots.txt").headers["cache-control"] == "public, max-age=3600"
+    assert client.get("/assets/index-old.js").status_code == 404
@@ -2,6 +2,7 @@ import pytest
 import pytest_asyncio
 import sys
 import os
+from functools import lru_cache
 from httpx import AsyncClient, ASGITransport
 
 # Add project root to sys.path to allow importing backend module
@@ -12,6 +13,12 @@ from sqlalchemy.pool import StaticPool
 
 from backend.main import app
 from backend.database import get_db, Base
+from backend.ranking import rank_index
+from backend.period_boards import period_boards
+from backend.cache import leaderboard_cache
+from backend.sessions import session_store
+from backend.admission import admission
+from backend.replay import record
 
 # Use in-memory SQLite for tests
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -42,15 +49,35 @@ async def test_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
+@pytest_asyncio.fixture(scope="function")
+async def session_factory(test_db):
+    yield TestingSessionLocal
+
 @pytest_asyncio.fixture(scope="function")
 async def client(test_db):
     async def override_get_db():
         yield test_db
 
     app.dependency_overrides[get_db] = override_get_db
+    # Tables are recreated per test, so in-memory indexes must be rebuilt too
+    rank_index.clear()
+    period_boards.clear()
+    leaderboard_cache.clear()
+    session_store.clear()
+    admission.clear()
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
     
     app.dependency_overrides.clear()
+
+# Recording a long game takes a while, so each (mode, score) is played once
+_replay = lru_cache(maxsize=None)(record)
+
+@pytest.fixture
+def submit(client):
+    async def _submit(username: str, score: int, mode: str = "walls"):
+        payload = {"username": username, "score": score, "mode": mode, "replay": _replay(mode, 1, score)}
+        return await client.post("/leaderboard", json=payload)
+    return _submit
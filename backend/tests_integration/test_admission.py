@@ -0,0 +1,33 @@
+import pytest
+from httpx import AsyncClient
+
+from backend.admission import TokenBuckets, admission
+
+
+@pytest.mark.asyncio
+async def test_score_submissions_are_rate_limited_per_client(client: AsyncClient, submit, monkeypatch):
+    monkeypatch.setitem(admission.buckets, ("POST", "/leaderboard"), TokenBuckets(burst=2, seconds=60))
+
+    assert (await submit("a", 10)).json()["success"] is True
+    assert (await submit("a", 20)).json()["success"] is True
+    response = await submit("a", 30)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"
+    assert response.json() == {"success": False, "data": None, "error": "Too many requests, slow down"}
+
+    # Reads are not limited
+    assert len((await client.get("/leaderboard")).json()["data"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_requests_past_the_concurrency_cap_are_shed(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(admission, "in_flight", admission.max_concurrency)
+
+    response = await client.post("/auth/login", json={"email": "a@example.com", "password": "password123"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+    assert (await client.get("/leaderboard")).status_code == 200
+
+    stats = (await client.get("/system/admission")).json()["data"]
+    assert stats["shed"] == 1
+    assert stats["routes"]["POST /auth/login"]["burst"] == 10
@@ -52,3 +52,72 @@ async def test_register_duplicate_email(client: AsyncClient):
     data = response.json()
     assert data["success"] is False
     assert "Email already registered" in data["error"]
+
+@pytest.mark.asyncio
+async def test_session_lifecycle(client: AsyncClient, submit):
+    from backend.sessions import SESSION_COOKIE, session_store
+
+    assert (await client.get("/auth/me")).json()["data"] is None
+
+    response = await client.post("/auth/signup", json={
+        "username": "sessionuser",
+        "email": "session@example.com",
+        "password": "password123"
+    })
+    assert SESSION_COOKIE in response.cookies
+
+    # Served from the session cache after signup, without a query
+    misses = session_store.users.misses
+    me = (await client.get("/auth/me")).json()
+    assert me["data"]["username"] == "sessionuser"
+    assert session_store.users.misses == misses
+
+    # A cold cache falls back to the database
+    session_store.clear()
+    assert (await client.get("/auth/me")).json()["data"]["email"] == "session@example.com"
+
+    # Scores are ranked under the signed-in player's name
+    response = await submit("someone-else", 30)
+    assert response.json()["data"]["username"] == "sessionuser"
+
+    await client.post("/auth/logout")
+    assert (await client.get("/auth/me")).json()["data"] is None
+    assert (await submit("someone-else", 30)).json()["data"]["username"] == "someone-else"
+
+@pytest.mark.asyncio
+async def test_bearer_token_and_bad_tokens(client: AsyncClient):
+    response = await client.post("/auth/signup", json={
+        "username": "beareruser",
+        "email": "bearer@example.com",
+        "password": "password123"
+    })
+    token = response.cookies["session"]
+    client.cookies.clear()
+
+    me = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.json()["data"]["username"] == "beareruser"
+    me = await client.get("/auth/me", headers={"Authorization": "Bearer not-a-token"})
+    assert me.json()["data"] is None
+
+@pytest.mark.asyncio
+async def test_login_rejects_wrong_password_and_upgrades_plaintext(client: AsyncClient, session_factory):
+    from backend.db_models import UserDB
+
+    async with session_factory() as session:
+        session.add(UserDB(id="legacy", username="legacy", email="legacy@example.com", password="hunter2"))
+        await session.commit()
+
+    response = await client.post("/auth/login", json={"email": "legacy@example.com", "password": "wrong"})
+    assert response.json()["success"] is False
+    response = await client.post("/auth/login", json={"email": "nobody@example.com", "password": "hunter2"})
+    assert response.json()["success"] is False
+
+    response = await client.post("/auth/login", json={"email": "legacy@example.com", "password": "hunter2"})
+    assert response.json()["success"] is True
+    async with session_factory() as session:
+        stored = (await session.get(UserDB, "legacy")).password
+    assert stored.startswith("$argon2id$")
+
+    client.cookies.clear()
+    response = await client.post("/auth/login", json={"email": "legacy@example.com", "password": "hunter2"})
+    assert response.json()["success"] is True
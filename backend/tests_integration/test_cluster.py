@@ -0,0 +1,87 @@
+import json
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from backend import cluster
+from backend.db_models import LeaderboardDB
+from backend.ingest import score_ingestor
+from backend.models import Period
+from backend.period_boards import period_boards
+from backend.ranking import rank_index
+from backend.routers import leaderboard
+
+
+def message(worker, seq, row):
+    return json.dumps({"worker": worker, "seq": seq, "row": row}).encode()
+
+
+@pytest.fixture
+def fresh_cluster(monkeypatch):
+    monkeypatch.setattr(cluster, "_recent", deque())
+    monkeypatch.setattr(cluster, "_last_seen", {})
+
+
+@pytest.mark.asyncio
+async def test_a_gap_in_score_messages_schedules_a_rebuild(client, fresh_cluster, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(cluster, "schedule_resync", lambda: scheduled.append(True))
+    rank_index.loaded = True
+
+    cluster._on_score(message("a", 1, ["s1", "ann", 10, "walls", "2026-10-17"]))
+    cluster._on_score(message("a", 2, ["s2", "ann", 20, "walls", "2026-10-17"]))
+    # A new worker may start anywhere
+    cluster._on_score(message("b", 7, ["s3", "bob", 30, "walls", "2026-10-17"]))
+    assert scheduled == []
+
+    cluster._on_score(message("a", 4, ["s5", "ann", 40, "walls", "2026-10-17"]))
+    assert scheduled == [True]
+    assert rank_index.count("walls") == 4
+
+
+@pytest.mark.asyncio
+async def test_rebuild_keeps_recent_rows_not_yet_stored_and_counts_stored_ones_once(
+        client, fresh_cluster, test_db, session_factory):
+    today = period_boards.today().isoformat()
+    stored = ("stored", "ann", 50, "walls", today)
+    test_db.add(LeaderboardDB(id="old", rank=1, username="bob", score=80, mode="walls", date=today))
+    test_db.add(LeaderboardDB(id=stored[0], rank=2, username="ann", score=50, mode="walls", date=today))
+    await test_db.commit()
+    # Seen on the backplane, but one is still in a write-behind queue somewhere
+    cluster._remember(stored)
+    cluster._remember(("queued", "cat", 60, "walls", today))
+    # What the stale index missed
+    rank_index.clear()
+    period_boards.clear()
+
+    await cluster.resync(session_factory)
+
+    assert rank_index.count("walls") == 3
+    assert rank_index.rank("walls", 60) == 2
+    assert [r[0] for r in period_boards.top(Period.DAY, "walls", 10)] == ["old", "queued", "stored"]
+
+
+@pytest.mark.asyncio
+async def test_a_dropped_queued_score_is_taken_back_out(client, fresh_cluster, test_db, session_factory, submit,
+                                                        monkeypatch):
+    today = period_boards.today().isoformat()
+    test_db.add(LeaderboardDB(id="score_taken", rank=1, username="bob", score=10, mode="walls", date=today))
+    await test_db.commit()
+    # The next submission gets an id already in the table, so its queued row is rejected
+    monkeypatch.setattr(leaderboard.uuid, "uuid4", lambda: SimpleNamespace(hex="taken"))
+
+    score_ingestor.start(session_factory)
+    try:
+        response = await submit("ann", 50)
+        assert response.json()["data"]["rank"] == 1
+        assert rank_index.count("walls") == 2
+    finally:
+        await score_ingestor.stop()
+
+    assert rank_index.count("walls") == 1
+    assert rank_index.rank("walls", 10) == 1
+    assert [r[2] for r in period_boards.top(Period.DAY, "walls", 10)] == ["bob"]
+    assert [row for _, row in cluster._recent if row[1] == "ann"] == []
+    stats = (await client.get("/leaderboard/stats?mode=walls")).json()["data"]
+    assert stats["count"] == 1
@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, func
+
+from backend.db_models import LeaderboardDB
+from backend.ingest import ScoreIngestor, IngestQueueFull, score_ingestor
+
+
+def _row(i: int, score: int = 100):
+    return dict(id=f"score_{i}", rank=0, username=f"p{i}", score=score, mode="walls", date="2024-01-01")
+
+
+async def _count(session_factory) -> int:
+    async with session_factory() as session:
+        return (await session.execute(select(func.count()).select_from(LeaderboardDB))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_ingestor_flushes_in_batches(session_factory):
+    ingestor = ScoreIngestor(max_queue=100, batch_size=10, flush_interval=0.01)
+    ingestor.start(session_factory)
+
+    for i in range(25):
+        await ingestor.submit(_row(i))
+    await asyncio.sleep(0.1)
+
+    assert await _count(session_factory) == 25
+    assert ingestor.flushed == 25
+    assert ingestor.batches == 3
+    await ingestor.stop()
+
+
+@pytest.mark.asyncio
+async def test_ingestor_drains_on_stop(session_factory):
+    # A long flush interval means nothing is written until shutdown drains the queue
+    ingestor = ScoreIngestor(max_queue=100, batch_size=1000, flush_interval=60)
+    ingestor.start(session_factory)
+
+    for i in range(7):
+        await ingestor.submit(_row(i))
+    await ingestor.stop()
+
+    assert not ingestor.running
+    assert await _count(session_factory) == 7
+
+
+@pytest.mark.asyncio
+async def test_ingestor_applies_backpressure(session_factory):
+    ingestor = ScoreIngestor(max_queue=2, batch_size=1, flush_interval=0, enqueue_timeout=0.01)
+    ingestor.start(session_factory)
+
+    # Hold the first flush open so the queue can fill up behind it
+    gate = asyncio.Event()
+    flush = ingestor._flush
+
+    async def gated_flush(batch):
+        await gate.wait()
+        await flush(batch)
+
+    ingestor._flush = gated_flush
+
+    await ingestor.submit(_row(0))
+    await asyncio.sleep(0.01)
+    await ingestor.submit(_row(1))
+    await ingestor.submit(_row(2))
+    with pytest.raises(IngestQueueFull):
+        await ingestor.submit(_row(3))
+
+    gate.set()
+    await ingestor.stop()
+    assert await _count(session_factory) == 3
+
+
+@pytest.mark.asyncio
+async def test_ingestor_drops_rows_the_database_rejects(session_factory):
+    ingestor = ScoreIngestor(max_queue=100, batch_size=10, flush_interval=0.01)
+    ingestor.start(session_factory)
+
+    await ingestor.submit(_row(0))
+    await asyncio.sleep(0.05)
+    # The duplicate id fails the whole batch; the rows around it still land
+    for i in (1, 0, 2):
+        await ingestor.submit(_row(i))
+    await asyncio.sleep(0.05)
+
+    assert await _count(session_factory) == 3
+    assert ingestor.dropped == 1
+    assert ingestor.flushed == 3
+    assert ingestor.pending == 0
+    await ingestor.stop()
+
+
+@pytest.mark.asyncio
+async def test_submit_score_uses_running_ingestor(client: AsyncClient, session_factory, submit):
+    score_ingestor.start(session_factory)
+    try:
+        response = await submit("queued", 300, "walls")
+        data = response.json()
+        assert data["success"] is True
+        assert data["data"]["rank"] == 1
+    finally:
+        await score_ingestor.stop()
+
+    response = await client.get("/leaderboard")
+    assert [e["username"] for e in response.json()["data"]] == ["queued"]
@@ -1,5 +1,15 @@
 import pytest
+from datetime import datetime
+from typing import List
 from httpx import AsyncClient
+from sqlalchemy import select
+
+from backend.db_models import LeaderboardDB, PeriodBoardDB
+from backend.engine import MAX_SCORE
+from backend.cache import leaderboard_cache
+from backend.period_boards import period_boards
+from backend.models import LeaderboardEntry, PagedApiResponse
+from backend.replay import record
 
 @pytest.mark.asyncio
 async def test_get_leaderboard_empty(client: AsyncClient):
@@ -16,7 +26,8 @@ async def test_post_score_and_get_leaderboard(client: AsyncClient):
     score_data = {
         "username": "scoreuser",
         "score": 100,
-        "mode": "walls"
+        "mode": "walls",
+        "replay": record("walls", 7, 100)
     }
     response = await client.post("/leaderboard", json=score_data)
     assert response.status_code == 200
@@ -29,3 +40,235 @@ async def test_post_score_and_get_leaderboard(client: AsyncClient):
     assert len(data["data"]) == 1
     assert data["data"][0]["username"] == "scoreuser"
     assert data["data"][0]["score"] == 100
+
+@pytest.mark.asyncio
+async def test_ranks_stay_current_after_new_submissions(client: AsyncClient, submit):
+    first = await submit("early", 100, "walls")
+    assert first.json()["data"]["rank"] == 1
+
+    second = await submit("late", 200, "walls")
+    assert second.json()["data"]["rank"] == 1
+
+    # A different mode does not affect walls ranks
+    await submit("other", 500, "pass-through")
+
+    response = await client.get("/leaderboard?mode=walls")
+    ranks = {e["username"]: e["rank"] for e in response.json()["data"]}
+    assert ranks == {"late": 1, "early": 2}
+
+@pytest.mark.asyncio
+async def test_post_score_rejects_invalid_input(client: AsyncClient):
+    response = await client.post("/leaderboard", json={"score": -10, "mode": "walls"})
+    assert response.json()["success"] is False
+
+    response = await client.post("/leaderboard", json={"score": 10, "mode": "diagonal"})
+    assert response.json()["success"] is False
+
+@pytest.mark.asyncio
+async def test_leaderboard_keyset_pagination(client: AsyncClient, submit):
+    scores = [500, 400, 400, 400, 300, 200, 100]
+    for i, score in enumerate(scores):
+        await submit(f"p{i}", score, "walls")
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        url = "/leaderboard?mode=walls&limit=3" + (f"&cursor={cursor}" if cursor else "")
+        data = (await client.get(url)).json()
+        assert data["success"] is True
+        assert len(data["data"]) <= 3
+        seen.extend(data["data"])
+        pages += 1
+        cursor = data.get("nextCursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert [e["score"] for e in seen] == scores
+    assert len({e["id"] for e in seen}) == len(scores)
+    assert [e["rank"] for e in seen] == [1, 2, 2, 2, 5, 6, 7]
+
+@pytest.mark.asyncio
+async def test_leaderboard_pages_keep_the_response_model_shape(client: AsyncClient, submit):
+    for i, score in enumerate([300, 200, 200, 100]):
+        await submit(f"p{i}", score, "pass-through" if i % 2 else "walls")
+
+    response = await client.get("/leaderboard?limit=3")
+    page = PagedApiResponse[List[LeaderboardEntry]].model_validate_json(response.content)
+    assert page.nextCursor is not None
+    assert response.content == page.model_dump_json().encode()
+
+    response = await client.get(f"/leaderboard?limit=3&cursor={page.nextCursor}")
+    page = PagedApiResponse[List[LeaderboardEntry]].model_validate_json(response.content)
+    assert [e.score for e in page.data] == [100]
+    assert response.content == page.model_dump_json().encode()
+
+@pytest.mark.asyncio
+async def test_leaderboard_rejects_bad_cursor(client: AsyncClient):
+    response = await client.get("/leaderboard?cursor=not-a-cursor")
+    assert response.status_code == 200
+    assert response.json()["success"] is False
+
+@pytest.mark.asyncio
+async def test_leaderboard_around_entry(client: AsyncClient, submit):
+    ids = {}
+    for name, score in [("a", 900), ("b", 800), ("c", 700), ("d", 600), ("e", 500)]:
+        response = await submit(name, score, "walls")
+        ids[name] = response.json()["data"]["id"]
+    await submit("x", 650, "pass-through")
+
+    data = (await client.get(f"/leaderboard/around/{ids['c']}?window=1")).json()
+    assert data["success"] is True
+    assert data["data"]["entry"]["username"] == "c"
+    assert data["data"]["entry"]["rank"] == 3
+    assert [e["username"] for e in data["data"]["above"]] == ["b"]
+    assert [e["username"] for e in data["data"]["below"]] == ["d"]
+
+    # Window is clipped at the edges of the board
+    data = (await client.get(f"/leaderboard/around/{ids['a']}?window=2")).json()
+    assert data["data"]["above"] == []
+    assert [e["rank"] for e in data["data"]["below"]] == [2, 3]
+
+@pytest.mark.asyncio
+async def test_leaderboard_around_user(client: AsyncClient, submit):
+    await submit("me", 100, "walls")
+    await submit("me", 300, "walls")
+    await submit("rival", 400, "walls")
+
+    data = (await client.get("/leaderboard/around/user/me?window=3")).json()
+    assert data["data"]["entry"]["score"] == 300
+    assert data["data"]["entry"]["rank"] == 2
+    assert [e["username"] for e in data["data"]["above"]] == ["rival"]
+    assert [e["score"] for e in data["data"]["below"]] == [100]
+
+    data = (await client.get("/leaderboard/around/user/nobody")).json()
+    assert data["success"] is False
+
+@pytest.mark.asyncio
+async def test_leaderboard_etag_and_invalidation(client: AsyncClient, submit):
+    await submit("w", 100, "walls")
+    await submit("p", 100, "pass-through")
+
+    walls = await client.get("/leaderboard?mode=walls")
+    other = await client.get("/leaderboard?mode=pass-through")
+    walls_etag = walls.headers["etag"]
+    other_etag = other.headers["etag"]
+
+    response = await client.get("/leaderboard?mode=walls", headers={"If-None-Match": walls_etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # A walls submission changes the walls page but leaves pass-through cached
+    await submit("w2", 200, "walls")
+
+    response = await client.get("/leaderboard?mode=walls", headers={"If-None-Match": walls_etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != walls_etag
+    assert [e["username"] for e in response.json()["data"]] == ["w2", "w"]
+
+    response = await client.get("/leaderboard?mode=pass-through", headers={"If-None-Match": other_etag})
+    assert response.status_code == 304
+
+    stats = (await client.get("/leaderboard/cache/stats")).json()["data"]
+    assert stats["hits"] >= 2
+    assert stats["invalidations"] == 3
+
+@pytest.mark.asyncio
+async def test_post_score_requires_a_matching_replay(client: AsyncClient):
+    response = await client.post("/leaderboard", json={"username": "cheat", "score": 100, "mode": "walls"})
+    assert response.json()["success"] is False
+
+    replay = record("walls", 3, 50)
+    response = await client.post("/leaderboard", json={"username": "cheat", "score": 500, "mode": "walls", "replay": replay})
+    assert response.json() == {"success": False, "data": None, "error": "Score does not match the replay"}
+
+    response = await client.get("/leaderboard")
+    assert response.json()["data"] == []
+
+@pytest.mark.asyncio
+async def test_post_score_rejects_booleans_and_impossible_scores(client: AsyncClient):
+    response = await client.post("/leaderboard", json={"score": True, "mode": "walls"})
+    assert response.json()["error"] == "Score must be a non-negative integer"
+    response = await client.post("/leaderboard", json={"score": 10**9, "mode": "walls"})
+    assert response.json()["error"] == f"Score cannot exceed {MAX_SCORE}"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("username", ["", "x" * 33, "nul\x00", {"name": "x"}])
+async def test_post_score_rejects_bad_usernames(client: AsyncClient, username):
+    replay = record("walls", 3, 50)
+    response = await client.post("/leaderboard", json={"username": username, "score": 50, "mode": "walls", "replay": replay})
+    assert response.json()["error"] == "Username must be 1 to 32 printable characters"
+
+@pytest.mark.asyncio
+async def test_legacy_scores_above_the_cap_still_load(client: AsyncClient, session_factory):
+    async with session_factory() as session:
+        session.add(LeaderboardDB(id="huge", rank=1, username="legacy", score=10**9, mode="walls", date="2020-01-01"))
+        session.add(LeaderboardDB(id="top", rank=2, username="real", score=MAX_SCORE, mode="walls", date="2020-01-01"))
+        await session.commit()
+    entries = (await client.get("/leaderboard?mode=walls")).json()["data"]
+    assert [(e["username"], e["rank"]) for e in entries] == [("legacy", 1), ("real", 1)]
+
+@pytest.mark.asyncio
+async def test_score_stats(client: AsyncClient, submit):
+    empty = (await client.get("/leaderboard/stats?mode=pass-through&score=5")).json()["data"]
+    assert (empty["count"], empty["histogram"], empty["percentiles"], empty["beats"]) == (0, [], {}, 0)
+
+    for name, score in [("a", 10), ("b", 20), ("c", 30), ("d", 40)]:
+        await submit(name, score, "walls")
+    await submit("e", 500, "pass-through")
+
+    response = await client.get("/leaderboard/stats?mode=walls&buckets=2&percentiles=50,75,100&score=25")
+    stats = response.json()["data"]
+    assert stats["count"] == 4 and stats["mean"] == 25
+    assert (stats["min"], stats["max"]) == (10, 40)
+    assert stats["percentiles"] == {"50": 20, "75": 30, "100": 40}
+    assert stats["histogram"] == [{"min": 10, "max": 25, "count": 2}, {"min": 26, "max": 40, "count": 2}]
+    assert (stats["rank"], stats["beats"]) == (3, 50)
+
+    assert (await client.get("/leaderboard/stats?mode=walls&percentiles=0")).json()["success"] is False
+
+@pytest.mark.asyncio
+async def test_period_leaderboards(client: AsyncClient, session_factory, submit):
+    # An old entry only makes the all-time board
+    async with session_factory() as session:
+        session.add(LeaderboardDB(id="old", rank=1, username="veteran", score=900, mode="walls", date="2020-01-01"))
+        await session.commit()
+    await submit("today", 100, "walls")
+    await submit("other", 50, "pass-through")
+
+    day = (await client.get("/leaderboard?period=day&mode=walls")).json()
+    assert [(e["username"], e["rank"]) for e in day["data"]] == [("today", 1)]
+    assert day["data"][0]["date"] == datetime.now().strftime("%Y-%m-%d")
+    everything = (await client.get("/leaderboard?period=all")).json()
+    assert [(e["username"], e["rank"]) for e in everything["data"]] == [("veteran", 1), ("today", 2), ("other", 1)]
+    week = (await client.get("/leaderboard?period=week&limit=1")).json()
+    assert [e["username"] for e in week["data"]] == ["today"] and week["nextCursor"] is None
+    assert (await client.get("/leaderboard?period=day&cursor=abc")).json()["success"] is False
+
+    # Rebuilt from the table, the boards come out the same
+    period_boards.clear()
+    leaderboard_cache.clear()
+    rebuilt = (await client.get("/leaderboard?period=all")).json()
+    assert rebuilt["data"] == everything["data"]
+
+    await period_boards.flush(session_factory)
+    async with session_factory() as session:
+        mirrored = (await session.execute(
+            select(PeriodBoardDB.period, PeriodBoardDB.entry_id, PeriodBoardDB.rank)
+            .where(PeriodBoardDB.mode == "walls").order_by(PeriodBoardDB.period, PeriodBoardDB.rank)
+        )).all()
+    assert mirrored == [("all", "old", 1), ("all", day["data"][0]["id"], 2),
+                        ("day", day["data"][0]["id"], 1), ("week", day["data"][0]["id"], 1)]
+
+    too_many = await client.get(f"/leaderboard?period=day&limit={period_boards.size + 1}")
+    assert too_many.status_code == 422 and too_many.json()["success"] is False
+
+    # Cached with an ETag like any other page, and invalidated by a new score
+    first = await client.get("/leaderboard?period=day&mode=walls")
+    unchanged = await client.get("/leaderboard?period=day&mode=walls",
+                                 headers={"If-None-Match": first.headers["etag"]})
+    assert unchanged.status_code == 304
+    await submit("later", 200, "walls")
+    changed = await client.get("/leaderboard?period=day&mode=walls", headers={"If-None-Match": first.headers["etag"]})
+    assert [e["username"] for e in changed.json()["data"]] == ["later", "today"]
@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from backend.database import _async_url
+from backend.db_engine import build_engine
+from backend.db_models import Base, LeaderboardDB
+from backend.leaderboard_io import _main, import_rows, read_rows
+from backend.models import ExportFormat
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+async def add_rows(session_factory, rows):
+    async with session_factory() as session:
+        for id, username, score, mode in rows:
+            session.add(LeaderboardDB(id=id, rank=None, username=username, score=score, mode=mode, date="2026-10-01"))
+        await session.commit()
+
+
+ROWS = [("a", "ann", 300, "walls"), ("b", "bob", 100, "walls"), ("c", "cy", 200, "pass-through")]
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_streams_every_row(client: AsyncClient, session_factory):
+    await add_rows(session_factory, ROWS)
+    response = await client.get("/leaderboard/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="leaderboard.ndjson"' in response.headers["content-disposition"]
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["a", "c", "b"]
+    assert lines[0] == {"id": "a", "rank": None, "username": "ann", "score": 300, "mode": "walls", "date": "2026-10-01"}
+
+
+@pytest.mark.asyncio
+async def test_export_csv_by_mode(client: AsyncClient, session_factory):
+    await add_rows(session_factory, ROWS)
+    response = await client.get("/leaderboard/export?format=csv&mode=walls")
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["id"], row["score"], row["rank"]) for row in rows] == [("a", "300", ""), ("b", "100", "")]
+
+    assert (await client.get("/leaderboard/export?format=xml")).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_import_round_trips_an_export_and_recomputes_ranks(client: AsyncClient, session_factory):
+    await add_rows(session_factory, ROWS + [("d", "dee", 300, "walls")])
+    exported = (await client.get("/leaderboard/export?format=csv")).text
+
+    engine = session_factory.kw["bind"]
+    rows = read_rows(io.StringIO(exported), ExportFormat.CSV)
+    assert await import_rows(engine, rows, replace=True, batch_size=2) == 4
+
+    async with session_factory() as session:
+        stored = (await session.execute(select(LeaderboardDB.id, LeaderboardDB.rank).order_by(LeaderboardDB.id))).all()
+    # Ties share a rank, and each mode is ranked on its own
+    assert stored == [("a", 1), ("b", 3), ("c", 1), ("d", 1)]
+
+
+@pytest.mark.asyncio
+async def test_import_is_all_or_nothing(client: AsyncClient, session_factory):
+    await add_rows(session_factory, ROWS)
+    good = '{"id": "e", "username": "eve", "score": 5, "mode": "walls", "date": "2026-10-02"}\n'
+    bad = '{"id": "f", "username": "fay", "score": -1, "mode": "walls", "date": "2026-10-02"}\n'
+
+    with pytest.raises(ValueError, match="Line 2"):
+        await import_rows(session_factory.kw["bind"], read_rows(io.StringIO(good + bad), ExportFormat.NDJSON),
+                          replace=True, batch_size=1)
+
+    async with session_factory() as session:
+        ids = (await session.execute(select(LeaderboardDB.id).order_by(LeaderboardDB.id))).scalars().all()
+    assert ids == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("score", ["true", "1.5", "99999999"])
+def test_read_rows_rejects_non_integer_and_impossible_scores(score):
+    line = f'{{"id": "g", "username": "gus", "score": {score}, "mode": "walls", "date": "2026-10-02"}}\n'
+    with pytest.raises(ValueError, match="Line 1"):
+        list(read_rows(io.StringIO(line), ExportFormat.NDJSON))
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+async def test_import_of_a_duplicate_id_over_copy_fails_cleanly(tmp_path, capsys):
+    engine = build_engine(_async_url(POSTGRES_URL))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        path = tmp_path / "dup.ndjson"
+        row = '{"id": "a", "username": "ann", "score": 5, "mode": "walls", "date": "2026-10-02"}\n'
+        path.write_text(row + row)
+        args = SimpleNamespace(command="import", path=str(path), format=None, mode=None, replace=False,
+                               batch_size=10, database_url=POSTGRES_URL)
+
+        assert await _main(args) == 1
+        assert "Import aborted, nothing was loaded" in capsys.readouterr().err
+        async with engine.connect() as conn:
+            assert (await conn.execute(select(func.count()).select_from(LeaderboardDB))).scalar_one() == 0
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import select
+
+from backend.db_models import LivePlayerDB
+from backend.live_store import LiveGame, LiveStore
+from backend.snake_codec import decode_snake
+
+
+def make_game(game_id: str) -> LiveGame:
+    return LiveGame(id=game_id, username="Bot", score=0, mode="walls",
+                    snake=[(5, 5), (4, 5)], food=(9, 9), direction="RIGHT")
+
+
+async def _rows(session_factory):
+    async with session_factory() as session:
+        result = await session.execute(select(LivePlayerDB).order_by(LivePlayerDB.id))
+        return {p.id: p for p in result.scalars().all()}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_inserts_then_updates(session_factory):
+    store = LiveStore()
+    store.add(make_game("g1"))
+    await store.snapshot(session_factory)
+
+    rows = await _rows(session_factory)
+    assert list(decode_snake(rows["g1"].snake)) == [(5, 5), (4, 5)]
+
+    game = store.get("g1")
+    game.body.push_head((6, 5))
+    game.body.pop_tail()
+    game.score = 30
+    game.dirty = True
+    await store.snapshot(session_factory)
+
+    rows = await _rows(session_factory)
+    assert rows["g1"].score == 30
+    assert list(decode_snake(rows["g1"].snake)) == [(6, 5), (5, 5)]
+    assert store.snapshots == 2
+
+
+@pytest.mark.asyncio
+async def test_clean_games_are_not_rewritten(session_factory):
+    store = LiveStore()
+    store.add(make_game("g1"))
+    await store.snapshot(session_factory)
+    await store.snapshot(session_factory)
+    assert store.snapshots == 1
+
+
+@pytest.mark.asyncio
+async def test_ended_game_gets_final_snapshot_and_reloads(session_factory):
+    store = LiveStore()
+    store.add(make_game("g1"))
+    store.add(make_game("g2"))
+    await store.snapshot(session_factory)
+
+    game = store.end("g2")
+    game.score = 90
+    game.dirty = True
+    await store.snapshot(session_factory)
+    assert "g2" not in store.games
+    assert (await _rows(session_factory))["g2"].score == 90
+
+    async with session_factory() as session:
+        reloaded = LiveStore()
+        await reloaded.load(session)
+    assert list(reloaded.get("g1").body) == [(5, 5), (4, 5)]
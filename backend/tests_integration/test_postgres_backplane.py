@@ -0,0 +1,88 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from backend.backplane import PostgresBackplane
+
+# e.g. postgresql://postgres@127.0.0.1:5432/postgres; the rest of the suite runs on SQLite
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+
+
+async def eventually(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+def worker(channel: str, events: list):
+    backplane = PostgresBackplane(POSTGRES_URL, channel=channel, retry=0.1)
+    received = []
+    backplane.subscribe("scores", received.append)
+
+    async def promoted():
+        events.append(("promoted", backplane.worker_id))
+
+    async def demoted():
+        events.append(("demoted", backplane.worker_id))
+
+    backplane.on_promote(promoted)
+    backplane.on_demote(demoted)
+    return backplane, received
+
+
+@pytest.mark.asyncio
+async def test_leader_that_loses_its_connection_steps_down_and_rejoins():
+    import asyncpg
+
+    channel = f"test_{uuid.uuid4().hex[:8]}"
+    events = []
+    first, first_got = worker(channel, events)
+    second, second_got = worker(channel, events)
+    await first.start()
+    await second.start()
+    try:
+        assert first.leader and not second.leader
+        first.publish("scores", b"hello")
+        await eventually(lambda: second_got == [b"hello"])
+
+        # What a Postgres restart or a network cut looks like from the leader's side
+        admin = await asyncpg.connect(POSTGRES_URL)
+        try:
+            await admin.execute("SELECT pg_terminate_backend($1)", first._conn.get_server_pid())
+        finally:
+            await admin.close()
+
+        await eventually(lambda: ("demoted", first.worker_id) in events)
+        await eventually(lambda: second.leader)
+        assert events == [("demoted", first.worker_id), ("promoted", second.worker_id)]
+        assert not first.leader
+
+        # The old leader reconnects as a follower and hears the new one
+        await eventually(lambda: first.stats()["connected"] and first.reconnects == 1)
+        second.publish("scores", b"again")
+        await eventually(lambda: first_got == [b"again"])
+        assert not first.leader
+    finally:
+        await second.stop()
+        await first.stop()
+
+
+@pytest.mark.asyncio
+async def test_follower_takes_over_when_the_leader_stops():
+    channel = f"test_{uuid.uuid4().hex[:8]}"
+    events = []
+    first, _ = worker(channel, events)
+    second, _ = worker(channel, events)
+    await first.start()
+    await second.start()
+    try:
+        await first.stop()
+        await eventually(lambda: second.leader)
+        assert events == [("promoted", second.worker_id)]
+    finally:
+        await second.stop()
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from starlette.requests import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from backend.cache import leaderboard_cache
+from backend.database import Base, replica_router
+from backend.db_models import LeaderboardDB, ReplicaHeartbeatDB
+from backend.replicas import PIN_COOKIE
+
+
+@pytest_asyncio.fixture
+async def replica(tmp_path, monkeypatch):
+    # A second SQLite file standing in for the replica, with a row the primary doesn't have
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as session:
+        session.add(LeaderboardDB(id="r1", rank=1, username="on-replica", score=50, mode="walls", date="2026-10-01"))
+        await session.commit()
+    monkeypatch.setattr(replica_router, "replica", factory)
+    monkeypatch.setattr(replica_router, "lag", 0.0)
+    monkeypatch.setattr(replica_router, "visible_until", time.time())
+    monkeypatch.setattr(replica_router, "last_write", 0.0)
+    yield factory
+    await engine.dispose()
+
+
+def names(response):
+    return [entry["username"] for entry in response.json()["data"]]
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_the_replica_until_the_client_writes(client: AsyncClient, submit, replica):
+    assert names(await client.get("/leaderboard")) == ["on-replica"]
+
+    response = await submit("writer", 100)
+    assert response.json()["success"] is True
+    pin = response.cookies[PIN_COOKIE]
+
+    # Other clients keep reading the replica, which hasn't caught up with the write,
+    # and that page is cached no longer than the replica is allowed to lag
+    client.cookies.clear()
+    assert names(await client.get("/leaderboard")) == ["on-replica"]
+    page = leaderboard_cache._entries[(None, 50, None)]
+    assert page.expires_at <= time.monotonic() + replica_router.max_lag
+
+    # The writer is pinned to the primary, so it sees its own score straight away
+    client.cookies.set(PIN_COOKIE, pin)
+    assert names(await client.get("/leaderboard?limit=20")) == ["writer"]
+    client.cookies.clear()
+    assert names(await client.get("/leaderboard?limit=20")) == ["writer"]
+
+
+@pytest.mark.asyncio
+async def test_probe_measures_lag_from_the_heartbeat(session_factory, replica):
+    await replica_router.probe(session_factory)
+    # Nothing replicates between the two files, so the replica never saw a heartbeat
+    assert replica_router.lag is None and not replica_router.healthy()
+
+    async with session_factory() as primary:
+        beat = await primary.get(ReplicaHeartbeatDB, 1)
+        async with replica() as session:
+            session.add(ReplicaHeartbeatDB(id=1, at=beat.at - 10))
+            await session.commit()
+    await replica_router.probe(session_factory)
+    assert replica_router.lag >= 10 and not replica_router.healthy()
+    assert not replica_router.use_replica(Request({"type": "http", "headers": []}))
+
+    async with replica() as session:
+        (await session.get(ReplicaHeartbeatDB, 1)).at = time.time()
+        await session.commit()
+    await replica_router.probe(session_factory)
+    assert replica_router.lag < 1 and replica_router.healthy()
+    assert replica_router.caught_up()
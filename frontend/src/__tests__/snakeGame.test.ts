@@ -1,7 +1,7 @@
 import { describe, it, expect } from 'vitest';
 import { gameLogic } from '@/hooks/useSnakeGame';
 
-const { generateFood, checkCollision, wrapPosition } = gameLogic;
+const { createRng, packMoves, generateFood, checkCollision, wrapPosition } = gameLogic;
 
 describe('Snake Game Logic', () => {
   describe('generateFood', () => {
@@ -36,6 +36,21 @@ describe('Snake Game Logic', () => {
     });
   });
 
+  describe('replays', () => {
+    it('should match the backend rng and food placement', () => {
+      // Same reference values as backend/tests/test_replay.py
+      const rng = createRng(123456789);
+      expect([rng(), rng(), rng()]).toEqual([0.2577907438389957, 0.9707721115555614, 0.7853280142880976]);
+
+      const snake = [{ x: 10, y: 10 }, { x: 9, y: 10 }, { x: 8, y: 10 }];
+      expect(generateFood(snake, 20, createRng(0))).toEqual({ x: 5, y: 5 });
+    });
+
+    it('should pack four moves per byte', () => {
+      expect(packMoves([3, 0, 1, 2, 3])).toBe(btoa(String.fromCharCode(0b10010011, 0b11)));
+    });
+  });
+
   describe('checkCollision', () => {
     it('should detect self collision', () => {
       const snake = [
@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { Pause, Volume2, VolumeX } from 'lucide-react';
-import type { GameMode } from '@/types';
+import type { GameMode, Replay } from '@/types';
 import { useSnakeGame } from '@/hooks/useSnakeGame';
 import GameBoard from './GameBoard';
 import GameControls from './GameControls';
@@ -9,7 +9,7 @@ import ModeSelector from './ModeSelector';
 import { cn } from '@/lib/utils';
 
 interface SnakeGameProps {
-  onScoreSubmit?: (score: number, mode: GameMode) => void;
+  onScoreSubmit?: (score: number, mode: GameMode, replay: Replay) => void;
 }
 
 export default function SnakeGame({ onScoreSubmit }: SnakeGameProps) {
@@ -29,6 +29,7 @@ export default function SnakeGame({ onScoreSubmit }: SnakeGameProps) {
     resumeGame,
     resetGame,
     changeDirection,
+    getReplay,
   } = game;
 
   // Handle mode change
@@ -40,9 +41,9 @@ export default function SnakeGame({ onScoreSubmit }: SnakeGameProps) {
   // Handle game over score submission
   useEffect(() => {
     if (gameState === 'game-over' && score > 0 && onScoreSubmit) {
-      onScoreSubmit(score, mode);
+      onScoreSubmit(score, mode, getReplay());
     }
-  }, [gameState, score, mode, onScoreSubmit]);
+  }, [gameState, score, mode, onScoreSubmit, getReplay]);
 
   // Pause on space
   useEffect(() => {
@@ -1,4 +1,4 @@
-import { useState, useEffect, useRef } from 'react';
+import { useState, useEffect } from 'react';
 import { Eye, Users, ArrowLeft, Loader2 } from 'lucide-react';
 import type { LivePlayer } from '@/types';
 import api from '@/services/api';
@@ -13,8 +13,6 @@ export default function WatchMode({ onBack }: WatchModeProps) {
   const [players, setPlayers] = useState<LivePlayer[]>([]);
   const [selectedPlayer, setSelectedPlayer] = useState<LivePlayer | null>(null);
   const [isLoading, setIsLoading] = useState(true);
-  const animationRef = useRef<number | null>(null);
-  const lastUpdateRef = useRef<number>(0);
 
   // Load active players
   useEffect(() => {
@@ -30,46 +28,27 @@ export default function WatchMode({ onBack }: WatchModeProps) {
     setIsLoading(false);
   };
 
-  // Simulate AI movement when watching a player
+  // Follow the selected player's live stream from the server
   useEffect(() => {
     if (!selectedPlayer) return;
 
-    const updateInterval = 200; // ms between updates
-
-    const animate = (timestamp: number) => {
-      if (timestamp - lastUpdateRef.current >= updateInterval) {
-        const updatedPlayer = api.live.simulateMovement(selectedPlayer, 20);
-        if (updatedPlayer) {
-          setSelectedPlayer({ ...updatedPlayer });
-          // Also update in the players list
-          setPlayers(prev => prev.map(p =>
-            p.id === updatedPlayer.id ? updatedPlayer : p
-          ));
-        }
-        lastUpdateRef.current = timestamp;
-      }
-      animationRef.current = requestAnimationFrame(animate);
-    };
-
-    animationRef.current = requestAnimationFrame(animate);
-
-    return () => {
-      if (animationRef.current) {
-        cancelAnimationFrame(animationRef.current);
-      }
-    };
+    const unsubscribe = api.live.subscribePlayer(selectedPlayer.id, (updatedPlayer) => {
+      setSelectedPlayer(updatedPlayer);
+      // Also update in the players list
+      setPlayers(prev => prev.map(p =>
+        p.id === updatedPlayer.id ? updatedPlayer : p
+      ));
+    });
+
+    return unsubscribe;
   }, [selectedPlayer?.id]);
 
   const handleSelectPlayer = (player: LivePlayer) => {
     setSelectedPlayer(player);
-    lastUpdateRef.current = 0;
   };
 
   const handleBackToList = () => {
     setSelectedPlayer(null);
-    if (animationRef.current) {
-      cancelAnimationFrame(animationRef.current);
-    }
   };
 
   if (isLoading) {
@@ -1,5 +1,5 @@
 import { useState, useCallback, useEffect, useRef } from 'react';
-import type { Position, Direction, GameMode, GameState, SnakeGameState, GameConfig } from '@/types';
+import type { Position, Direction, GameMode, GameState, SnakeGameState, GameConfig, Replay } from '@/types';
 
 const DEFAULT_CONFIG: GameConfig = {
   boardSize: 20,
@@ -14,15 +14,44 @@ const INITIAL_SNAKE: Position[] = [
   { x: 8, y: 10 },
 ];
 
-function generateFood(snake: Position[], boardSize: number): Position {
-  let food: Position;
-  do {
-    food = {
-      x: Math.floor(Math.random() * boardSize),
-      y: Math.floor(Math.random() * boardSize),
-    };
-  } while (snake.some(segment => segment.x === food.x && segment.y === food.y));
-  return food;
+// 2-bit move codes for replays, matching DIRECTIONS in backend/replay.py
+const MOVE_CODES: Record<Direction, number> = { UP: 0, DOWN: 1, LEFT: 2, RIGHT: 3 };
+
+// mulberry32; backend/replay.py reimplements it to re-play submitted games
+function createRng(seed: number): () => number {
+  let a = seed | 0;
+  return () => {
+    a = (a + 0x6d2b79f5) | 0;
+    let t = Math.imul(a ^ (a >>> 15), a | 1);
+    t = (t + Math.imul(t ^ (t >>> 7), t | 61)) ^ t;
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function packMoves(codes: number[]): string {
+  // Four moves per byte, first move in the low bits
+  const bytes = new Uint8Array(Math.ceil(codes.length / 4));
+  codes.forEach((code, i) => {
+    bytes[i >> 2] |= code << ((i & 3) * 2);
+  });
+  let binary = '';
+  bytes.forEach(b => {
+    binary += String.fromCharCode(b);
+  });
+  return btoa(binary);
+}
+
+function generateFood(snake: Position[], boardSize: number, random: () => number = Math.random): Position {
+  // Pick the k-th free cell in row-major order, so one draw always lands on a free cell
+  const taken = new Set(snake.map(segment => segment.y * boardSize + segment.x));
+  let k = Math.floor(random() * (boardSize * boardSize - taken.size));
+  for (let cell = 0; cell < boardSize * boardSize; cell++) {
+    if (taken.has(cell)) continue;
+    if (k === 0) return { x: cell % boardSize, y: Math.floor(cell / boardSize) };
+    k--;
+  }
+  // Board is full
+  return { x: -1, y: -1 };
 }
 
 function checkCollision(head: Position, snake: Position[], boardSize: number, mode: GameMode): boolean {
@@ -65,6 +94,10 @@ export function useSnakeGame(config: Partial<GameConfig> = {}) {
 
   const directionRef = useRef(direction);
   const gameLoopRef = useRef<number | null>(null);
+  const rngRef = useRef<() => number>(Math.random);
+  const seedRef = useRef(0);
+  const movesRef = useRef<number[]>([]);
+  const crashedRef = useRef(false);
 
   // Update direction ref when direction changes
   useEffect(() => {
@@ -72,9 +105,13 @@ export function useSnakeGame(config: Partial<GameConfig> = {}) {
   }, [direction]);
 
   const moveSnake = useCallback(() => {
+    if (crashedRef.current) return;
+    // Record exactly the direction this tick moves in
+    const currentDirection = directionRef.current;
+    movesRef.current.push(MOVE_CODES[currentDirection]);
+
     setSnake(currentSnake => {
       const head = { ...currentSnake[0] };
-      const currentDirection = directionRef.current;
 
       switch (currentDirection) {
         case 'UP':
@@ -96,6 +133,7 @@ export function useSnakeGame(config: Partial<GameConfig> = {}) {
 
       // Check collision
       if (checkCollision(wrappedHead, currentSnake, boardSize, mode)) {
+        crashedRef.current = true;
         setGameState('game-over');
         return currentSnake;
       }
@@ -117,7 +155,7 @@ export function useSnakeGame(config: Partial<GameConfig> = {}) {
             return newScore;
           });
           setSpeed(s => Math.max(50, s - speedIncrement));
-          return generateFood(newSnake, boardSize);
+          return generateFood(newSnake, boardSize, rngRef.current);
         }
         newSnake.pop();
         return currentFood;
@@ -189,8 +227,12 @@ export function useSnakeGame(config: Partial<GameConfig> = {}) {
   }, [gameState]);
 
   const startGame = useCallback(() => {
+    seedRef.current = Math.floor(Math.random() * 2 ** 32);
+    rngRef.current = createRng(seedRef.current);
+    movesRef.current = [];
+    crashedRef.current = false;
     setSnake(INITIAL_SNAKE);
-    setFood(generateFood(INITIAL_SNAKE, boardSize));
+    setFood(generateFood(INITIAL_SNAKE, boardSize, rngRef.current));
     setDirection('RIGHT');
     setScore(0);
     setSpeed(initialSpeed);
@@ -233,6 +275,12 @@ export function useSnakeGame(config: Partial<GameConfig> = {}) {
     }
   }, [gameState]);
 
+  const getReplay = useCallback((): Replay => ({
+    seed: seedRef.current,
+    moves: packMoves(movesRef.current),
+    ticks: movesRef.current.length,
+  }), []);
+
   const state: SnakeGameState = {
     snake,
     food,
@@ -252,11 +300,14 @@ export function useSnakeGame(config: Partial<GameConfig> = {}) {
     resumeGame,
     resetGame,
     changeDirection,
+    getReplay,
   };
 }
 
 // Export pure functions for testing
 export const gameLogic = {
+  createRng,
+  packMoves,
   generateFood,
   checkCollision,
   wrapPosition,
@@ -1,5 +1,5 @@
 import { useState } from 'react';
-import type { GameMode } from '@/types';
+import type { GameMode, Replay } from '@/types';
 import { useAuth } from '@/hooks/useAuth';
 import api from '@/services/api';
 import Header from '@/components/layout/Header';
@@ -16,14 +16,14 @@ export default function Index() {
   const [isAuthModalOpen, setIsAuthModalOpen] = useState(false);
   const { user } = useAuth();
 
-  const handleScoreSubmit = async (score: number, mode: GameMode) => {
+  const handleScoreSubmit = async (score: number, mode: GameMode, replay: Replay) => {
     if (!user) {
       toast.info('Log in to save your score to the leaderboard!');
       return;
     }
 
     try {
-      const response = await api.leaderboard.submitScore(score, mode);
+      const response = await api.leaderboard.submitScore(score, mode, replay);
       if (response.success && response.data) {
         toast.success(`Score submitted! Rank: #${response.data.rank}`);
       }
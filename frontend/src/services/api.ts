@@ -7,6 +7,7 @@ import type {
   GameMode,
   Position,
   Direction,
+  Replay,
 } from '@/types';
 
 // Use environment variable for API URL, default to empty string for production (relative URLs)
@@ -16,6 +17,8 @@ const API_URL = import.meta.env.VITE_API_URL || '';
 async function request<T>(endpoint: string, options?: RequestInit): Promise<ApiResponse<T>> {
   try {
     const response = await fetch(`${API_URL}${endpoint}`, {
+      // The session is an HttpOnly cookie, which cross-origin API URLs only get with credentials
+      credentials: 'include',
       headers: {
         'Content-Type': 'application/json',
       },
@@ -29,6 +32,44 @@ async function request<T>(endpoint: string, options?: RequestInit): Promise<ApiR
   }
 }
 
+// Frames pushed by the live stream endpoints
+type LiveFrame =
+  | { type: 'key'; seq: number; player: LivePlayer }
+  | {
+      type: 'delta';
+      seq: number;
+      id: string;
+      head: Position;
+      tailRemoved: boolean;
+      food?: Position;
+      scoreDelta?: number;
+      direction?: Direction;
+      viewers?: number;
+    };
+
+function streamUrl(endpoint: string): string {
+  const base = API_URL || window.location.origin;
+  return `${base.replace(/^http/, 'ws')}${endpoint}`;
+}
+
+// Rebuild a player from a keyframe or apply a delta to the last known state
+export function applyLiveFrame(player: LivePlayer | null, frame: LiveFrame): LivePlayer | null {
+  if (frame.type === 'key') return frame.player;
+  if (!player) return null;
+
+  const snake = [frame.head, ...player.snake];
+  if (frame.tailRemoved) snake.pop();
+
+  return {
+    ...player,
+    snake,
+    food: frame.food ?? player.food,
+    score: player.score + (frame.scoreDelta ?? 0),
+    direction: frame.direction ?? player.direction,
+    viewers: frame.viewers ?? player.viewers,
+  };
+}
+
 // Generate AI snake movement for live players (Client-side simulation)
 function generateAIMovement(snake: Position[], food: Position, direction: Direction, boardSize: number): Direction {
   const head = snake[0];
@@ -145,10 +186,11 @@ export const api = {
       return request<LeaderboardEntry[]>(`/leaderboard${query}`);
     },
 
-    async submitScore(score: number, mode: GameMode): Promise<ApiResponse<LeaderboardEntry>> {
+    async submitScore(score: number, mode: GameMode, replay: Replay): Promise<ApiResponse<LeaderboardEntry>> {
+      // The server re-plays the game and only ranks the score if the replay reproduces it
       return request<LeaderboardEntry>('/leaderboard', {
         method: 'POST',
-        body: JSON.stringify({ score, mode }),
+        body: JSON.stringify({ score, mode, replay }),
       });
     },
   },
@@ -163,6 +205,23 @@ export const api = {
       return request<LivePlayer | null>(`/live/players/${playerId}`);
     },
 
+    // Follow a player over WebSocket; returns a function that closes the stream
+    subscribePlayer(playerId: string, onUpdate: (player: LivePlayer) => void): () => void {
+      const socket = new WebSocket(streamUrl(`/live/players/${playerId}/stream`));
+      // Frames are sent as binary UTF-8 JSON so the server can share one encoding
+      socket.binaryType = 'arraybuffer';
+      const decoder = new TextDecoder();
+      let player: LivePlayer | null = null;
+
+      socket.onmessage = (event) => {
+        const text = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+        player = applyLiveFrame(player, JSON.parse(text) as LiveFrame);
+        if (player) onUpdate(player);
+      };
+
+      return () => socket.close();
+    },
+
     // Simulate AI movement for a player (Client-side only)
     simulateMovement(player: LivePlayer, boardSize: number = 20): LivePlayer | null {
       return simulateMovementPure(player, boardSize);
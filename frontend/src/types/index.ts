@@ -16,6 +16,13 @@ export interface GameConfig {
   mode: GameMode;
 }
 
+// Seed and packed per-tick directions that let the server re-play a game
+export interface Replay {
+  seed: number;
+  moves: string;
+  ticks: number;
+}
+
 export interface SnakeGameState {
   snake: Position[];
   food: Position;